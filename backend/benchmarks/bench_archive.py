@@ -0,0 +1,143 @@
+"""Размер таблицы tasks и латентность запросов до и после архивации.
+
+Пользователь с --tasks задачами, созданными равномерно за --years лет;
+в архив уходят задачи старше --days дней (src/db/archive.py). Замеряются:
+первая страница списка, весь список (как stream=true), поиск и весь список
+с include_archived.
+
+Запуск из backend/ (нужны переменные окружения из .env):
+    python -m benchmarks.bench_archive --tasks 200000
+    python -m benchmarks.bench_archive --tasks 200000 --db-url postgresql+asyncpg://...
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.core.config import settings
+from src.db.archive import archive
+from src.db.crud import _get_tasks_by_user_id, search_tasks
+from src.db.models import Base, TaskDB, UserDB
+
+WORDS = "отчёт встреча релиз баг ревью план звонок счёт дизайн тест".split()
+
+
+async def seed(session_factory, tasks: int, years: int, chunk_size: int = 5000) -> int:
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    span = timedelta(days=365 * years).total_seconds()
+    async with session_factory() as session:
+        user = UserDB(username="bench", email="bench@example.com", password_hash="x")
+        session.add(user)
+        await session.flush()
+        # Задачи вставляются в порядке создания, как в жизни
+        moments = sorted(now - timedelta(seconds=rng.random() * span) for _ in range(tasks))
+        for start in range(0, tasks, chunk_size):
+            await session.execute(
+                insert(TaskDB),
+                [
+                    {
+                        "title": " ".join(rng.choices(WORDS, k=2)),
+                        "description": " ".join(rng.choices(WORDS, k=4)),
+                        "user_id": user.id,
+                        "created_at": created_at,
+                    }
+                    for created_at in moments[start:start + chunk_size]
+                ],
+            )
+        await session.commit()
+        return user.id
+
+
+async def hot_table(session: AsyncSession) -> tuple[int, float | None]:
+    """Число строк tasks и размер таблицы с индексами в МБ."""
+    rows = await session.scalar(select(func.count()).select_from(TaskDB))
+    if session.bind.dialect.name == "postgresql":
+        size = await session.scalar(text("SELECT pg_total_relation_size('tasks')"))
+    else:
+        size = await session.scalar(
+            text("SELECT sum(pgsize) FROM dbstat WHERE name = 'tasks' OR name LIKE 'ix_tasks_user%'")
+        )
+    return rows, size / 2**20 if size is not None else None
+
+
+async def measure(session: AsyncSession, user_id: int, repeat: int) -> dict[str, float]:
+    queries = {
+        "first page": lambda: _get_tasks_by_user_id(session, user_id, limit=settings.TASKS_PAGE_SIZE + 1),
+        "full list": lambda: _get_tasks_by_user_id(session, user_id),
+        "search": lambda: search_tasks(user_id, ["релиз", "баг"], settings.TASKS_PAGE_SIZE + 1, session=session),
+        "full list + archive": lambda: _get_tasks_by_user_id(session, user_id, include_archived=True),
+    }
+    medians = {}
+    for name, query in queries.items():
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            await query()
+            timings.append(time.perf_counter() - started)
+        medians[name] = statistics.median(timings) * 1000
+    return medians
+
+
+async def run(tasks: int, years: int, days: int, repeat: int, db_url: str):
+    engine = create_async_engine(db_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    user_id = await seed(session_factory, tasks, years)
+    async with session_factory() as session:
+        before = await hot_table(session), await measure(session, user_id, repeat)
+
+    started = time.perf_counter()
+    moved = await archive(engine, datetime.utcnow() - timedelta(days=days), settings.ARCHIVE_BATCH_SIZE)
+    elapsed = time.perf_counter() - started
+    if engine.dialect.name == "postgresql":
+        # Место удалённых строк освобождает VACUUM; автоочистка сделает это сама
+        async with engine.connect() as conn:
+            await (await conn.execution_options(isolation_level="AUTOCOMMIT")).execute(text("VACUUM FULL tasks"))
+    async with session_factory() as session:
+        after = await hot_table(session), await measure(session, user_id, repeat)
+
+    print(f"{tasks} tasks over {years} years, {db_url.split(':')[0]}, median of {repeat} runs")
+    print(f"archived {moved} tasks older than {days} days in {elapsed:.1f} s")
+    print(f"{'':<22}{'before':>10}{'after':>10}")
+    (rows_before, size_before), (rows_after, size_after) = before[0], after[0]
+    print(f"{'hot rows':<22}{rows_before:>10}{rows_after:>10}")
+    if size_before is not None:
+        print(f"{'hot size, MB':<22}{size_before:>10.1f}{size_after:>10.1f}")
+    for name in before[1]:
+        print(f"{name + ', ms':<22}{before[1][name]:>10.2f}{after[1][name]:>10.2f}")
+
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=200000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db-url", default=None, help="по умолчанию временный файл SQLite")
+    args = parser.parse_args()
+
+    if args.db_url:
+        asyncio.run(run(args.tasks, args.years, args.days, args.repeat, args.db_url))
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(
+            run(args.tasks, args.years, args.days, args.repeat, f"sqlite+aiosqlite:///{Path(tmp) / 'bench.sqlite3'}")
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Сравнение N одиночных запросов к API с одним пакетным запросом.
+
+Запуск из backend/ (нужны переменные окружения из .env):
+    python -m benchmarks.bench_bulk --tasks 500
+    python -m benchmarks.bench_bulk --tasks 500 --db-url postgresql+asyncpg://...
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from benchmarks import use_database
+from src.db.models import Base
+from src.main import app
+
+
+async def login(client: AsyncClient) -> tuple[int, dict]:
+    credentials = {"username": "bench", "password": "bench-password"}
+    response = await client.post("/users/register", json={**credentials, "email": "bench@example.com"})
+    user_id = response.json()["id"]
+    response = await client.post("/users/login", json=credentials)
+    return user_id, {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def timed(coro) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = await coro
+    return time.perf_counter() - start, result
+
+
+async def run(tasks: int, db_url: str):
+    engine = create_async_engine(db_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    use_database(engine)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        user_id, headers = await login(client)
+        items = [{"title": f"Task {i}", "description": "bench"} for i in range(tasks)]
+
+        async def single_create():
+            ids = []
+            for item in items:
+                response = await client.post(f"/tasks/user/{user_id}", json=item, headers=headers)
+                ids.append(response.json()["id"])
+            return ids
+
+        async def single_delete(ids):
+            for task_id in ids:
+                await client.delete(f"/tasks/user/{user_id}/task/{task_id}", headers=headers)
+
+        async def bulk_create():
+            response = await client.post(f"/tasks/user/{user_id}/bulk", json={"items": items}, headers=headers)
+            return [item["id"] for item in response.json()["items"]]
+
+        async def bulk_delete(ids):
+            await client.post(f"/tasks/user/{user_id}/bulk/delete", json={"ids": ids}, headers=headers)
+
+        single_create_s, ids = await timed(single_create())
+        single_delete_s, _ = await timed(single_delete(ids))
+        bulk_create_s, ids = await timed(bulk_create())
+        bulk_delete_s, _ = await timed(bulk_delete(ids))
+
+    await engine.dispose()
+
+    print(f"{tasks} tasks, {db_url.split(':')[0]}")
+    print(f"{'operation':<10}{'single, ms':>14}{'bulk, ms':>12}{'speedup':>10}")
+    for name, single, bulk in (
+        ("create", single_create_s, bulk_create_s),
+        ("delete", single_delete_s, bulk_delete_s),
+    ):
+        print(f"{name:<10}{single * 1000:>14.1f}{bulk * 1000:>12.1f}{single / bulk:>9.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=500)
+    parser.add_argument("--db-url", default=None, help="по умолчанию временный файл SQLite")
+    args = parser.parse_args()
+
+    if args.db_url:
+        asyncio.run(run(args.tasks, args.db_url))
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(args.tasks, f"sqlite+aiosqlite:///{Path(tmp) / 'bench.sqlite3'}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Память и скорость выгрузки задач в сравнении со списком без пагинации.
+
+Список: get_tasks_by_user_id без limit и tasks_response, как прежний
+единственный способ получить все задачи. Выгрузка: src.db.export в
+NDJSON, CSV и с gzip. Пиковая память — по tracemalloc (отдельным прогоном,
+чтобы не искажать время).
+
+Запуск из backend/ (нужны переменные окружения из .env):
+    python -m benchmarks.bench_export --sizes 1000 100000 1000000
+    python -m benchmarks.bench_export --db-url postgresql+asyncpg://...
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.api.responses import tasks_response
+from src.db.crud import get_tasks_by_user_id
+from src.db.export import export_user
+from src.db.models import Base, TaskDB, UserDB
+
+
+async def full_list(session: AsyncSession, user_id: int) -> int:
+    rows = await get_tasks_by_user_id(user_id, session=session)
+    return len(tasks_response(rows).body)
+
+
+def exporter(fmt: str, compress: bool):
+    async def run(session: AsyncSession, user_id: int) -> int:
+        size = 0
+        async for chunk in export_user(user_id, fmt, compress, session=session):
+            size += len(chunk)
+        return size
+
+    return run
+
+
+PATHS = {
+    "full list (json)": full_list,
+    "export ndjson": exporter("ndjson", False),
+    "export csv": exporter("csv", False),
+    "export ndjson.gz": exporter("ndjson", True),
+}
+
+
+async def measure(session_factory, path, user_id: int) -> tuple[float, float, int]:
+    async with session_factory() as session:
+        started = time.perf_counter()
+        size = await path(session, user_id)
+        elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    async with session_factory() as session:
+        await path(session, user_id)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2**20, size
+
+
+async def run(sizes: list[int], db_url: str):
+    engine = create_async_engine(db_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    print(f"{db_url.split(':')[0]}")
+    print(f"{'tasks':>8}  {'path':<18}{'time, s':>9}{'rows/s':>11}{'peak, MB':>10}{'output, MB':>12}")
+    async with session_factory() as session:
+        user = UserDB(username="bench", email="bench@example.com", password_hash="x")
+        session.add(user)
+        await session.commit()
+        user_id = user.id
+    for size in sizes:
+        async with session_factory() as session:
+            await session.execute(delete(TaskDB))
+            for start in range(0, size, 5000):
+                await session.execute(
+                    insert(TaskDB),
+                    [
+                        {"title": f"Task {n}", "description": f"Description {n}", "user_id": user_id}
+                        for n in range(start, min(size, start + 5000))
+                    ],
+                )
+            await session.commit()
+        for name, path in PATHS.items():
+            elapsed, peak, output = await measure(session_factory, path, user_id)
+            print(
+                f"{size:>8}  {name:<18}{elapsed:>9.2f}{size / elapsed:>11.0f}{peak:>10.1f}{output / 2**20:>12.1f}"
+            )
+
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--db-url", default=None, help="по умолчанию временный файл SQLite")
+    args = parser.parse_args()
+
+    if args.db_url:
+        asyncio.run(run(args.sizes, args.db_url))
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(args.sizes, f"sqlite+aiosqlite:///{Path(tmp) / 'bench.sqlite3'}"))
+
+
+if __name__ == "__main__":
+    main()
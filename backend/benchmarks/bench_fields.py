@@ -0,0 +1,98 @@
+"""Выборка части полей задач (?fields=) и стоимость сжатия ответа.
+
+Страница списка читается и сериализуется так же, как в GET
+/tasks/user/{user_id}: со всеми полями и с fields=id,title. Затем тело
+полного ответа сжимается gzip с разными уровнями (GZIP_LEVEL).
+
+Запуск из backend/ (нужны переменные окружения из .env):
+    python -m benchmarks.bench_fields --tasks 1000
+    python -m benchmarks.bench_fields --db-url postgresql+asyncpg://...
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.api.responses import tasks_response
+from src.db.crud import get_tasks_by_user_id
+from src.db.models import Base, TaskDB, UserDB
+
+FIELD_SETS = {"all fields": None, "id,title": ("id", "title"), "id": ("id",)}
+
+
+def median_ms(timings: list[float]) -> float:
+    return statistics.median(timings) * 1000
+
+
+async def run(tasks: int, repeat: int, db_url: str):
+    engine = create_async_engine(db_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_factory() as session:
+        user = UserDB(username="bench", email="bench@example.com", password_hash="x")
+        session.add(user)
+        await session.flush()
+        await session.execute(
+            insert(TaskDB),
+            [
+                {"title": f"Task {n}", "description": f"Подробное описание задачи номер {n}"[:50], "user_id": user.id}
+                for n in range(tasks)
+            ],
+        )
+        await session.commit()
+
+        print(f"{tasks} tasks in one page, {db_url.split(':')[0]}, median of {repeat} runs")
+        print(f"{'fields':<14}{'query, ms':>11}{'encode, ms':>12}{'bytes':>10}")
+        body = b""
+        for name, fields in FIELD_SETS.items():
+            fetch, encode = [], []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                rows = await get_tasks_by_user_id(user.id, limit=tasks, fields=fields, session=session)
+                fetched = time.perf_counter()
+                response = tasks_response(rows, fields=fields)
+                fetch.append(fetched - started)
+                encode.append(time.perf_counter() - fetched)
+            body = body or response.body
+            print(f"{name:<14}{median_ms(fetch):>11.2f}{median_ms(encode):>12.2f}{len(response.body):>10}")
+
+    print(f"\ngzip of the all-fields body ({len(body)} bytes)")
+    print(f"{'level':<14}{'time, ms':>11}{'bytes':>12}")
+    for level in (1, 5, 6, 9):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+            compressed = compressor.compress(body) + compressor.flush()
+            timings.append(time.perf_counter() - started)
+        print(f"{level:<14}{median_ms(timings):>11.2f}{len(compressed):>12}")
+
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--db-url", default=None, help="по умолчанию временный файл SQLite")
+    args = parser.parse_args()
+
+    if args.db_url:
+        asyncio.run(run(args.tasks, args.repeat, args.db_url))
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(args.tasks, args.repeat, f"sqlite+aiosqlite:///{Path(tmp) / 'bench.sqlite3'}"))
+
+
+if __name__ == "__main__":
+    main()
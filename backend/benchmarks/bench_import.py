@@ -0,0 +1,79 @@
+"""Скорость массового импорта в сравнении с добавлением задач по одной.
+
+По одной: crud.add_task — session.add и своя транзакция на каждую задачу,
+как при переносе через API. Импорт: src.db.importer (в Postgres — COPY,
+иначе INSERT пачкой). Построчный путь медленный, поэтому для него берётся
+не больше --single задач.
+
+Запуск из backend/ (нужны переменные окружения из .env):
+    python -m benchmarks.bench_import --tasks 1000000
+    python -m benchmarks.bench_import --tasks 1000000 --db-url postgresql+asyncpg://...
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.db.crud import add_task
+from src.db.importer import import_tasks
+from src.db.models import Base, TaskDB, UserDB
+
+
+async def records(tasks: int):
+    for n in range(tasks):
+        yield {"title": f"Task {n}", "description": f"Description {n}", "created_at": "2026-01-01T00:00:00"}
+
+
+async def run(tasks: int, single: int, batch_sizes: list[int], db_url: str):
+    engine = create_async_engine(db_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        user = UserDB(username="bench", email="bench@example.com", password_hash="x")
+        session.add(user)
+        await session.commit()
+        user_id = user.id
+
+    print(f"{db_url.split(':')[0]}")
+    print(f"{'path':<26}{'tasks':>9}{'time, s':>9}{'rows/s':>10}")
+    started = time.perf_counter()
+    for n in range(single):
+        async with session_factory() as session:
+            await add_task(TaskDB(title=f"Task {n}", description=f"Description {n}", user_id=user_id), session=session)
+            await session.commit()
+    elapsed = time.perf_counter() - started
+    print(f"{'add_task one by one':<26}{single:>9}{elapsed:>9.2f}{single / elapsed:>10.0f}")
+
+    for batch_size in batch_sizes:
+        report = await import_tasks(engine, records(tasks), f"bench-{batch_size}", user_id, batch_size=batch_size)
+        name = f"import, batch {batch_size}"
+        print(f"{name:<26}{report['imported']:>9}{report['seconds']:>9.2f}{report['rows_per_second']:>10}")
+
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=200000)
+    parser.add_argument("--single", type=int, default=2000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--db-url", default=None, help="по умолчанию временный файл SQLite")
+    args = parser.parse_args()
+
+    if args.db_url:
+        asyncio.run(run(args.tasks, args.single, args.batch_sizes, args.db_url))
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(
+            run(args.tasks, args.single, args.batch_sizes, f"sqlite+aiosqlite:///{Path(tmp) / 'bench.sqlite3'}")
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Накладные расходы профилирования запросов (ProfilingMiddleware).
+
+ASGI-приложение отдаёт страницу задач через tasks_response (с фазой
+serialization) и вызывается напрямую, без HTTP: без middleware, через
+middleware без профиля (обычный запрос) и с профилем cProfile вместе с
+сохранением в кольцо на диске.
+
+Запуск из backend/ (нужны переменные окружения из .env):
+    python -m benchmarks.bench_profiling --tasks 100 --requests 5000
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from src.api.middleware import ProfilingMiddleware
+from src.api.responses import tasks_response
+from src.core.profiling import ProfileStore
+
+
+def make_app(tasks: int):
+    rows = [(n, f"Task {n}", f"Description {n}", datetime(2026, 1, 1)) for n in range(tasks)]
+
+    async def app(scope, receive, send):
+        await tasks_response(rows)(scope, receive, send)
+
+    return app
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+def scope(headers: list) -> dict:
+    return {"type": "http", "method": "GET", "path": "/tasks/user/1", "headers": headers}
+
+
+async def measure(app, requests: int, headers: list) -> float:
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        await app(scope(headers), receive, send)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1_000_000
+
+
+async def run(tasks: int, requests: int, profiled: int, directory: Path):
+    app = make_app(tasks)
+    store = ProfileStore(directory, keep=100)
+    headers = [(b"authorization", b"Bearer x"), (b"accept-encoding", b"gzip")]
+    print(f"{tasks} tasks per response, median of {requests} requests")
+    print(f"{'path':<34}{'us/request':>12}")
+    cases = [
+        ("no middleware", app, requests, headers),
+        ("middleware, not profiled", ProfilingMiddleware(app, 0.0, store), requests, headers),
+        ("middleware, sample rate 1.0", ProfilingMiddleware(app, 1.0, store), profiled, headers),
+    ]
+    for name, asgi, count, request_headers in cases:
+        await measure(asgi, min(count, 100), request_headers)
+        print(f"{name:<34}{await measure(asgi, count, request_headers):>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--profiled", type=int, default=200, help="запросов с профилем")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(args.tasks, args.requests, args.profiled, Path(tmp)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Латентность полнотекстового поиска для пользователя с большим числом задач.
+
+Запуск из backend/ (нужны переменные окружения из .env):
+    python -m benchmarks.bench_search --tasks 100000
+    python -m benchmarks.bench_search --tasks 100000 --db-url postgresql+asyncpg://...
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.db.crud import search_tasks
+from src.db.models import Base, TaskDB, UserDB
+from src.db.search import search_terms
+
+SYLLABLES = "ка ро ми на то ле да ву при за ко ре ба ли мо ту ne ro ta li ve ko".split()
+
+
+def vocabulary(rng: random.Random, size: int) -> list[str]:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def random_text(rng: random.Random, words: list[str], weights: list[float], length: int) -> str:
+    # Частоты слов по закону Ципфа, как в живом тексте
+    return " ".join(rng.choices(words, weights, k=length))
+
+
+async def seed(session_factory, tasks: int, words: list[str], chunk_size: int = 5000) -> int:
+    rng = random.Random(42)
+    weights = [1 / rank for rank in range(1, len(words) + 1)]
+    async with session_factory() as session:
+        user = UserDB(username="bench", email="bench@example.com", password_hash="x")
+        session.add(user)
+        await session.flush()
+        for start in range(0, tasks, chunk_size):
+            await session.execute(
+                insert(TaskDB),
+                [
+                    {
+                        "title": random_text(rng, words, weights, 3)[:30],
+                        "description": random_text(rng, words, weights, 8),
+                        "user_id": user.id,
+                    }
+                    for _ in range(start, min(tasks, start + chunk_size))
+                ],
+            )
+        await session.commit()
+        return user.id
+
+
+async def run(tasks: int, repeat: int, limit: int, db_url: str):
+    engine = create_async_engine(db_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    words = vocabulary(random.Random(7), 5000)
+    start = time.perf_counter()
+    user_id = await seed(session_factory, tasks, words)
+    print(f"{tasks} tasks, {db_url.split(':')[0]}, seeded in {time.perf_counter() - start:.1f} s")
+    print(f"{'query':<28}{'matches':>9}{'p50, ms':>10}{'p95, ms':>10}{'page 2, ms':>12}")
+
+    # Слова разной частоты: от встречающихся в каждой десятой задаче до редких
+    queries = {
+        f"{words[rank]} (#{rank + 1})": words[rank] for rank in (0, 9, 99, 999)
+    }
+    queries[f"{words[99][:3]}* (prefix)"] = words[99][:3]
+    queries["#10 + #100"] = f"{words[9]} {words[99]}"
+
+    async with session_factory() as session:
+        for label, query in queries.items():
+            terms = search_terms(query)
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                rows = await search_tasks(user_id, terms, limit=limit, session=session)
+                timings.append(time.perf_counter() - started)
+            page_2 = 0.0
+            if rows:
+                started = time.perf_counter()
+                await search_tasks(
+                    user_id, terms, limit=limit, after=(rows[-1]["rank"], rows[-1]["id"]), session=session
+                )
+                page_2 = time.perf_counter() - started
+            matches = len(await search_tasks(user_id, terms, limit=tasks, session=session))
+            p95 = statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+            print(
+                f"{label:<28}{matches:>9}{statistics.median(timings) * 1000:>10.2f}"
+                f"{p95 * 1000:>10.2f}{page_2 * 1000:>12.2f}"
+            )
+
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--db-url", default=None, help="по умолчанию временный файл SQLite")
+    args = parser.parse_args()
+
+    if args.db_url:
+        asyncio.run(run(args.tasks, args.repeat, args.limit, args.db_url))
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(args.tasks, args.repeat, args.limit, f"sqlite+aiosqlite:///{Path(tmp) / 'bench.sqlite3'}"))
+
+
+if __name__ == "__main__":
+    main()
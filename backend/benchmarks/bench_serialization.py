@@ -0,0 +1,115 @@
+"""Сравнение прежнего и быстрого пути отдачи списка задач.
+
+Прежний путь: select(TaskDB) с ORM-объектами, валидация по List[ReadTask]
+и стандартный JSON-кодировщик, как это делает FastAPI для возвращаемого
+значения. Быстрый: select по колонкам и orjson без повторной валидации
+(src.api.responses.tasks_response).
+
+Запуск из backend/ (нужны переменные окружения из .env):
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --sizes 10 1000 50000 --db-url postgresql+asyncpg://...
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.api.responses import tasks_response
+from src.api.schemas.task import ReadTask
+from src.db.crud import get_tasks_by_user_id
+from src.db.models import Base, TaskDB, UserDB
+
+READ_TASKS = TypeAdapter(List[ReadTask])
+
+
+async def old_path(session: AsyncSession, user_id: int) -> tuple[float, float]:
+    started = time.perf_counter()
+    result = await session.execute(
+        select(TaskDB).where(TaskDB.user_id == user_id).order_by(TaskDB.created_at, TaskDB.id)
+    )
+    tasks = result.scalars().all()
+    fetched = time.perf_counter()
+    # Как fastapi.routing.serialize_response + JSONResponse.render
+    validated = READ_TASKS.validate_python(tasks, from_attributes=True)
+    content = READ_TASKS.dump_python(validated, mode="json")
+    json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+    encoded = time.perf_counter()
+    session.expunge_all()
+    return fetched - started, encoded - fetched
+
+
+async def new_path(session: AsyncSession, user_id: int) -> tuple[float, float]:
+    started = time.perf_counter()
+    rows = await get_tasks_by_user_id(user_id, session=session)
+    fetched = time.perf_counter()
+    tasks_response(rows)
+    return fetched - started, time.perf_counter() - fetched
+
+
+async def run(sizes: list[int], repeat: int, db_url: str):
+    engine = create_async_engine(db_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    print(f"{db_url.split(':')[0]}, median of {repeat} runs, ms")
+    print(f"{'tasks':>7}{'old fetch':>11}{'old encode':>12}{'new fetch':>11}{'new encode':>12}{'speedup':>9}")
+    async with session_factory() as session:
+        user = UserDB(username="bench", email="bench@example.com", password_hash="x")
+        session.add(user)
+        await session.commit()
+        for size in sizes:
+            await session.execute(delete(TaskDB))
+            for start in range(0, size, 5000):
+                await session.execute(
+                    insert(TaskDB),
+                    [
+                        {"title": f"Task {n}", "description": f"Description {n}", "user_id": user.id}
+                        for n in range(start, min(size, start + 5000))
+                    ],
+                )
+            await session.commit()
+
+            timings = {"old": [], "new": []}
+            for _ in range(repeat):
+                timings["old"].append(await old_path(session, user.id))
+                timings["new"].append(await new_path(session, user.id))
+            medians = {
+                name: [statistics.median(step) * 1000 for step in zip(*values)]
+                for name, values in timings.items()
+            }
+            speedup = sum(medians["old"]) / sum(medians["new"])
+            print(
+                f"{size:>7}{medians['old'][0]:>11.2f}{medians['old'][1]:>12.2f}"
+                f"{medians['new'][0]:>11.2f}{medians['new'][1]:>12.2f}{speedup:>8.1f}x"
+            )
+
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db-url", default=None, help="по умолчанию временный файл SQLite")
+    args = parser.parse_args()
+
+    if args.db_url:
+        asyncio.run(run(args.sizes, args.repeat, args.db_url))
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(args.sizes, args.repeat, f"sqlite+aiosqlite:///{Path(tmp) / 'bench.sqlite3'}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Холодный старт сервера: от запуска процесса до первого успешного ответа.
+
+Запускает python -m src.server (или обычный uvicorn для сравнения) и
+замеряет время до первого 200 на /health/live, на /health/ready (пул
+прогрет) и до первого ответа, для которого нужна БД (вход несуществующего
+пользователя: 401). Затем
+отправляет SIGTERM и замеряет время остановки. БД и переменные окружения —
+те же, что у сервера (.env).
+
+Запуск из backend/:
+    python -m benchmarks.cold_start
+    python -m benchmarks.cold_start --workers 4 --runs 5
+    python -m benchmarks.cold_start --server uvicorn
+"""
+import argparse
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+COMMANDS = {
+    "launcher": [sys.executable, "-m", "src.server"],
+    "uvicorn": [sys.executable, "-m", "uvicorn", "src.main:app"],
+}
+
+
+def _wait_for(check, deadline: float) -> float | None:
+    while time.perf_counter() < deadline:
+        try:
+            if check():
+                return time.perf_counter()
+        except httpx.TransportError:
+            pass
+        time.sleep(0.01)
+    return None
+
+
+def measure(server: str, workers: int, port: int, timeout: float) -> dict:
+    base_url = f"http://127.0.0.1:{port}"
+    env = {
+        **os.environ,
+        "SERVER_HOST": "127.0.0.1",
+        "SERVER_PORT": str(port),
+        "SERVER_WORKERS": str(workers),
+    }
+    command = COMMANDS[server]
+    if server == "uvicorn":
+        command = command + ["--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)]
+
+    started = time.perf_counter()
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    result = {"live_ms": None, "ready_ms": None, "first_db_ms": None, "shutdown_ms": None}
+    try:
+        with httpx.Client(base_url=base_url, timeout=1.0) as client:
+            deadline = started + timeout
+            for key, path in (("live_ms", "/health/live"), ("ready_ms", "/health/ready")):
+                reached = _wait_for(lambda: client.get(path).status_code == 200, deadline)
+                if reached is not None:
+                    result[key] = (reached - started) * 1000
+            login = {"username": f"cold-{uuid.uuid4().hex[:8]}", "password": "cold-start-password"}
+            first_db = _wait_for(lambda: client.post("/users/login", json=login).status_code == 401, deadline)
+            if first_db is not None:
+                result["first_db_ms"] = (first_db - started) * 1000
+    finally:
+        stopping = time.perf_counter()
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=timeout)
+            result["shutdown_ms"] = (time.perf_counter() - stopping) * 1000
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    return result
+
+
+def _median(values: list) -> str:
+    values = [value for value in values if value is not None]
+    return f"{statistics.median(values):.0f}" if values else "n/a"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--server", choices=sorted(COMMANDS), default="launcher")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    runs = [measure(args.server, args.workers, args.port, args.timeout) for _ in range(args.runs)]
+    print(f"{args.server}, {args.workers} worker(s), median of {args.runs} runs, ms")
+    for key in ("live_ms", "ready_ms", "first_db_ms", "shutdown_ms"):
+        print(f"{key:>12}: {_median([run[key] for run in runs])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import hashlib
+
+from fastapi import Request
+
+
+def list_etag(request: Request, user_id: int, version: int) -> str:
+    """Слабый ETag списка: версия задач пользователя + параметры запроса."""
+    query = hashlib.blake2s(request.url.query.encode("utf-8"), digest_size=6).hexdigest()
+    return f'W/"{user_id}-{version}-{query}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Слабое сравнение для If-None-Match (RFC 9110, 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
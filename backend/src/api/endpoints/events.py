@@ -0,0 +1,92 @@
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
+
+from src.core.config import settings
+from src.core.events import broker
+from src.core.security import authenticate, http_bearer
+
+router = APIRouter(prefix="/tasks", tags=["Events"])
+
+
+async def _authorize(user_id: int, token: Optional[str]):
+    if not token:
+        raise HTTPException(status_code=401, detail="Требуется аутентификация")
+    user = await authenticate(token)
+    if user.id != user_id:
+        raise HTTPException(status_code=403, detail="Доступ запрещен")
+    return user
+
+
+async def _until_disconnect(websocket: WebSocket) -> None:
+    # Кадры клиента не нужны, но их чтение сразу показывает разрыв соединения
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+@router.websocket("/user/{user_id}/ws")
+async def task_events_ws(websocket: WebSocket, user_id: int, token: Optional[str] = None):
+    """Лента изменений задач пользователя по WebSocket.
+
+    Браузер не может передать заголовок Authorization, поэтому токен идёт в ?token=.
+    """
+    try:
+        await _authorize(user_id, token)
+    except HTTPException as exc:
+        await websocket.close(code=1008, reason=exc.detail)
+        return
+
+    async with broker.subscribe(user_id) as subscription:
+        await websocket.accept()
+        disconnected = asyncio.create_task(_until_disconnect(websocket))
+        try:
+            while True:
+                getter = asyncio.create_task(subscription.get(timeout=settings.EVENTS_HEARTBEAT_SECONDS))
+                # Подписка освобождается сразу после разрыва, а не при следующей отправке
+                await asyncio.wait({getter, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if disconnected.done():
+                    getter.cancel()
+                    break
+                event = getter.result()
+                if event is None:
+                    await broker.ensure_ready()
+                    event = {"type": "ping"}
+                await websocket.send_json(event)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            disconnected.cancel()
+
+
+@router.get("/user/{user_id}/events")
+async def task_events_sse(
+    user_id: int,
+    token: Optional[str] = Query(None),
+    credentials: HTTPAuthorizationCredentials = Depends(http_bearer),
+):
+    """Лента изменений задач пользователя через Server-Sent Events."""
+    if credentials is not None:
+        token = credentials.credentials
+    await _authorize(user_id, token)
+
+    async def stream():
+        async with broker.subscribe(user_id) as subscription:
+            yield ": connected\n\n"
+            while True:
+                event = await subscription.get(timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+                if event is None:
+                    await broker.ensure_ready()
+                    yield ": ping\n\n"
+                    continue
+                data = json.dumps(event, ensure_ascii=False)
+                yield f"event: {event['type']}\ndata: {data}\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
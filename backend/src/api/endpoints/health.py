@@ -0,0 +1,36 @@
+import asyncio
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+
+from src.core.config import settings
+from src.db.database import engine
+from src.db.replicas import CONNECTION_ERRORS
+from src.db.warmup import readiness
+
+# Для балансировщика и оркестратора, без авторизации
+router = APIRouter(prefix="/health", tags=["Health"])
+
+
+async def _probe_database():
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
+@router.get("/live")
+async def live():
+    """Процесс жив и цикл событий отвечает; БД не проверяется."""
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def ready():
+    """Можно слать трафик: прогрев закончен и основная БД отвечает, иначе 503."""
+    if not readiness.ready:
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    try:
+        await asyncio.wait_for(_probe_database(), settings.HEALTH_DB_TIMEOUT)
+    except (asyncio.TimeoutError, *CONNECTION_ERRORS):
+        return JSONResponse(status_code=503, content={"status": "unavailable"})
+    return {"status": "ok", "warmup_seconds": readiness.warmup_seconds}
@@ -0,0 +1,80 @@
+import asyncio
+import zlib
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import FileResponse
+
+from src.core.profiling import profile_store
+from src.core.security import require_admin
+from src.db.database import engine, pool_metrics, replicas, slow_query_log
+from src.db.importer import CheckpointMoved, gunzip_chunks, import_tasks, read_records
+
+router = APIRouter(prefix="/internal", tags=["Internal"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/pool")
+async def pool_stats():
+    """Состояние пула соединений: занятые, overflow, ожидание, ошибки выдачи."""
+    return pool_metrics.stats(engine.sync_engine.pool)
+
+
+@router.get("/replicas")
+async def replica_stats():
+    """Реплики для чтения: доступность, занятые соединения, запросы и ошибки."""
+    return {"balance": replicas.balance, "replicas": replicas.stats()}
+
+
+@router.get("/slow-queries")
+async def slow_queries(limit: Optional[int] = Query(None, ge=1)):
+    """Последние медленные запросы, новые первыми: время, CRUD-функция, параметры, план."""
+    return {
+        "threshold_ms": slow_query_log.threshold * 1000,
+        "queries": slow_query_log.recent(limit),
+    }
+
+
+@router.delete("/slow-queries", status_code=204)
+async def clear_slow_queries():
+    """Очистить буфер медленных запросов."""
+    slow_query_log.clear()
+
+
+@router.get("/profiles")
+async def profiles(limit: Optional[int] = Query(None, ge=1)):
+    """Сохранённые профили запросов, новые первыми: маршрут, статус, фазы, самые долгие функции."""
+    return {"profiles": await asyncio.to_thread(profile_store.recent, limit)}
+
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(profile_id: str):
+    """Полный профиль cProfile в формате pstats (python -m pstats, snakeviz)."""
+    path = profile_store.path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Профиль не найден")
+    return FileResponse(path, media_type="application/octet-stream", filename=path.name)
+
+
+@router.post("/import")
+async def import_user_tasks(
+    request: Request,
+    job: str = Query(min_length=1, max_length=100),
+    format: Literal["ndjson", "csv"] = "ndjson",
+    user_id: Optional[int] = None,
+    content_encoding: Optional[str] = Header(None),
+):
+    """Импорт задач из тела запроса (NDJSON или CSV, можно Content-Encoding: gzip).
+
+    Тело читается потоком, каждая пачка коммитится вместе с контрольной
+    точкой задания job; повтор с тем же job продолжает прерванный импорт.
+    user_id — владелец записей, в которых он не указан.
+    """
+    chunks = request.stream()
+    if content_encoding == "gzip":
+        chunks = gunzip_chunks(chunks)
+    try:
+        return await import_tasks(engine, read_records(chunks, format), job, user_id=user_id)
+    except CheckpointMoved:
+        raise HTTPException(status_code=409, detail="Импорт с этим job уже выполняется")
+    except (zlib.error, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Не удалось прочитать тело запроса")
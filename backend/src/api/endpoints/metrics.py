@@ -0,0 +1,89 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.core.cache import tasks_version_cache, token_cache, user_cache
+from src.core.events import broker
+from src.core.metrics import Counter, Gauge, HistogramFamily, registry
+from src.core.security import hash_executor
+from src.db.database import engine, pool_metrics, replicas
+
+# Эндпоинт без авторизации: доступ к /metrics ограничивается на уровне ingress
+router = APIRouter(tags=["Metrics"])
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@registry.collector
+def _pool_metrics():
+    stats = pool_metrics.stats(engine.sync_engine.pool)
+    name = stats["name"]
+    for key in ("size", "checked_out", "idle", "overflow_in_use"):
+        gauge = Gauge(f"db_pool_{key}", f"Пул соединений: {key}", ("pool",))
+        gauge.set(stats[key], name)
+        yield gauge
+    for key in ("checkouts", "checkins", "connects", "invalidations", "checkout_failures"):
+        counter = Counter(f"db_pool_{key}_total", f"Пул соединений: {key}", ("pool",))
+        counter.inc(name, amount=stats[key])
+        yield counter
+    wait = HistogramFamily("db_pool_wait_seconds", "Ожидание соединения из пула", ("pool",))
+    wait.children[(name,)] = pool_metrics.wait_seconds
+    yield wait
+
+
+@registry.collector
+def _replica_metrics():
+    if not replicas:
+        return []
+    up = Gauge("db_replica_up", "Реплика доступна для чтения", ("replica",))
+    in_use = Gauge("db_replica_in_use", "Занятые соединения реплики", ("replica",))
+    queries = Counter("db_replica_queries_total", "CRUD-вызовы, выполненные на реплике", ("replica",))
+    failures = Counter("db_replica_failures_total", "Ошибки соединения с репликой", ("replica",))
+    for stats in replicas.stats():
+        name = stats["name"]
+        up.set(int(stats["healthy"]), name)
+        in_use.set(stats["in_use"], name)
+        queries.inc(name, amount=stats["queries"])
+        failures.inc(name, amount=stats["failures"])
+    return [up, in_use, queries, failures]
+
+
+@registry.collector
+def _cache_metrics():
+    caches = {"user": user_cache, "token": token_cache, "tasks_version": tasks_version_cache}
+    size = Gauge("cache_size", "Число записей в кэше", ("cache",))
+    families = [size]
+    for key in ("hits", "misses", "evictions", "expirations"):
+        families.append(Counter(f"cache_{key}_total", f"Кэш: {key}", ("cache",)))
+    for cache_name, cache in caches.items():
+        stats = cache.stats()
+        size.set(stats["size"], cache_name)
+        for family, key in zip(families[1:], ("hits", "misses", "evictions", "expirations")):
+            family.inc(cache_name, amount=stats[key])
+    return families
+
+
+@registry.collector
+def _executor_metrics():
+    stats = hash_executor.stats()
+    waiting = Gauge("hash_executor_waiting", "Хэширования паролей в очереди")
+    waiting.set(stats["waiting"])
+    in_flight = Gauge("hash_executor_in_flight", "Хэширования паролей в работе")
+    in_flight.set(stats["in_flight"])
+    completed = Counter("hash_executor_completed_total", "Завершённые хэширования паролей")
+    completed.inc(amount=stats["completed"])
+    rejected = Counter("hash_executor_rejected_total", "Хэширования, отклонённые из-за длинной очереди")
+    rejected.inc(amount=stats["rejected"])
+    return [waiting, in_flight, completed, rejected]
+
+
+@registry.collector
+def _events_metrics():
+    subscribers = Gauge("events_subscribers", "Подписчики ленты изменений задач")
+    subscribers.set(broker.subscriber_count())
+    return [subscribers]
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Метрики процесса в текстовом формате Prometheus."""
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
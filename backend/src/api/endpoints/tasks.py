@@ -1,17 +1,74 @@
-from typing import List
+from datetime import datetime, timedelta
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.api.schemas.task import AddTask, EditTask, ReadTask
+from src.api.conditional import etag_matches, list_etag
+from src.api.fields import requested_fields, tasks_adapter
+from src.api.pagination import (
+    NEXT_CURSOR_HEADER,
+    decode_cursor,
+    decode_search_cursor,
+    encode_cursor,
+    encode_search_cursor,
+)
+from src.api.responses import ndjson_line, tasks_response
+from src.api.schemas.task import (
+    AddTask,
+    BulkAddTasks,
+    BulkDeleteTasks,
+    BulkEditTasks,
+    BulkItemResult,
+    BulkResult,
+    EditTask,
+    PatchTask,
+    ReadTask,
+    TaskChange,
+    TaskChanges,
+    TaskStats,
+    TaskStatsBucket,
+)
+from src.core.config import settings
+from src.core.events import broker
+from src.core.profiling import phase
 from src.core.security import get_current_user
-from src.db.crud import add_task, delete_task, get_tasks_by_user_id, update_task
+from src.db.crud import (
+    TASK_FIELDS,
+    add_task,
+    add_tasks,
+    delete_task,
+    delete_tasks,
+    get_current_tasks_version,
+    get_task_changes,
+    get_task_stats,
+    get_tasks_by_user_id,
+    get_tasks_version,
+    search_tasks,
+    stream_tasks_by_user_id,
+    update_task,
+    update_tasks,
+)
+from src.db.database import get_session
+from src.db.export import FORMATS, export_filename, export_user
 from src.db.models import TaskDB
+from src.db.search import search_terms
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
 
+def _tasks_event(kind: str, tasks: List[ReadTask]) -> dict:
+    return {"type": kind, "tasks": [task.model_dump(mode="json") for task in tasks]}
+
+
 @router.post("/user/{user_id}")
-async def create_task(user_id: int, data: AddTask, user=Depends(get_current_user)) -> ReadTask:
+async def create_task(
+    user_id: int,
+    data: AddTask,
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> ReadTask:
     """Создать задачу для пользователя."""
     if user.id != user_id:
         raise HTTPException(status_code=403, detail="Доступ запрещен")
@@ -20,40 +77,381 @@ async def create_task(user_id: int, data: AddTask, user=Depends(get_current_user
         description=data.description,
         user_id=user_id
     )
-    new_task = await add_task(task)
-    return new_task
+    new_task = await add_task(task, session=session)
+    result = ReadTask.model_validate(new_task, from_attributes=True)
+    await broker.publish(session, user_id, _tasks_event("created", [result]))
+    await session.commit()
+    return result
+
+
+async def _tasks_ndjson(
+    user_id: int, include_archived: bool, fields: tuple[str, ...] | None, session: AsyncSession
+):
+    rows = stream_tasks_by_user_id(
+        user_id,
+        yield_per=settings.TASKS_STREAM_YIELD_PER,
+        include_archived=include_archived,
+        fields=fields,
+        session=session,
+    )
+    async for row in rows:
+        with phase("serialization"):
+            line = ndjson_line(dict(row) if fields is None else {name: row[name] for name in fields})
+        yield line
 
 
 @router.get("/user/{user_id}")
-async def get_tasks(user_id: int, user=Depends(get_current_user)) -> List[ReadTask]:
-    """Получить все задачи пользователя."""
+async def get_tasks(
+    user_id: int,
+    request: Request,
+    limit: int = Query(settings.TASKS_PAGE_SIZE, ge=1, le=settings.TASKS_PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    include_archived: bool = False,
+    fields: tuple[str, ...] | None = Depends(requested_fields),
+    if_none_match: Optional[str] = Header(None),
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> List[ReadTask]:
+    """Получить задачи пользователя страницами по (created_at, id).
+
+    Курсор следующей страницы возвращается в заголовке X-Next-Cursor.
+    С stream=true все задачи отдаются потоком NDJSON без пагинации.
+    С include_archived=true в список попадают и задачи из архива.
+    С fields=id,title отдаются и читаются из БД только эти поля.
+    Ответ помечается ETag; на If-None-Match с той же версией отдаётся 304
+    без обращения к таблице задач.
+    """
+    if user.id != user_id:
+        raise HTTPException(status_code=403, detail="Доступ запрещен")
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Недействительный курсор")
+
+    version = await get_tasks_version(user_id, session=session)
+    etag = list_etag(request, user_id, version)
+    cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=cache_headers)
+
+    if stream:
+        return StreamingResponse(
+            _tasks_ndjson(user_id, include_archived, fields, session),
+            media_type="application/x-ndjson",
+            headers=cache_headers,
+        )
+
+    # Запрашиваем на одну строку больше, чтобы понять, есть ли следующая страница
+    tasks = await get_tasks_by_user_id(
+        user_id, limit=limit + 1, after=after, include_archived=include_archived, fields=fields, session=session
+    )
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        cache_headers[NEXT_CURSOR_HEADER] = encode_cursor(tasks[-1].created_at, tasks[-1].id)
+    return tasks_response(tasks, headers=cache_headers, fields=fields)
+
+
+@router.get("/user/{user_id}/search")
+async def search_user_tasks(
+    user_id: int,
+    request: Request,
+    q: str = Query(min_length=1, max_length=200),
+    limit: int = Query(settings.TASKS_PAGE_SIZE, ge=1, le=settings.TASKS_PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    fields: tuple[str, ...] | None = Depends(requested_fields),
+    if_none_match: Optional[str] = Header(None),
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> List[ReadTask]:
+    """Полнотекстовый поиск по заголовкам и описаниям задач пользователя.
+
+    Каждое слово запроса ищется по префиксу, результаты — по убыванию
+    релевантности. Пагинация, ETag и fields — как у списка задач.
+    """
     if user.id != user_id:
         raise HTTPException(status_code=403, detail="Доступ запрещен")
-    tasks = await get_tasks_by_user_id(user_id)
-    return tasks
+    try:
+        after = decode_search_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Недействительный курсор")
+
+    version = await get_tasks_version(user_id, session=session)
+    etag = list_etag(request, user_id, version)
+    cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=cache_headers)
+
+    terms = search_terms(q)
+    rows = []
+    if terms:
+        rows = await search_tasks(user_id, terms, limit=limit + 1, after=after, fields=fields, session=session)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        cache_headers[NEXT_CURSOR_HEADER] = encode_search_cursor(rows[-1]["rank"], rows[-1]["id"])
+    # Модель ответа под выбранные поля строится один раз на сочетание полей
+    adapter = tasks_adapter(fields or TASK_FIELDS)
+    with phase("serialization"):
+        body = adapter.dump_json(adapter.validate_python(rows))
+    return Response(body, media_type="application/json", headers=cache_headers)
+
+
+@router.get("/user/{user_id}/export")
+async def export_user_tasks(
+    user_id: int,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    gzip: bool = False,
+    include_archived: bool = True,
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    """Выгрузить все задачи пользователя файлом NDJSON или CSV, с gzip=true — сжатым.
+
+    Задачи читаются серверным курсором и отдаются потоком: память не зависит
+    от числа задач. По умолчанию в выгрузку попадает и архив.
+    """
+    if user.id != user_id:
+        raise HTTPException(status_code=403, detail="Доступ запрещен")
+    filename = export_filename(user_id, format, gzip)
+    return StreamingResponse(
+        export_user(user_id, format, gzip, include_archived=include_archived, session=session),
+        media_type="application/gzip" if gzip else FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/user/{user_id}/changes")
+async def get_user_task_changes(
+    user_id: int,
+    since: int = Query(0, ge=0),
+    limit: int = Query(settings.CHANGES_PAGE_SIZE, ge=1, le=settings.CHANGES_PAGE_SIZE_MAX),
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> TaskChanges:
+    """Изменения задач после since: по одной записи на задачу, удалённые — с deleted=true.
+
+    Клиент хранит next_since и передаёт его в следующий раз; пока has_more,
+    можно сразу запрашивать следующую страницу. При reset=true изменения
+    после since уже удалены из журнала: клиент заново загружает весь список
+    и продолжает с next_since.
+    """
+    if user.id != user_id:
+        raise HTTPException(status_code=403, detail="Доступ запрещен")
+    if since == (await get_tasks_version(user_id, session=session) or 0):
+        return TaskChanges(changes=[], next_since=since, has_more=False)
+
+    # Версия из кэша или с реплики может отставать от since, который клиент
+    # получил раньше; журнал читается вместе со своей версией
+    version, pruned, rows = await get_task_changes(user_id, since, limit + 1, session=session)
+    if since > version:
+        current = await get_current_tasks_version(user_id, session=session) or 0
+        if since <= current:
+            # Реплика ещё не догнала основную БД: изменений пока нет
+            return TaskChanges(changes=[], next_since=since, has_more=False)
+        # since из другой истории (например, БД восстановлена из бэкапа)
+        return TaskChanges(changes=[], next_since=current, has_more=False, reset=True)
+    if since < pruned:
+        return TaskChanges(changes=[], next_since=version, has_more=False, reset=True)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    changes = [
+        TaskChange(
+            seq=row.seq,
+            id=row.task_id,
+            deleted=row.id is None,
+            task=ReadTask(id=row.id, title=row.title, description=row.description, created_at=row.created_at)
+            if row.id is not None
+            else None,
+        )
+        for row in rows
+    ]
+    if has_more:
+        return TaskChanges(changes=changes, next_since=rows[-1].seq, has_more=True)
+    # Все записи журнала с seq <= version уже видны этому запросу: версия
+    # может обогнать журнал (архивация), и её можно сразу взять за since
+    next_since = max(rows[-1].seq if rows else since, version)
+    return TaskChanges(changes=changes, next_since=next_since, has_more=False)
+
+
+@router.get("/user/{user_id}/stats")
+async def get_user_task_stats(
+    user_id: int,
+    period: Literal["day", "week"] = "day",
+    buckets: int = Query(30, ge=1, le=366),
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> TaskStats:
+    """Всего задач и число созданных задач за последние buckets дней или недель (UTC).
+
+    Периоды без задач возвращаются с нулём; неделя начинается с понедельника.
+    """
+    if user.id != user_id:
+        raise HTTPException(status_code=403, detail="Доступ запрещен")
+    today = datetime.utcnow().date()
+    step = timedelta(days=1 if period == "day" else 7)
+    first = today if period == "day" else today - timedelta(days=today.weekday())
+    since = first - step * (buckets - 1)
+
+    # Задачи с created_at в будущем (например, из импорта) в периоды не попадают
+    total, rows = await get_task_stats(user_id, since, today, session=session)
+    counts = dict.fromkeys((since + step * n for n in range(buckets)), 0)
+    for day, count in rows:
+        counts[day - timedelta(days=day.weekday()) if period == "week" else day] += count
+    return TaskStats(
+        total=total,
+        period=period,
+        buckets=[TaskStatsBucket(start=start, count=count) for start, count in counts.items()],
+    )
 
 
 @router.put("/user/{user_id}/task/{task_id}")
-async def edit_task(user_id: int, task_id: int, data: EditTask, user=Depends(get_current_user)) -> ReadTask:
+async def edit_task(
+    user_id: int,
+    task_id: int,
+    data: EditTask,
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> ReadTask:
     """Обновить задачу по ID."""
     if user.id != user_id:
         raise HTTPException(status_code=403, detail="Доступ запрещен")
-    task = await update_task(user_id, task_id, data.title)
+    task = await update_task(
+        user_id, task_id, title=data.title, description=data.description, session=session
+    )
     if not task:
         raise HTTPException(status_code=404, detail="Задача не найдена")
+    result = ReadTask(**task)
+    await broker.publish(session, user_id, _tasks_event("updated", [result]))
+    await session.commit()
+    return result
 
-    if data.description:
-        task.description = data.description
-    return task
+
+@router.patch("/user/{user_id}/task/{task_id}")
+async def patch_task(
+    user_id: int,
+    task_id: int,
+    data: PatchTask,
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> ReadTask:
+    """Обновить только переданные поля задачи."""
+    if user.id != user_id:
+        raise HTTPException(status_code=403, detail="Доступ запрещен")
+    values = data.model_dump(exclude_unset=True)
+    task = await update_task(user_id, task_id, **values, session=session)
+    if not task:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    result = ReadTask(**task)
+    if values:
+        await broker.publish(session, user_id, _tasks_event("updated", [result]))
+    await session.commit()
+    return result
 
 
 @router.delete("/user/{user_id}/task/{task_id}")
-async def remove_task(user_id: int, task_id: int, user=Depends(get_current_user)):
+async def remove_task(
+    user_id: int,
+    task_id: int,
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
     """Удалить задачу пользователя."""
     if user.id != user_id:
         raise HTTPException(status_code=403, detail="Доступ запрещен")
-    await delete_task(user_id, task_id)
+    if await delete_task(user_id, task_id, session=session) is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    await broker.publish(session, user_id, {"type": "deleted", "ids": [task_id]})
+    await session.commit()
     return {"detail": "Задача удалена"}
 
 
+def _check_batch_size(size: int):
+    if size > settings.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413, detail=f"Не больше {settings.BULK_MAX_ITEMS} элементов за запрос"
+        )
+
+
+def _bulk_result(items: List[BulkItemResult]) -> BulkResult:
+    succeeded = sum(item.ok for item in items)
+    return BulkResult(succeeded=succeeded, failed=len(items) - succeeded, items=items)
 
+
+@router.post("/user/{user_id}/bulk")
+async def create_tasks_bulk(
+    user_id: int,
+    data: BulkAddTasks,
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> BulkResult:
+    """Создать несколько задач одним запросом."""
+    if user.id != user_id:
+        raise HTTPException(status_code=403, detail="Доступ запрещен")
+    _check_batch_size(len(data.items))
+    rows = await add_tasks(
+        user_id,
+        [item.model_dump() for item in data.items],
+        chunk_size=settings.BULK_CHUNK_SIZE,
+        session=session,
+    )
+    tasks = [ReadTask(**row) for row in rows]
+    await broker.publish(session, user_id, _tasks_event("created", tasks))
+    await session.commit()
+    return _bulk_result([
+        BulkItemResult(index=index, ok=True, id=task.id, task=task)
+        for index, task in enumerate(tasks)
+    ])
+
+
+@router.put("/user/{user_id}/bulk")
+async def edit_tasks_bulk(
+    user_id: int,
+    data: BulkEditTasks,
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> BulkResult:
+    """Обновить несколько задач одним запросом."""
+    if user.id != user_id:
+        raise HTTPException(status_code=403, detail="Доступ запрещен")
+    _check_batch_size(len(data.items))
+    rows = await update_tasks(
+        user_id,
+        [item.model_dump() for item in data.items],
+        chunk_size=settings.BULK_CHUNK_SIZE,
+        session=session,
+    )
+    updated = {row["id"]: ReadTask(**row) for row in rows}
+    if updated:
+        await broker.publish(session, user_id, _tasks_event("updated", list(updated.values())))
+    await session.commit()
+    return _bulk_result([
+        BulkItemResult(index=index, ok=True, id=item.id, task=updated[item.id])
+        if item.id in updated
+        else BulkItemResult(index=index, ok=False, id=item.id, error="Задача не найдена")
+        for index, item in enumerate(data.items)
+    ])
+
+
+@router.post("/user/{user_id}/bulk/delete")
+async def remove_tasks_bulk(
+    user_id: int,
+    data: BulkDeleteTasks,
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> BulkResult:
+    """Удалить несколько задач одним запросом."""
+    if user.id != user_id:
+        raise HTTPException(status_code=403, detail="Доступ запрещен")
+    _check_batch_size(len(data.ids))
+    deleted = await delete_tasks(
+        user_id, data.ids, chunk_size=settings.BULK_CHUNK_SIZE, session=session
+    )
+    if deleted:
+        await broker.publish(session, user_id, {"type": "deleted", "ids": sorted(deleted)})
+    await session.commit()
+    return _bulk_result([
+        BulkItemResult(index=index, ok=True, id=task_id)
+        if task_id in deleted
+        else BulkItemResult(index=index, ok=False, id=task_id, error="Задача не найдена")
+        for index, task_id in enumerate(data.ids)
+    ])
@@ -1,32 +1,72 @@
-from fastapi import APIRouter, HTTPException
+import math
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api.schemas.user import UserCreate, UserLogin, UserRead
+from src.core.config import settings
+from src.core.ratelimit import Rule, auth_limiter
 from src.core.security import Hasher, create_access_token
-from src.db.crud import add_user, get_user_by_username
+from src.db.crud import add_user, get_user_by_username, update_user_password_hash
+from src.db.database import get_session
 from src.db.models import UserDB
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
+IP_RULE = Rule(settings.AUTH_IP_BURST, settings.AUTH_IP_PER_MINUTE)
+USER_RULE = Rule(settings.AUTH_USER_BURST, settings.AUTH_USER_PER_MINUTE)
+
+
+async def _limit(scope: str, key: str, rule: Rule):
+    """429 с Retry-After, если ведро scope:key пусто. Проверка идёт до хэширования."""
+    decision = await auth_limiter.hit(scope, key, rule)
+    if not decision.allowed:
+        raise HTTPException(
+            status_code=429,
+            detail="Слишком много попыток, повторите позже",
+            headers={"Retry-After": str(max(1, math.ceil(decision.retry_after)))},
+        )
+
+
+def _client_ip(request: Request) -> str:
+    # За прокси адрес клиента подставляет uvicorn --proxy-headers
+    return request.client.host if request.client else "unknown"
+
 
 @router.post("/register")
-async def register_user(data: UserCreate) -> UserRead:
-    existing = await get_user_by_username(data.username)
+async def register_user(
+    data: UserCreate, request: Request, session: AsyncSession = Depends(get_session)
+) -> UserRead:
+    await _limit("register_ip", _client_ip(request), IP_RULE)
+    existing = await get_user_by_username(data.username, session=session)
     if existing:
         raise HTTPException(status_code=400, detail="Пользователь уже существует")
+    # Не держим соединение из пула, пока считается хэш
+    await session.commit()
     user = UserDB(
         username=data.username,
-        password_hash=Hasher.get_hash(data.password),
+        password_hash=await Hasher.get_hash_async(data.password),
         email=data.email
     )
-    user = await add_user(user)
+    user = await add_user(user, session=session)
+    await session.commit()
     return UserRead(id=user.id, username=user.username, email=user.email)
 
 
 @router.post("/login")
-async def login_user(data: UserLogin):
-    user = await get_user_by_username(data.username)
-    if not user or not Hasher.verify_password(data.password, user.password_hash):
+async def login_user(data: UserLogin, request: Request, session: AsyncSession = Depends(get_session)):
+    await _limit("login_ip", _client_ip(request), IP_RULE)
+    await _limit("login_user", data.username, USER_RULE)
+    user = await get_user_by_username(data.username, session=session)
+    # Не держим соединение из пула, пока проверяется пароль
+    await session.commit()
+    if not user or not await Hasher.verify_password_async(data.password, user.password_hash):
         raise HTTPException(status_code=401, detail="Неверные учетные данные")
+    if Hasher.needs_update(user.password_hash):
+        # Стоимость хэширования поменялась: пересчитываем хэш, пока знаем пароль
+        new_hash = await Hasher.get_hash_async(data.password)
+        await update_user_password_hash(user.id, new_hash, session=session)
+        await session.commit()
     token = create_access_token(user.id)
     return {"access_token": token, "token_type": "bearer"}
 
@@ -0,0 +1,49 @@
+from functools import lru_cache
+from typing import List, Optional
+
+from fastapi import HTTPException, Query
+from pydantic import TypeAdapter, create_model
+
+from src.api.schemas.task import ReadTask
+from src.db.crud import TASK_FIELDS
+
+
+def parse_fields(value: Optional[str]) -> tuple[str, ...] | None:
+    """Поля из ?fields=id,title в порядке TASK_FIELDS; None — все поля.
+
+    ValueError, если поле неизвестно или список пуст.
+    """
+    if value is None:
+        return None
+    requested = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = requested.difference(TASK_FIELDS)
+    if unknown or not requested:
+        raise ValueError(", ".join(sorted(unknown)))
+    fields = tuple(name for name in TASK_FIELDS if name in requested)
+    return None if fields == TASK_FIELDS else fields
+
+
+def requested_fields(
+    fields: Optional[str] = Query(None, description="Поля задач через запятую, например id,title"),
+) -> tuple[str, ...] | None:
+    """Зависимость эндпоинтов чтения задач: разобранный ?fields=."""
+    try:
+        return parse_fields(fields)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Неизвестные поля: {exc}")
+
+
+# Сочетаний полей не больше 2 ** len(TASK_FIELDS), кэш не растёт без предела
+@lru_cache(maxsize=None)
+def task_model(fields: tuple[str, ...]):
+    """Модель ответа с частью полей ReadTask (те же типы и ограничения)."""
+    return create_model(
+        "ReadTask_" + "_".join(fields),
+        **{name: (ReadTask.model_fields[name].annotation, ReadTask.model_fields[name]) for name in fields},
+    )
+
+
+@lru_cache(maxsize=None)
+def tasks_adapter(fields: tuple[str, ...]) -> TypeAdapter:
+    """TypeAdapter списка task_model(fields) для проверки и сериализации в JSON."""
+    return TypeAdapter(List[task_model(fields)])
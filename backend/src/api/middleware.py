@@ -0,0 +1,216 @@
+import asyncio
+import cProfile
+import logging
+import random
+import time
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from src.core.metrics import registry
+from src.core.profiling import RequestProfile, current_profile
+from src.core.security import is_admin_token
+
+logger = logging.getLogger(__name__)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+http_requests = registry.counter(
+    "http_requests_total", "Число HTTP-запросов", ("method", "route", "status")
+)
+http_duration = registry.histogram(
+    "http_request_duration_seconds", "Время обработки HTTP-запроса", ("method", "route")
+)
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: число запросов, коды ответа и латентность по маршрутам.
+
+    Метка route — шаблон пути (/tasks/user/{user_id}), а не сам путь, чтобы
+    число рядов метрик не зависело от id в URL. Шаблон появляется в scope
+    после маршрутизации, поэтому читается по завершении запроса. Для
+    стриминговых ответов время считается до отправки последнего байта.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", UNMATCHED_ROUTE)
+            method = scope["method"]
+            http_requests.inc(method, template, str(status_code))
+            http_duration.observe(time.perf_counter() - started_at, method, template)
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Разрешает ли Accept-Encoding ответ в gzip: q > 0 у gzip или, если его нет, у *."""
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            weights[coding] = quality
+    return weights.get("gzip", weights.get("*", 0.0)) > 0
+
+
+class CompressionMiddleware:
+    """ASGI-middleware: gzip для ответов не меньше minimum_size байт.
+
+    В отличие от starlette GZipMiddleware, не трогает уже сжатые ответы
+    (выгрузка с gzip=true) и сбрасывает сжатый поток после каждого куска
+    стримингового ответа, чтобы NDJSON не задерживался в буфере
+    компрессора. Потоки событий (text/event-stream) не сжимаются.
+    """
+
+    EXCLUDED_TYPES = ("text/event-stream", "application/gzip")
+
+    def __init__(self, app, minimum_size: int, level: int):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not accepts_gzip(Headers(scope=scope).get("accept-encoding", "")):
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor = None
+
+        async def send_wrapper(message):
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if "content-encoding" in headers or headers.get("content-type", "").startswith(self.EXCLUDED_TYPES):
+                    await send(message)
+                else:
+                    # Заголовки отправим с первым куском тела, когда станет ясен размер
+                    start = message
+                return
+            if message["type"] != "http.response.body" or (start is None and compressor is None):
+                await send(message)
+                return
+
+            body, more_body = message.get("body", b""), message.get("more_body", False)
+            if start is not None:
+                headers = MutableHeaders(raw=start["headers"])
+                headers.add_vary_header("Accept-Encoding")
+                if len(body) < self.minimum_size and not more_body:
+                    await send(start)
+                    await send(message)
+                    start = None
+                    return
+                compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+                headers["Content-Encoding"] = "gzip"
+            body = compressor.compress(body) + compressor.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+            if start is not None:
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(body))
+                await send(start)
+                start = None
+            if not more_body:
+                compressor = None
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class ProfilingMiddleware:
+    """ASGI-middleware: профиль запроса по заголовку X-Profile или по выборке.
+
+    Профилируется запрос с X-Profile: 1 и верным X-Admin-Token либо доля
+    sample_rate всех запросов. Ответу на запрос администратора добавляются
+    Server-Timing со временем по фазам до начала ответа и X-Profile-Id;
+    ответ на запрос из выборки не меняется. Полный профиль с фазами
+    стримингового тела сохраняется в store после отправки ответа.
+
+    cProfile снимает все функции потока, в том числе соседних корутин,
+    поэтому профилируется один запрос за раз: пока он идёт, остальные
+    проходят без профиля. Остальные запросы стоят только проверки заголовка.
+    """
+
+    def __init__(self, app, sample_rate: float, store):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.store = store
+        self._busy = False
+
+    def _requested(self, scope) -> bool:
+        # Обычные запросы не несут X-Profile: хватает сравнения имён заголовков
+        if not any(name == b"x-profile" for name, _ in scope["headers"]):
+            return False
+        headers = Headers(scope=scope)
+        return headers.get("x-profile") == "1" and is_admin_token(headers.get("x-admin-token"))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self._busy:
+            await self.app(scope, receive, send)
+            return
+        # Время по фазам видит только администратор, запросивший профиль
+        expose = self._requested(scope)
+        if not expose and not (self.sample_rate > 0 and random.random() < self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        self._busy = True
+        profile = RequestProfile()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            if message["type"] == "http.response.start" and expose:
+                headers = MutableHeaders(raw=message["headers"])
+                headers.append("Server-Timing", profile.server_timing())
+                headers.append("X-Profile-Id", profile.id)
+            await send(message)
+
+        token = current_profile.set(profile)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.disable()
+            current_profile.reset(token)
+            self._busy = False
+            summary = {
+                "id": profile.id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(scope.get("route"), "path", UNMATCHED_ROUTE),
+                "status": status_code,
+                "phases_ms": profile.breakdown(),
+            }
+            try:
+                await asyncio.to_thread(self.store.save, profile.id, profiler, summary)
+            except Exception:
+                logger.exception("Failed to save request profile %s", profile.id)
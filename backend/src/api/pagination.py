@@ -0,0 +1,43 @@
+import base64
+import json
+from datetime import datetime
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _encode(values: list) -> str:
+    raw = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode(cursor: str) -> list:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded))
+
+
+def encode_cursor(created_at: datetime, task_id: int) -> str:
+    """Непрозрачный курсор на позицию (created_at, id) последней отданной задачи."""
+    return _encode([created_at.isoformat(), task_id])
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Разобрать курсор; ValueError, если он повреждён."""
+    try:
+        created_at, task_id = _decode(cursor)
+        return datetime.fromisoformat(created_at), int(task_id)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("invalid cursor") from exc
+
+
+def encode_search_cursor(rank: float, task_id: int) -> str:
+    """Курсор результатов поиска на позицию (rank, id) последней отданной задачи."""
+    return _encode([rank, task_id])
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, int]:
+    """Разобрать курсор поиска; ValueError, если он повреждён."""
+    try:
+        rank, task_id = _decode(cursor)
+        return float(rank), int(task_id)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("invalid cursor") from exc
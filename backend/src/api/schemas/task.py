@@ -1,7 +1,7 @@
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 
 class AddTask(BaseModel):
@@ -9,6 +9,14 @@ class AddTask(BaseModel):
     description: Optional[str]
 
 
+class ImportTask(AddTask):
+    # Колонка description — VARCHAR(50): одна длинная строка иначе сорвала бы всю пачку
+    description: Optional[str] = Field(max_length=50)
+    # Без user_id задача достаётся пользователю, указанному для всего импорта
+    user_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+
 class ReadTask(AddTask):
     id: int
     created_at: datetime
@@ -18,5 +26,83 @@ class EditTask(AddTask):
     pass
 
 
+class PatchTask(BaseModel):
+    # Заголовок можно не передавать, но не обнулить: None по умолчанию не валидируется
+    title: str = Field(None, max_length=30)
+    description: Optional[str] = None
+
+
 class DeleteTask(BaseModel):
-    id: int
\ No newline at end of file
+    id: int
+
+
+class BulkAddTasks(BaseModel):
+    items: List[AddTask] = Field(min_length=1)
+
+
+class BulkEditTask(EditTask):
+    id: int
+
+
+class BulkEditTasks(BaseModel):
+    items: List[BulkEditTask] = Field(min_length=1)
+
+    @field_validator("items")
+    @classmethod
+    def unique_ids(cls, items: List[BulkEditTask]) -> List[BulkEditTask]:
+        # В Postgres пачка обновляется одним UPDATE ... FROM (VALUES ...): при
+        # повторе id неизвестно, какая из строк окажется в задаче
+        seen, repeated = set(), set()
+        for item in items:
+            (repeated if item.id in seen else seen).add(item.id)
+        if repeated:
+            raise ValueError(f"Повторяющиеся id: {', '.join(map(str, sorted(repeated)))}")
+        return items
+
+
+class BulkDeleteTasks(BaseModel):
+    ids: List[int] = Field(min_length=1)
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    ok: bool
+    id: Optional[int] = None
+    task: Optional[ReadTask] = None
+    error: Optional[str] = None
+
+
+class BulkResult(BaseModel):
+    succeeded: int
+    failed: int
+    items: List[BulkItemResult]
+
+
+class TaskStatsBucket(BaseModel):
+    # Первый день периода (для недель — понедельник)
+    start: date
+    count: int
+
+
+class TaskStats(BaseModel):
+    total: int
+    period: Literal["day", "week"]
+    buckets: List[TaskStatsBucket]
+
+
+class TaskChange(BaseModel):
+    seq: int
+    id: int
+    deleted: bool
+    # Текущее состояние задачи; у удалённой — None
+    task: Optional[ReadTask] = None
+
+
+class TaskChanges(BaseModel):
+    changes: List[TaskChange]
+    # since для следующего запроса
+    next_since: int
+    has_more: bool
+    # Изменения после since уже недоступны: нужно заново загрузить весь
+    # список и продолжить с next_since
+    reset: bool = False
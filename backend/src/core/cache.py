@@ -0,0 +1,90 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from src.core.config import settings
+
+_MISSING = object()
+
+
+class TTLCache:
+    """LRU-кэш с ограничением размера и временем жизни записей.
+
+    Кэш локален для процесса: при нескольких воркерах устаревание
+    ограничено TTL, явная инвалидация действует только в своём воркере.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        # Растёт при каждой инвалидации; см. set(..., generation=...)
+        self.generation = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key, _MISSING)
+        if item is _MISSING:
+            self.misses += 1
+            return default
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(
+        self, key: Hashable, value: Any, ttl: float | None = None, generation: int | None = None
+    ) -> None:
+        """Сохранить значение.
+
+        generation — значение self.generation до чтения value из источника:
+        если с тех пор была инвалидация, value могло устареть и не кэшируется.
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if self.maxsize <= 0 or ttl <= 0:
+            return
+        if generation is not None and generation != self.generation:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self.generation += 1
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+# id пользователя -> UserDB (отсоединённый от сессии)
+user_cache = TTLCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL)
+# строка токена -> id пользователя из проверенных claims
+token_cache = TTLCache(settings.TOKEN_CACHE_SIZE, settings.USER_CACHE_TTL)
+# id пользователя -> users.tasks_version
+tasks_version_cache = TTLCache(settings.TASKS_VERSION_CACHE_SIZE, settings.TASKS_VERSION_CACHE_TTL)
+# id пользователя, недавно менявшего данные -> True: его чтения идут на основную БД
+recent_writers = TTLCache(settings.USER_CACHE_SIZE, settings.DB_REPLICA_STICKY_SECONDS)
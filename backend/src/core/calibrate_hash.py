@@ -0,0 +1,52 @@
+"""Подбор числа раундов pbkdf2_sha256 под целевое время хэширования.
+
+Запуск: python -m src.core.calibrate_hash --target-ms 50
+Печатает строку PBKDF2_ROUNDS=..., которую нужно добавить в .env (файл
+скрипт не меняет); старые хэши пересчитаются при следующем входе
+пользователя (см. Hasher.needs_update).
+"""
+import argparse
+import hashlib
+import statistics
+import time
+
+from passlib.hash import pbkdf2_sha256
+
+MIN_ROUNDS = 1000
+
+
+def measure(rounds: int, samples: int) -> float:
+    """Медианное время одного хэша в миллисекундах."""
+    hasher = pbkdf2_sha256.using(rounds=rounds)
+    prepared = hashlib.sha256(b"calibration-password").hexdigest()
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        hasher.hash(prepared)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(target_ms: float, samples: int = 5, start_rounds: int = 10000) -> tuple[int, float]:
+    rounds = start_rounds
+    elapsed = measure(rounds, samples)
+    # Время линейно по числу раундов: пара уточнений сходится к цели
+    for _ in range(3):
+        rounds = max(MIN_ROUNDS, int(rounds * target_ms / elapsed))
+        elapsed = measure(rounds, samples)
+    return rounds, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target-ms", type=float, default=50.0)
+    parser.add_argument("--samples", type=int, default=5)
+    args = parser.parse_args()
+
+    rounds, elapsed = calibrate(args.target_ms, args.samples)
+    print(f"# {elapsed:.1f} ms per hash (target {args.target_ms:.1f} ms)")
+    print(f"PBKDF2_ROUNDS={rounds}")
+
+
+if __name__ == "__main__":
+    main()
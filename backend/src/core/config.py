@@ -23,7 +23,10 @@
 # SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret")
 # DEBUG = os.getenv("DEBUG", "False").lower() == "true"
 
+import tempfile
 from pathlib import Path
+from typing import Optional
+
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -42,6 +45,137 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     DEBUG: bool = False
 
+    # Сервер (python -m src.server). SERVER_WORKERS=0 — по числу доступных CPU.
+    # Keep-alive дольше таймаута простоя балансировщика (у AWS ALB — 60 с),
+    # иначе балансировщик отправляет запросы в уже закрытые соединения.
+    # На SIGTERM сервер перестаёт принимать соединения и до GRACEFUL_TIMEOUT
+    # секунд дожидается запросов в работе
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEPALIVE_SECONDS: int = 75
+    SERVER_GRACEFUL_TIMEOUT: int = 30
+    SERVER_LIMIT_CONCURRENCY: Optional[int] = None
+    # Адреса прокси, которым доверяются X-Forwarded-For/Proto
+    SERVER_FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+
+    # Пул соединений с БД
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800
+    # Кэш подготовленных выражений asyncpg на соединение (0 — выключен, нужно за pgbouncer)
+    DB_STATEMENT_CACHE_SIZE: int = 100
+
+    # Прогрев при старте (src/db/warmup.py): столько соединений пула открывается
+    # заранее. Старт ждёт прогрева не дольше WARMUP_TIMEOUT, дальше прогрев
+    # повторяется в фоне, а /health/ready отвечает 503
+    DB_WARMUP_CONNECTIONS: int = 5
+    WARMUP_TIMEOUT: float = 10.0
+    WARMUP_RETRY_SECONDS: float = 2.0
+    # Сколько /health/ready ждёт ответа БД
+    HEALTH_DB_TIMEOUT: float = 2.0
+
+    # Реплики для чтения (JSON-список URL); пусто — всё читается с основной БД.
+    # После записи пользователь STICKY_SECONDS читает с основной БД, упавшая
+    # реплика исключается на RETRY_SECONDS
+    DB_REPLICA_URLS: list[str] = []
+    DB_REPLICA_BALANCE: str = "least_connections"
+    DB_REPLICA_STICKY_SECONDS: float = 5.0
+    DB_REPLICA_RETRY_SECONDS: float = 10.0
+
+    # Лог медленных запросов: порог, размер кольцевого буфера и доля медленных
+    # SELECT, для которых снимается план (EXPLAIN ANALYZE повторно выполняет запрос)
+    SLOW_QUERY_MS: float = 200.0
+    SLOW_QUERY_LOG_SIZE: int = 200
+    SLOW_QUERY_EXPLAIN_SAMPLE: float = 0.0
+
+    # Токен для /internal/*, передаётся в заголовке X-Admin-Token; без него эндпоинты закрыты
+    ADMIN_TOKEN: Optional[str] = None
+
+    # Сжатие ответов gzip (src/api/middleware.py): только ответы от GZIP_MIN_SIZE байт;
+    # невысокий уровень — почти тот же размер JSON за заметно меньшее время CPU
+    GZIP_MIN_SIZE: int = 1024
+    GZIP_LEVEL: int = 5
+
+    # Профилирование запросов (src/core/profiling.py): по заголовку X-Profile: 1
+    # с X-Admin-Token или для доли PROFILE_SAMPLE_RATE запросов (0 — только по
+    # заголовку); профили cProfile хранятся в PROFILE_DIR, последние PROFILE_KEEP
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_DIR: Path = Path(tempfile.gettempdir()) / "task-api-profiles"
+    PROFILE_KEEP: int = 100
+
+    TASKS_PAGE_SIZE: int = 100
+    TASKS_PAGE_SIZE_MAX: int = 1000
+    TASKS_STREAM_YIELD_PER: int = 1000
+
+    # Выгрузка задач (src/db/export.py): размер куска ответа или файла,
+    # уровень gzip и число параллельных выгрузок в python -m src.db.export all
+    EXPORT_CHUNK_BYTES: int = 64 * 1024
+    EXPORT_GZIP_LEVEL: int = 6
+    EXPORT_WORKERS: int = 4
+
+    # Импорт задач (src/db/importer.py): записей в пачке (одна транзакция)
+    # и сколько ошибок валидации возвращается в отчёте
+    IMPORT_BATCH_SIZE: int = 5000
+    IMPORT_MAX_ERRORS: int = 100
+
+    # Архивация (src/db/archive.py): задачи старше ARCHIVE_AFTER_DAYS раз в
+    # ARCHIVE_INTERVAL_SECONDS переносятся в tasks_archive пачками по
+    # ARCHIVE_BATCH_SIZE с паузой между пачками; 0 дней — архивация выключена
+    ARCHIVE_AFTER_DAYS: int = 0
+    ARCHIVE_BATCH_SIZE: int = 500
+    ARCHIVE_BATCH_PAUSE_SECONDS: float = 0.05
+    ARCHIVE_INTERVAL_SECONDS: float = 3600.0
+
+    # Журнал изменений для синхронизации: размер страницы и сколько дней
+    # хранятся записи об удалениях и перезаписанные изменения (python -m src.db.changes compact)
+    CHANGES_PAGE_SIZE: int = 500
+    CHANGES_PAGE_SIZE_MAX: int = 5000
+    CHANGES_RETENTION_DAYS: int = 30
+
+    # Хэширование паролей: пул "thread" или "process", потолок одновременных хэшей
+    HASH_EXECUTOR: str = "thread"
+    HASH_WORKERS: int = 4
+    HASH_MAX_CONCURRENCY: int = 4
+    # Подбирается командой python -m src.core.calibrate_hash
+    PBKDF2_ROUNDS: int = 29000
+
+    # Не больше стольких хэширований в очереди; сверх — сразу 503, а не ожидание
+    HASH_MAX_WAITING: int = 64
+
+    # Ограничение частоты входа и регистрации: ведро на BURST попыток,
+    # пополняется на PER_MINUTE в минуту, отдельно по IP и по имени пользователя.
+    # Хранилище "memory" — своё в каждом воркере, "database" — общая таблица
+    # в RATE_LIMIT_DB_URL (по умолчанию основная БД; на одной машине хватит SQLite)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_STORAGE: str = "memory"
+    RATE_LIMIT_DB_URL: Optional[str] = None
+    AUTH_IP_BURST: int = 20
+    AUTH_IP_PER_MINUTE: float = 30.0
+    AUTH_USER_BURST: int = 5
+    AUTH_USER_PER_MINUTE: float = 5.0
+
+    # Кэш аутентифицированных пользователей и проверенных токенов
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL: float = 60.0
+    TOKEN_CACHE_SIZE: int = 10000
+    # Версии списков задач для ETag; при нескольких воркерах запись из чужого
+    # воркера видна здесь не позже, чем через TTL (или по событию из брокера)
+    TASKS_VERSION_CACHE_SIZE: int = 10000
+    TASKS_VERSION_CACHE_TTL: float = 5.0
+
+    # Пакетные операции: максимум элементов в запросе и строк в одном SQL-запросе
+    BULK_MAX_ITEMS: int = 1000
+    BULK_CHUNK_SIZE: int = 500
+
+    # Лента изменений задач: "memory" для одного воркера, "postgres" (LISTEN/NOTIFY) для нескольких
+    EVENTS_BROKER: str = "memory"
+    EVENTS_QUEUE_SIZE: int = 100
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
+
     @property
     def DB_URL(self) -> str:
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
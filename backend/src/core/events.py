@@ -0,0 +1,166 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.cache import tasks_version_cache
+from src.core.config import settings
+from src.db.database import on_commit
+
+logger = logging.getLogger(__name__)
+
+RESYNC_EVENT = {"type": "resync"}
+
+
+class Subscription:
+    """Очередь событий одного подписчика с ограниченным размером.
+
+    Если клиент не успевает читать и очередь переполняется, накопленные
+    события выбрасываются и вместо них кладётся resync: клиент должен
+    перечитать список задач целиком.
+    """
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def push(self, event: dict) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_EVENT)
+
+    async def get(self, timeout: float) -> dict | None:
+        """Следующее событие или None, если за timeout ничего не пришло."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class InMemoryBroker:
+    """Брокер событий в пределах одного процесса.
+
+    Событие уходит подписчикам только после коммита транзакции, в которой
+    оно опубликовано; при откате оно отбрасывается.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: dict[int, set[Subscription]] = defaultdict(set)
+
+    async def publish(self, session: AsyncSession, user_id: int, event: dict) -> None:
+        on_commit(session, lambda: self.deliver(user_id, event))
+
+    def deliver(self, user_id: int, event: dict) -> None:
+        for subscription in list(self._subscribers.get(user_id, ())):
+            subscription.push(event)
+
+    async def ensure_ready(self) -> None:
+        pass
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: int):
+        await self.ensure_ready()
+        subscription = Subscription(self.queue_size)
+        self._subscribers[user_id].add(subscription)
+        try:
+            yield subscription
+        finally:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    async def close(self) -> None:
+        pass
+
+
+class PostgresBroker(InMemoryBroker):
+    """Брокер для нескольких воркеров поверх Postgres LISTEN/NOTIFY.
+
+    pg_notify выполняется в транзакции запроса, поэтому Postgres доставляет
+    событие только после коммита. Каждый воркер держит одно соединение с
+    LISTEN и раздаёт полученные события своим подписчикам.
+    """
+
+    CHANNEL = "task_events"
+    # Предел полезной нагрузки NOTIFY — 8000 байт
+    MAX_PAYLOAD = 7900
+
+    def __init__(self, dsn: str, queue_size: int):
+        super().__init__(queue_size)
+        self.dsn = dsn
+        self._connection = None
+        self._lock = asyncio.Lock()
+
+    async def publish(self, session: AsyncSession, user_id: int, event: dict) -> None:
+        for payload in self._payloads(user_id, event):
+            await session.execute(select(func.pg_notify(self.CHANNEL, payload)))
+
+    def _payloads(self, user_id: int, event: dict):
+        payload = json.dumps({"user_id": user_id, "event": event}, ensure_ascii=False)
+        if len(payload.encode("utf-8")) <= self.MAX_PAYLOAD:
+            yield payload
+            return
+        key = "tasks" if "tasks" in event else "ids"
+        items = event[key]
+        if len(items) < 2:
+            raise ValueError("Event is too large for NOTIFY")
+        middle = len(items) // 2
+        for part in (items[:middle], items[middle:]):
+            yield from self._payloads(user_id, {**event, key: part})
+
+    async def ensure_ready(self) -> None:
+        if self._connection is not None and not self._connection.is_closed():
+            return
+        async with self._lock:
+            if self._connection is not None and not self._connection.is_closed():
+                return
+            import asyncpg
+
+            self._connection = await asyncpg.connect(self.dsn)
+            self._connection.add_termination_listener(self._on_terminate)
+            await self._connection.add_listener(self.CHANNEL, self._on_notify)
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        message = json.loads(payload)
+        # Задачи изменил, возможно, другой воркер: его кэш версий тут не виден
+        tasks_version_cache.invalidate(message["user_id"])
+        self.deliver(message["user_id"], message["event"])
+
+    def _on_terminate(self, connection) -> None:
+        # Пока соединения не было, события могли потеряться
+        logger.warning("LISTEN connection lost, asking subscribers to resync")
+        self._connection = None
+        for subscribers in list(self._subscribers.values()):
+            for subscription in list(subscribers):
+                subscription.push(RESYNC_EVENT)
+
+    async def close(self) -> None:
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+
+def create_broker() -> InMemoryBroker:
+    if settings.EVENTS_BROKER == "postgres":
+        dsn = settings.DB_URL.replace("postgresql+asyncpg://", "postgresql://")
+        return PostgresBroker(dsn, settings.EVENTS_QUEUE_SIZE)
+    if settings.EVENTS_BROKER == "memory":
+        return InMemoryBroker(settings.EVENTS_QUEUE_SIZE)
+    raise ValueError(f"Unknown EVENTS_BROKER: {settings.EVENTS_BROKER}")
+
+
+broker = create_broker()
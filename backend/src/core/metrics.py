@@ -0,0 +1,169 @@
+"""Метрики процесса в текстовом формате Prometheus.
+
+Счётчики и гистограммы обновляются в горячем пути, поэтому здесь только
+словари и арифметика: без блокировок (всё выполняется в одном event loop)
+и без форматирования до момента выдачи /metrics.
+"""
+import abc
+import bisect
+import math
+from collections import defaultdict
+from typing import Callable, Iterable
+
+# Границы корзин по умолчанию, секунды: от долей миллисекунды до 10 с
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами (семантика Prometheus: le — включительно)."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        # Последняя ячейка — корзина +Inf
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """Пары (граница, число наблюдений <= границы), последняя граница — inf."""
+        result, total = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": {_format_value(bound): count for bound, count in self.cumulative()},
+        }
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    """Значение метки: обратная косая черта, кавычка и перевод строки экранируются."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: tuple[str, ...], labelvalues: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Family(abc.ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    @abc.abstractmethod
+    def render(self) -> list[str]:
+        """Строки семейства для /metrics."""
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.values: dict[tuple, float] = defaultdict(float)
+
+    def inc(self, *labelvalues, amount: float = 1.0) -> None:
+        self.values[labelvalues] += amount
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for labelvalues, value in self.values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, *labelvalues) -> None:
+        self.values[labelvalues] = value
+
+
+class HistogramFamily(_Family):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        self.children: dict[tuple, Histogram] = {}
+
+    def observe(self, value: float, *labelvalues) -> None:
+        child = self.children.get(labelvalues)
+        if child is None:
+            child = self.children[labelvalues] = Histogram(self.buckets)
+        child.observe(value)
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for labelvalues, child in self.children.items():
+            for bound, count in child.cumulative():
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labelvalues, le)} {count}")
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._families: list[_Family] = []
+        self._collectors: list[Callable[[], Iterable[_Family]]] = []
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> HistogramFamily:
+        return self._register(HistogramFamily(name, documentation, labelnames, buckets))
+
+    def _register(self, family):
+        self._families.append(family)
+        return family
+
+    def collector(self, func: Callable[[], Iterable[_Family]]):
+        """Функция, собирающая метрики на момент выдачи (состояние пулов, кэшей)."""
+        self._collectors.append(func)
+        return func
+
+    def render(self) -> str:
+        lines = []
+        for family in self._families:
+            lines.extend(family.render())
+        for collect in self._collectors:
+            for family in collect():
+                lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
@@ -0,0 +1,154 @@
+"""Профилирование отдельных запросов по требованию.
+
+Профиль включает ProfilingMiddleware (src/api/middleware.py): для запроса с
+заголовками X-Profile: 1 и верным X-Admin-Token или для доли
+PROFILE_SAMPLE_RATE всех запросов. Профиль запроса состоит из:
+- времени по фазам (auth, hashing, session, pool, db, serialization),
+  которое отмечает код приложения через phase() и add_phase_time();
+- полного профиля cProfile, который сохраняется в PROFILE_DIR (последние
+  PROFILE_KEEP) и скачивается через GET /internal/profiles/{id}.
+
+Время фазы исключающее: вложенная фаза (SQL внутри CRUD-функции) не
+входит во время объемлющей. Время вне фаз — other. Когда профиль не
+включён, phase() только читает ContextVar.
+
+Разбор скачанного профиля:
+    python -m pstats 20260101T120000123456-a1b2c3.prof
+"""
+import json
+import pstats
+import re
+import secrets
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+
+from src.core.config import settings
+
+PROFILE_ID = re.compile(r"^\d{8}T\d{12}-[0-9a-f]{6}$")
+
+current_profile: ContextVar["RequestProfile | None"] = ContextVar("current_profile", default=None)
+
+
+class RequestProfile:
+    """Время по фазам одного запроса."""
+
+    def __init__(self):
+        self.id = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{secrets.token_hex(3)}"
+        self.started_at = time.perf_counter()
+        self.phases: dict[str, float] = {}
+        # Открытые фазы: [имя, начало, время вложенных фаз]
+        self._stack: list[list] = []
+
+    def add(self, name: str, seconds: float) -> None:
+        """Учесть seconds в фазе name и исключить их из объемлющей фазы."""
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+        if self._stack:
+            self._stack[-1][2] += seconds
+
+    def enter(self, name: str) -> None:
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def exit(self) -> None:
+        name, started_at, nested = self._stack.pop()
+        self.add(name, time.perf_counter() - started_at)
+        self.phases[name] -= nested
+
+    def breakdown(self) -> dict[str, float]:
+        """Завершённые фазы, other и total в миллисекундах."""
+        total = time.perf_counter() - self.started_at
+        result = {name: round(seconds * 1000, 3) for name, seconds in self.phases.items()}
+        result["other"] = round(max(total - sum(self.phases.values()), 0.0) * 1000, 3)
+        result["total"] = round(total * 1000, 3)
+        return result
+
+    def server_timing(self) -> str:
+        """Значение заголовка Server-Timing."""
+        return ", ".join(f"{name};dur={ms}" for name, ms in self.breakdown().items())
+
+
+class phase:
+    """Контекстный менеджер: отметить фазу name в профиле текущего запроса."""
+
+    __slots__ = ("name", "profile")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.profile = current_profile.get()
+        if self.profile is not None:
+            self.profile.enter(self.name)
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.profile is not None:
+            self.profile.exit()
+
+
+def add_phase_time(name: str, seconds: float) -> None:
+    """Учесть уже замеренное время (например, SQL-запроса) в фазе name."""
+    profile = current_profile.get()
+    if profile is not None:
+        profile.add(name, seconds)
+
+
+class ProfileStore:
+    """Кольцо профилей на диске: id.prof (pstats) и id.json (сводка).
+
+    id начинаются со времени запроса, поэтому порядок имён — порядок
+    записи; при переполнении удаляются самые старые. Сводка пишется после
+    профиля, так что в списке только профили, которые можно скачать.
+    """
+
+    TOP_FUNCTIONS = 20
+
+    def __init__(self, directory: Path, keep: int):
+        self.directory = Path(directory)
+        self.keep = keep
+
+    def save(self, profile_id: str, profiler, summary: dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(self.directory / f"{profile_id}.prof")
+        stats = pstats.Stats(profiler).stats
+        top = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[: self.TOP_FUNCTIONS]
+        summary["top"] = [
+            {
+                "function": pstats.func_std_string(func),
+                "calls": calls,
+                "tottime_ms": round(tottime * 1000, 3),
+                "cumtime_ms": round(cumtime * 1000, 3),
+            }
+            for func, (_, calls, tottime, cumtime, _) in top
+        ]
+        (self.directory / f"{profile_id}.json").write_text(json.dumps(summary, ensure_ascii=False))
+        self._prune()
+
+    def _prune(self) -> None:
+        # Несколько воркеров пишут в один каталог: файл мог удалить соседний
+        sidecars = sorted(self.directory.glob("*.json"))
+        for sidecar in sidecars[: max(len(sidecars) - self.keep, 0)]:
+            sidecar.with_suffix(".prof").unlink(missing_ok=True)
+            sidecar.unlink(missing_ok=True)
+
+    def recent(self, limit: int | None = None) -> list[dict]:
+        """Сводки профилей, новые первыми."""
+        if not self.directory.is_dir():
+            return []
+        summaries = []
+        for sidecar in sorted(self.directory.glob("*.json"), reverse=True)[:limit]:
+            try:
+                summaries.append(json.loads(sidecar.read_text()))
+            except (OSError, ValueError):
+                continue
+        return summaries
+
+    def path(self, profile_id: str) -> Path | None:
+        """Файл профиля или None, если id неверный или профиль уже удалён."""
+        if not PROFILE_ID.match(profile_id):
+            return None
+        path = self.directory / f"{profile_id}.prof"
+        return path if path.is_file() else None
+
+
+profile_store = ProfileStore(settings.PROFILE_DIR, settings.PROFILE_KEEP)
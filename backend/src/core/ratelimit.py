@@ -0,0 +1,175 @@
+"""Ограничение частоты запросов алгоритмом token bucket.
+
+У каждого ключа (например, IP клиента или имени пользователя) есть ведро
+на burst жетонов, которое пополняется со скоростью per_minute в минуту.
+Запрос забирает жетон; если жетона нет, он отклоняется с временем, через
+которое жетон появится.
+
+Состояние вёдер хранится в MemoryStorage (в пределах процесса) или в
+DatabaseStorage — в таблице, общей для всех воркеров. Для одной машины
+хватает файла SQLite, для нескольких — Postgres.
+"""
+import hashlib
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sqlalchemy import Boolean, Column, Float, MetaData, String, Table, case
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.core.config import settings
+from src.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+decisions = registry.counter(
+    "rate_limit_decisions_total", "Решения ограничителя частоты", ("scope", "decision")
+)
+
+
+@dataclass(frozen=True)
+class Rule:
+    burst: int
+    per_minute: float
+
+    @property
+    def rate(self) -> float:
+        return self.per_minute / 60
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    # Через сколько секунд появится жетон (0, если запрос разрешён)
+    retry_after: float = 0.0
+
+
+def _retry_after(tokens: float, rule: Rule) -> float:
+    return (1 - tokens) / rule.rate if rule.rate > 0 else math.inf
+
+
+class MemoryStorage:
+    """Вёдра в памяти процесса; число ключей ограничено (LRU)."""
+
+    def __init__(self, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, rule: Rule, now: float) -> Decision:
+        tokens, updated_at = self._buckets.get(key, (rule.burst, now))
+        tokens = min(rule.burst, tokens + (now - updated_at) * rule.rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return Decision(allowed, 0.0 if allowed else _retry_after(tokens, rule))
+
+    async def clear(self) -> None:
+        self._buckets.clear()
+
+    async def close(self) -> None:
+        pass
+
+
+metadata = MetaData()
+
+rate_limit_buckets = Table(
+    "rate_limit_buckets",
+    metadata,
+    Column("key", String(200), primary_key=True),
+    Column("tokens", Float, nullable=False),
+    Column("updated_at", Float, nullable=False),
+    Column("allowed", Boolean, nullable=False),
+)
+
+
+class DatabaseStorage:
+    """Вёдра в таблице rate_limit_buckets, общей для всех воркеров.
+
+    Пополнение и списание жетона — один атомарный INSERT ... ON CONFLICT
+    DO UPDATE ... RETURNING, без блокировок на стороне приложения.
+    Таблица создаётся при первом обращении.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._ready = False
+
+    def _statement(self, key: str, rule: Rule, now: float):
+        insert = postgresql.insert if self.engine.dialect.name == "postgresql" else sqlite.insert
+        table = rate_limit_buckets
+        refilled = table.c.tokens + (now - table.c.updated_at) * rule.rate
+        refilled = case((refilled > rule.burst, float(rule.burst)), else_=refilled)
+        stmt = insert(table).values(key=key, tokens=rule.burst - 1, updated_at=now, allowed=rule.burst >= 1)
+        return stmt.on_conflict_do_update(
+            index_elements=[table.c.key],
+            set_={
+                "tokens": case((refilled >= 1, refilled - 1), else_=refilled),
+                "updated_at": now,
+                "allowed": refilled >= 1,
+            },
+        ).returning(table.c.tokens, table.c.allowed)
+
+    async def take(self, key: str, rule: Rule, now: float) -> Decision:
+        async with self.engine.begin() as conn:
+            if not self._ready:
+                await conn.run_sync(metadata.create_all)
+                self._ready = True
+            tokens, allowed = (await conn.execute(self._statement(key, rule, now))).one()
+        return Decision(allowed, 0.0 if allowed else _retry_after(tokens, rule))
+
+    async def clear(self) -> None:
+        async with self.engine.begin() as conn:
+            await conn.run_sync(metadata.create_all)
+            await conn.execute(rate_limit_buckets.delete())
+
+    async def close(self) -> None:
+        await self.engine.dispose()
+
+
+class RateLimiter:
+    MAX_KEY_LENGTH = 128
+
+    def __init__(self, storage, enabled: bool = True, clock=time.time):
+        self.storage = storage
+        self.enabled = enabled
+        self.clock = clock
+
+    async def hit(self, scope: str, key: str, rule: Rule) -> Decision:
+        """Списать жетон из ведра scope:key.
+
+        Если хранилище недоступно, запрос пропускается: ограничитель не должен
+        ронять вход вместе с собой.
+        """
+        if not self.enabled:
+            return Decision(True)
+        if len(key) > self.MAX_KEY_LENGTH:
+            # Ключ из запроса (имя пользователя) может быть любой длины
+            key = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        try:
+            decision = await self.storage.take(f"{scope}:{key}", rule, self.clock())
+        except Exception:
+            logger.exception("Rate limit storage failed, letting the request through")
+            decisions.inc(scope, "error")
+            return Decision(True)
+        decisions.inc(scope, "allowed" if decision.allowed else "limited")
+        return decision
+
+
+def create_rate_limiter() -> RateLimiter:
+    if settings.RATE_LIMIT_STORAGE == "memory":
+        storage = MemoryStorage()
+    elif settings.RATE_LIMIT_STORAGE == "database":
+        storage = DatabaseStorage(create_async_engine(settings.RATE_LIMIT_DB_URL or settings.DB_URL))
+    else:
+        raise ValueError(f"Unknown RATE_LIMIT_STORAGE: {settings.RATE_LIMIT_STORAGE}")
+    return RateLimiter(storage, enabled=settings.RATE_LIMIT_ENABLED)
+
+
+auth_limiter = create_rate_limiter()
@@ -1,18 +1,41 @@
 import hashlib
+import hmac
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 import jwt
-from fastapi import Depends, HTTPException
+from fastapi import Depends, Header, HTTPException
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jwt import ExpiredSignatureError, InvalidTokenError
 from passlib.context import CryptContext
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import object_session
 
+from src.core.cache import token_cache, user_cache
 from src.core.config import settings
+from src.core.executor import BoundedExecutor
+from src.core.profiling import phase
 from src.db.crud import get_user_by_id
+from src.db.database import get_session
 
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# min/max_rounds = default_rounds: needs_update() помечает хэши с другим числом
+# раундов, и они пересчитываются при следующем входе
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=settings.PBKDF2_ROUNDS,
+    pbkdf2_sha256__min_rounds=settings.PBKDF2_ROUNDS,
+    pbkdf2_sha256__max_rounds=settings.PBKDF2_ROUNDS,
+)
+
+hash_executor = BoundedExecutor(
+    kind=settings.HASH_EXECUTOR,
+    workers=settings.HASH_WORKERS,
+    max_concurrency=settings.HASH_MAX_CONCURRENCY,
+    max_waiting=settings.HASH_MAX_WAITING,
+)
 
 
 ALGORITHM = "HS256"
@@ -31,6 +54,24 @@ class Hasher:
         prepared = hashlib.sha256(password.encode("utf-8")).hexdigest()
         return pwd_context.hash(prepared)
 
+    @staticmethod
+    def needs_update(hashed_password) -> bool:
+        try:
+            return pwd_context.needs_update(hashed_password)
+        except ValueError:
+            # Хэш в неизвестном формате: пересчитывать нечего
+            return False
+
+    @staticmethod
+    async def verify_password_async(plain_password, hashed_password) -> bool:
+        with phase("hashing"):
+            return await hash_executor.run(Hasher.verify_password, plain_password, hashed_password)
+
+    @staticmethod
+    async def get_hash_async(password) -> str:
+        with phase("hashing"):
+            return await hash_executor.run(Hasher.get_hash, password)
+
 
 def create_access_token(subject: str | int, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = {"sub": str(subject), "iat": int(datetime.now(timezone.utc).timestamp())}
@@ -45,12 +86,8 @@ def create_access_token(subject: str | int, expires_delta: Optional[timedelta] =
 http_bearer = HTTPBearer(auto_error=False)
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(http_bearer),
-):
-    if credentials is None or credentials.scheme.lower() != "bearer":
-        raise HTTPException(status_code=401, detail="Требуется аутентификация")
-    token = credentials.credentials
+def _decode_token(token: str) -> tuple[int, float]:
+    """Проверить подпись и срок токена; вернуть (user_id, exp в секундах epoch)."""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
         sub = payload.get("sub")
@@ -61,9 +98,57 @@ async def get_current_user(
         raise HTTPException(status_code=401, detail="Срок действия токена истёк")
     except (InvalidTokenError, ValueError):
         raise HTTPException(status_code=401, detail="Недействительный токен")
+    return user_id, float(payload.get("exp", 0))
+
+
+async def authenticate(token: str, session: AsyncSession | None = None):
+    """Пользователь по токену; HTTPException(401), если токен или пользователь недействителен."""
+    user_id = token_cache.get(token)
+    if user_id is None:
+        user_id, expires_at = _decode_token(token)
+        # Запись не переживает срок действия токена
+        token_cache.set(token, user_id, ttl=expires_at - time.time())
+
+    user = user_cache.get(user_id)
+    if user is None:
+        # Смена пароля или удаление, закоммиченные во время чтения, не должны
+        # вернуть в кэш устаревшего пользователя
+        generation = user_cache.generation
+        user = await get_user_by_id(user_id, session=session)
+        if not user:
+            raise HTTPException(status_code=401, detail="Пользователь не найден")
+        # Объект кэша переживает сессию запроса: откат сессии не должен
+        # сбросить его атрибуты для следующих запросов
+        owner = object_session(user)
+        if owner is not None:
+            owner.expunge(user)
+        user_cache.set(user_id, user, generation=generation)
+    return user
+
 
-    user = await get_user_by_id(user_id)
-    if not user:
-        raise HTTPException(status_code=401, detail="Пользователь не найден")
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(http_bearer),
+    session: AsyncSession = Depends(get_session),
+):
+    if credentials is None or credentials.scheme.lower() != "bearer":
+        raise HTTPException(status_code=401, detail="Требуется аутентификация")
+    with phase("auth"):
+        user = await authenticate(credentials.credentials, session)
+    # По нему session_manager решает, читать ли с реплики (см. _wants_primary)
+    session.info["user_id"] = user.id
     return user
 
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Совпадает ли token с settings.ADMIN_TOKEN (сравнение за постоянное время)."""
+    return bool(
+        settings.ADMIN_TOKEN
+        and token
+        and hmac.compare_digest(token.encode(), settings.ADMIN_TOKEN.encode())
+    )
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Доступ к служебным эндпоинтам по X-Admin-Token (settings.ADMIN_TOKEN)."""
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Доступ запрещен")
@@ -0,0 +1,120 @@
+"""Перенос старых задач из tasks в tasks_archive.
+
+Задача старше ARCHIVE_AFTER_DAYS (по created_at) переносится в архив.
+Перенос идёт пачками по ARCHIVE_BATCH_SIZE строк, каждая пачка — в своей
+короткой транзакции:
+- INSERT ... SELECT в архив;
+- DELETE из tasks.
+В Postgres строки пачки выбираются с FOR UPDATE SKIP LOCKED, поэтому
+архиватор не ждёт строк, которые сейчас меняет пользователь, и несколько
+воркеров не мешают друг другу.
+
+Триггеры не считают перенос удалением (src/db/triggers.py): счётчики,
+статистика и журнал изменений не меняются. Поднимается только
+tasks_version, чтобы ETag списка без архива сменился.
+
+Задачи в архиве доступны только для чтения: списки с include_archived=true
+читают обе таблицы. Полнотекстовый поиск идёт только по tasks.
+
+Фоновая архивация запускается вместе с приложением, если
+ARCHIVE_AFTER_DAYS > 0. Разовый запуск из backend/:
+    python -m src.db.archive run --days 365
+"""
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, select, update
+
+from src.core.cache import tasks_version_cache
+from src.core.config import settings
+from src.db.models import ArchivedTaskDB, TaskDB, UserDB
+
+logger = logging.getLogger(__name__)
+
+ARCHIVED_COLUMNS = ("id", "title", "description", "user_id", "created_at")
+
+
+async def archive_batch(engine, older_than: datetime, batch_size: int) -> int:
+    """Перенести в архив одну пачку задач старше older_than; вернуть их число."""
+    async with engine.begin() as conn:
+        # По id, а не по created_at: перенесённые строки уходят из начала
+        # первичного ключа, и отдельный индекс по created_at не нужен
+        query = select(TaskDB.id, TaskDB.user_id).where(TaskDB.created_at < older_than).order_by(TaskDB.id)
+        if conn.dialect.name == "postgresql":
+            query = query.with_for_update(skip_locked=True)
+        rows = (await conn.execute(query.limit(batch_size))).all()
+        if not rows:
+            return 0
+        ids = [row.id for row in rows]
+        user_ids = {row.user_id for row in rows}
+        await conn.execute(
+            insert(ArchivedTaskDB).from_select(
+                ARCHIVED_COLUMNS,
+                select(*(getattr(TaskDB, name) for name in ARCHIVED_COLUMNS)).where(TaskDB.id.in_(ids)),
+            )
+        )
+        await conn.execute(delete(TaskDB).where(TaskDB.id.in_(ids)))
+        await conn.execute(
+            update(UserDB).where(UserDB.id.in_(user_ids)).values(tasks_version=UserDB.tasks_version + 1)
+        )
+    for user_id in user_ids:
+        tasks_version_cache.invalidate(user_id)
+    return len(ids)
+
+
+async def archive(engine, older_than: datetime, batch_size: int, pause: float = 0.0) -> int:
+    """Переносить пачки, пока есть что переносить; между пачками пауза pause секунд."""
+    total = 0
+    while moved := await archive_batch(engine, older_than, batch_size):
+        total += moved
+        await asyncio.sleep(pause)
+    return total
+
+
+async def run_archiver(engine) -> None:
+    """Фоновая архивация раз в ARCHIVE_INTERVAL_SECONDS."""
+    # 0 дней означал бы «старше текущего момента», то есть перенос всех задач
+    if settings.ARCHIVE_AFTER_DAYS <= 0:
+        logger.warning("ARCHIVE_AFTER_DAYS is %d, background archival is disabled", settings.ARCHIVE_AFTER_DAYS)
+        return
+    while True:
+        older_than = datetime.utcnow() - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+        try:
+            moved = await archive(
+                engine, older_than, settings.ARCHIVE_BATCH_SIZE, settings.ARCHIVE_BATCH_PAUSE_SECONDS
+            )
+            if moved:
+                logger.info("Archived %d tasks created before %s", moved, older_than)
+        except Exception:
+            logger.exception("Task archival failed")
+        await asyncio.sleep(settings.ARCHIVE_INTERVAL_SECONDS)
+
+
+async def _main(days: int, batch_size: int) -> None:
+    from src.db.database import engine
+
+    try:
+        moved = await archive(engine, datetime.utcnow() - timedelta(days=days), batch_size)
+    finally:
+        await engine.dispose()
+    print(f"Archived {moved} tasks")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["run"])
+    parser.add_argument(
+        "--days", type=int, default=settings.ARCHIVE_AFTER_DAYS, help="по умолчанию ARCHIVE_AFTER_DAYS"
+    )
+    parser.add_argument("--batch-size", type=int, default=settings.ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args()
+    # С --days 0 в архив ушли бы все задачи
+    if args.days <= 0:
+        parser.error("--days must be positive (set it or ARCHIVE_AFTER_DAYS)")
+    asyncio.run(_main(args.days, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Сжатие журнала изменений задач (task_changes).
+
+Журнал пишут триггеры (src/db/triggers.py): каждая вставка, изменение и
+удаление задачи добавляет запись с seq — номером изменения у пользователя.
+Клиенту нужна только последняя запись каждой задачи, поэтому сжатие
+удаляет записи старше срока хранения двух видов:
+- перезаписанные: у той же задачи есть запись с большим seq. Синхронизация
+  от любого since от этого не меняется;
+- записи об удалении. Их seq запоминается в users.changes_pruned_seq.
+  Клиент с since меньше этого номера получает reset и загружает список
+  заново.
+Последняя запись живой задачи не удаляется: их не больше, чем задач.
+
+Удаление идёт пачками по batch_size строк, каждая пачка — в своей
+транзакции, чтобы не держать долгих блокировок.
+
+Запуск из backend/ (нужны переменные окружения из .env), например из cron:
+    python -m src.db.changes compact [--days 30]
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, delete, exists, select, tuple_, update
+from sqlalchemy.orm import aliased
+
+from src.core.config import settings
+from src.db.models import TaskChangeDB, UserDB
+
+
+def _superseded(older_than: datetime, batch_size: int):
+    later = aliased(TaskChangeDB)
+    return (
+        select(TaskChangeDB.user_id, TaskChangeDB.seq)
+        .where(
+            TaskChangeDB.changed_at < older_than,
+            exists().where(
+                later.user_id == TaskChangeDB.user_id,
+                later.task_id == TaskChangeDB.task_id,
+                later.seq > TaskChangeDB.seq,
+            ),
+        )
+        .limit(batch_size)
+    )
+
+
+def _tombstones(older_than: datetime, batch_size: int):
+    return (
+        select(TaskChangeDB.user_id, TaskChangeDB.seq)
+        .where(TaskChangeDB.changed_at < older_than, TaskChangeDB.deleted)
+        .order_by(TaskChangeDB.user_id, TaskChangeDB.seq)
+        .limit(batch_size)
+    )
+
+
+async def _delete(conn, keys: list[tuple[int, int]]) -> None:
+    await conn.execute(delete(TaskChangeDB).where(tuple_(TaskChangeDB.user_id, TaskChangeDB.seq).in_(keys)))
+
+
+async def compact(engine, older_than: datetime, batch_size: int = 1000) -> dict:
+    """Удалить перезаписанные записи и записи об удалении старше older_than."""
+    removed = {"superseded": 0, "tombstones": 0}
+    while True:
+        async with engine.begin() as conn:
+            keys = [tuple(row) for row in await conn.execute(_superseded(older_than, batch_size))]
+            if not keys:
+                break
+            await _delete(conn, keys)
+        removed["superseded"] += len(keys)
+
+    while True:
+        async with engine.begin() as conn:
+            keys = [tuple(row) for row in await conn.execute(_tombstones(older_than, batch_size))]
+            if not keys:
+                break
+            pruned = {}
+            for user_id, seq in keys:
+                pruned[user_id] = max(seq, pruned.get(user_id, 0))
+            await conn.execute(
+                update(UserDB)
+                .where(UserDB.id == bindparam("uid"), UserDB.changes_pruned_seq < bindparam("seq"))
+                .values(changes_pruned_seq=bindparam("seq")),
+                [{"uid": user_id, "seq": seq} for user_id, seq in pruned.items()],
+            )
+            await _delete(conn, keys)
+        removed["tombstones"] += len(keys)
+    return removed
+
+
+async def _main(days: int, batch_size: int) -> None:
+    from src.db.database import engine
+
+    try:
+        removed = await compact(engine, datetime.utcnow() - timedelta(days=days), batch_size)
+    finally:
+        await engine.dispose()
+    print(f"Removed {removed['superseded']} superseded changes and {removed['tombstones']} tombstones")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["compact"])
+    parser.add_argument("--days", type=int, default=settings.CHANGES_RETENTION_DAYS)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(_main(args.days, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
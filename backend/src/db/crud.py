@@ -1,13 +1,64 @@
-from sqlalchemy import select
+from datetime import date, datetime
+
+from sqlalchemy import (
+    Integer,
+    String,
+    and_,
+    any_,
+    bindparam,
+    column,
+    delete,
+    false,
+    func,
+    insert,
+    literal_column,
+    select,
+    table,
+    tuple_,
+    union_all,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db.database import session_manager
-from src.db.models import TaskDB, UserDB
+from src.core.cache import tasks_version_cache, user_cache
+from src.db.database import async_session, on_commit, session_manager
+from src.db.instrumentation import crud_operation
+from src.db.models import ArchivedTaskDB, TaskChangeDB, TaskDB, TaskStatsDB, UserDB
+from src.db.search import SEARCH_CONFIG, fts5_query, pg_tsquery
+
+
+# Колонки задачи для выборок без загрузки ORM-объектов
+TASK_COLUMNS = (TaskDB.id, TaskDB.title, TaskDB.description, TaskDB.created_at)
+TASK_FIELDS = tuple(column.key for column in TASK_COLUMNS)
+# Ключ порядка и курсоров; обе колонки есть в индексе (user_id, created_at, id)
+_KEY_FIELDS = ("id", "created_at")
+
+
+def task_columns(table, fields: tuple[str, ...] | None = None) -> list:
+    """Колонки table для полей fields (None — все поля) и ключа порядка."""
+    return [getattr(table, name) for name in TASK_FIELDS if fields is None or name in fields or name in _KEY_FIELDS]
+
+
+def _is_postgres(session: AsyncSession) -> bool:
+    return session.bind.dialect.name == "postgresql"
+
+
+def _tasks_changed(session: AsyncSession, user_id: int) -> None:
+    # Сам счётчик увеличивают триггеры (src/db/triggers.py), здесь только кэш
+    on_commit(session, lambda: tasks_version_cache.invalidate(user_id))
+
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
 
 
 @session_manager
 async def add_user(session: AsyncSession, user: UserDB):
     session.add(user)
+    await session.flush()
     return user
 
 
@@ -18,7 +69,7 @@ async def _get_user_by_id(session: AsyncSession, user_id: int):
     return result.scalars().first()
 
 
-@session_manager
+@session_manager(read_only=True, fallback_on_miss=True)
 async def get_user_by_id(session: AsyncSession, user_id: int):
     return await _get_user_by_id(session, user_id)
 
@@ -30,64 +81,371 @@ async def _get_user_by_username(session: AsyncSession, username: str):
     return result.scalars().first()
 
 
-@session_manager
+@session_manager(read_only=True, fallback_on_miss=True)
 async def get_user_by_username(session: AsyncSession, username: str):
     return await _get_user_by_username(session, username)
 
+@session_manager
+async def update_user_password_hash(session: AsyncSession, user_id: int, password_hash: str):
+    await session.execute(
+        update(UserDB).where(UserDB.id == user_id).values(password_hash=password_hash)
+    )
+    on_commit(session, lambda: user_cache.invalidate(user_id))
+
+
 @session_manager
 async def delete_user(session: AsyncSession, user_id: int):
     user = await _get_user_by_id(session, user_id)
     if user:
         await session.delete(user)
+        on_commit(session, lambda: user_cache.invalidate(user_id))
 
 
 @session_manager
 async def add_task(session: AsyncSession, task: TaskDB):
     session.add(task)
+    await session.flush()
+    _tasks_changed(session, task.user_id)
     return task
 
-async def _get_tasks_by_user_id(session: AsyncSession, user_id: int):
+
+def _tasks_page_query(
+    table,
+    user_id: int,
+    limit: int | None,
+    after: tuple[datetime, int] | None,
+    fields: tuple[str, ...] | None = None,
+):
+    query = select(*task_columns(table, fields)).where(table.user_id == user_id)
+    if after is not None:
+        query = query.where(tuple_(table.created_at, table.id) > tuple_(*after))
+    query = query.order_by(table.created_at, table.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def _tasks_list_query(
+    user_id: int,
+    limit: int | None = None,
+    after: tuple[datetime, int] | None = None,
+    include_archived: bool = False,
+    fields: tuple[str, ...] | None = None,
+):
+    """Задачи пользователя по (created_at, id); с include_archived — вместе с архивом.
+
+    Каждая таблица отдаёт свою страницу по своему индексу, и только эти
+    2 * limit строк сливаются и обрезаются до limit. Выбираются только
+    колонки fields и ключ порядка.
+    """
+    query = _tasks_page_query(TaskDB, user_id, limit, after, fields)
+    if not include_archived:
+        return query
+    archived = _tasks_page_query(ArchivedTaskDB, user_id, limit, after, fields)
+    parts = [select(part) for part in (query.subquery(), archived.subquery())]
+    merged = union_all(*parts).subquery()
+    query = select(*merged.c).order_by(merged.c.created_at, merged.c.id)
+    return query.limit(limit) if limit is not None else query
+
+
+async def _get_tasks_by_user_id(
+    session: AsyncSession,
+    user_id: int,
+    limit: int | None = None,
+    after: tuple[datetime, int] | None = None,
+    include_archived: bool = False,
+    fields: tuple[str, ...] | None = None,
+):
+    """Строки TASK_COLUMNS (или task_columns для fields) без ORM-объектов: список только сериализуется."""
+    result = await session.execute(_tasks_list_query(user_id, limit, after, include_archived, fields))
+    return result.all()
+
+
+@session_manager(read_only=True)
+async def get_tasks_by_user_id(
+    session: AsyncSession,
+    user_id: int,
+    limit: int | None = None,
+    after: tuple[datetime, int] | None = None,
+    include_archived: bool = False,
+    fields: tuple[str, ...] | None = None,
+):
+    return await _get_tasks_by_user_id(
+        session, user_id, limit=limit, after=after, include_archived=include_archived, fields=fields
+    )
+
+
+async def _get_tasks_version(session: AsyncSession, user_id: int):
     result = await session.execute(
-        select(TaskDB).where(TaskDB.user_id == user_id)
+        select(UserDB.tasks_version).where(UserDB.id == user_id)
     )
-    return result.scalars().all()
+    return result.scalar()
+
+
+@session_manager(read_only=True)
+async def get_tasks_version(session: AsyncSession, user_id: int):
+    version = tasks_version_cache.get(user_id)
+    if version is None:
+        generation = tasks_version_cache.generation
+        version = await _get_tasks_version(session, user_id)
+        if version is not None:
+            tasks_version_cache.set(user_id, version, generation=generation)
+    return version
 
 
 @session_manager
-async def get_tasks_by_user_id(session: AsyncSession, user_id: int):
-    return await _get_tasks_by_user_id(session, user_id)
+async def get_current_tasks_version(session: AsyncSession, user_id: int):
+    """tasks_version с основной БД, мимо кэша и реплик."""
+    return await _get_tasks_version(session, user_id)
 
 
+@session_manager(read_only=True)
+async def get_task_stats(session: AsyncSession, user_id: int, since: date, until: date):
+    """Число задач пользователя и строки (day, count) с since по until включительно.
 
-@session_manager
-async def delete_task(session: AsyncSession, user_id: int, task_id: int):
+    Оба значения ведут триггеры (src/db/triggers.py), поэтому чтение не
+    зависит от числа задач: одна строка users и не больше строки на день.
+    """
+    total = await session.scalar(select(UserDB.tasks_count).where(UserDB.id == user_id))
     result = await session.execute(
-        select(TaskDB).where(TaskDB.id == task_id, TaskDB.user_id == user_id)
+        select(TaskStatsDB.day, TaskStatsDB.count)
+        .where(TaskStatsDB.user_id == user_id, TaskStatsDB.day >= since, TaskStatsDB.day <= until)
+        .order_by(TaskStatsDB.day)
     )
-    task = result.scalars().first()
-    if task:
-        await session.delete(task)
+    return total or 0, result.all()
 
-@session_manager
-async def update_task(
-    session: AsyncSession, user_id: int, task_id: int, title: str, description: str | None = None
+
+@session_manager(read_only=True)
+async def get_task_changes(session: AsyncSession, user_id: int, since: int, limit: int):
+    """Последнее изменение каждой задачи с seq > since, по возрастанию seq.
+
+    Возвращает (tasks_version, changes_pruned_seq, строки); версия прочитана
+    в той же транзакции, что и журнал. Строка — seq, task_id и
+    TASK_COLUMNS текущего состояния задачи (из tasks или tasks_archive); у удалённой задачи колонки
+    TASK_COLUMNS пустые. Если since меньше changes_pruned_seq, часть
+    изменений уже удалена сжатием журнала и строки не возвращаются.
+    """
+    counters = (
+        await session.execute(
+            select(UserDB.tasks_version, UserDB.changes_pruned_seq).where(UserDB.id == user_id)
+        )
+    ).first()
+    version, pruned = counters or (0, 0)
+    if since < pruned or since >= version:
+        return version, pruned, []
+    latest = (
+        select(TaskChangeDB.task_id, func.max(TaskChangeDB.seq).label("seq"))
+        .where(TaskChangeDB.user_id == user_id, TaskChangeDB.seq > since)
+        .group_by(TaskChangeDB.task_id)
+        .subquery()
+    )
+    # Задача, перенесённая в архив после изменения, не удалена: берём её из архива
+    columns = [
+        func.coalesce(hot, archived).label(hot.key)
+        for hot, archived in zip(
+            TASK_COLUMNS, (ArchivedTaskDB.id, ArchivedTaskDB.title, ArchivedTaskDB.description, ArchivedTaskDB.created_at)
+        )
+    ]
+    query = (
+        select(latest.c.seq, latest.c.task_id, *columns)
+        .select_from(latest)
+        .join(TaskChangeDB, and_(TaskChangeDB.user_id == user_id, TaskChangeDB.seq == latest.c.seq))
+        .outerjoin(
+            TaskDB,
+            and_(TaskDB.id == latest.c.task_id, TaskDB.user_id == user_id, TaskChangeDB.deleted == false()),
+        )
+        .outerjoin(
+            ArchivedTaskDB,
+            and_(
+                ArchivedTaskDB.id == latest.c.task_id,
+                ArchivedTaskDB.user_id == user_id,
+                TaskChangeDB.deleted == false(),
+            ),
+        )
+        .order_by(latest.c.seq)
+        .limit(limit)
+    )
+    result = await session.execute(query)
+    return version, pruned, result.all()
+
+
+@session_manager(read_only=True)
+async def search_tasks(
+    session: AsyncSession,
+    user_id: int,
+    terms: list[str],
+    limit: int,
+    after: tuple[float, int] | None = None,
+    fields: tuple[str, ...] | None = None,
+):
+    """Задачи пользователя, содержащие все слова по префиксу, по убыванию релевантности.
+
+    Строки — TASK_COLUMNS (или task_columns для fields) и rank; страницы по
+    (rank, id), см. src.db.search.
+    """
+    columns = task_columns(TaskDB, fields)
+    if _is_postgres(session):
+        tsquery = func.to_tsquery(SEARCH_CONFIG, pg_tsquery(terms))
+        search_vector = literal_column("tasks.search_vector")
+        rank = func.ts_rank(search_vector, tsquery)
+        query = select(*columns, rank.label("rank")).where(
+            TaskDB.user_id == user_id, search_vector.op("@@")(tsquery)
+        )
+    else:
+        fts = table("tasks_fts", column("rowid"))
+        # bm25 тем меньше, чем документ релевантнее; заголовок весит вдвое больше описания
+        rank = -func.bm25(literal_column("tasks_fts"), 2.0, 1.0)
+        query = (
+            select(*columns, rank.label("rank"))
+            .join(fts, fts.c.rowid == TaskDB.id)
+            .where(TaskDB.user_id == user_id, literal_column("tasks_fts").op("MATCH")(fts5_query(terms)))
+        )
+    if after is not None:
+        query = query.where(tuple_(rank, TaskDB.id) < tuple_(*after))
+    query = query.order_by(rank.desc(), TaskDB.id.desc()).limit(limit)
+    result = await session.execute(query)
+    return result.mappings().all()
+
+
+async def _stream_tasks_by_user_id(
+    session: AsyncSession,
+    user_id: int,
+    yield_per: int,
+    include_archived: bool = False,
+    fields: tuple[str, ...] | None = None,
+):
+    # Генератор не проходит через session_manager, метку ставим сами
+    token = crud_operation.set("stream_tasks_by_user_id")
+    try:
+        result = await session.stream(
+            _tasks_list_query(user_id, include_archived=include_archived, fields=fields).execution_options(
+                yield_per=yield_per
+            )
+        )
+    finally:
+        crud_operation.reset(token)
+    # По пачкам yield_per: построчная итерация AsyncResult переключает greenlet на каждой строке
+    async for partition in result.mappings().partitions():
+        for row in partition:
+            yield row
+
+
+async def stream_tasks_by_user_id(
+    user_id: int,
+    yield_per: int = 1000,
+    include_archived: bool = False,
+    fields: tuple[str, ...] | None = None,
+    session: AsyncSession | None = None,
 ):
+    """Отдавать задачи пользователя построчно через серверный курсор."""
+    if session is not None:
+        async for row in _stream_tasks_by_user_id(session, user_id, yield_per, include_archived, fields):
+            yield row
+        return
+    async with async_session() as session:
+        async for row in _stream_tasks_by_user_id(session, user_id, yield_per, include_archived, fields):
+            yield row
+
+
+
+@session_manager
+async def delete_task(session: AsyncSession, user_id: int, task_id: int) -> int | None:
+    """Удалить задачу одним DELETE ... RETURNING; None, если такой задачи у пользователя нет."""
     result = await session.execute(
-        select(TaskDB).where(TaskDB.id == task_id, TaskDB.user_id == user_id)
+        delete(TaskDB)
+        .where(TaskDB.id == task_id, TaskDB.user_id == user_id)
+        .returning(TaskDB.id)
+        .execution_options(synchronize_session=False)
     )
-    task = result.scalars().first()
-
-    if task:
-        task.title = title
-        task.description = description
-        return task
-    return None
+    deleted_id = result.scalar_one_or_none()
+    if deleted_id is not None:
+        _tasks_changed(session, user_id)
+    return deleted_id
 
 
+@session_manager
+async def update_task(session: AsyncSession, user_id: int, task_id: int, **values):
+    """Обновить переданные поля задачи одним UPDATE ... RETURNING.
 
+    Возвращает строку задачи после обновления или None, если такой задачи
+    у пользователя нет.
+    """
+    where = (TaskDB.id == task_id, TaskDB.user_id == user_id)
+    if not values:
+        result = await session.execute(select(*TASK_COLUMNS).where(*where))
+        return result.mappings().first()
+    result = await session.execute(
+        update(TaskDB)
+        .where(*where)
+        .values(**values)
+        .returning(*TASK_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    row = result.mappings().first()
+    if row is not None:
+        _tasks_changed(session, user_id)
+    return row
 
 
+@session_manager
+async def add_tasks(session: AsyncSession, user_id: int, items: list[dict], chunk_size: int = 500):
+    """Вставить задачи через INSERT ... VALUES ... RETURNING; строки в порядке items."""
+    rows = []
+    for chunk in _chunks(items, chunk_size):
+        result = await session.execute(
+            insert(TaskDB).returning(*TASK_COLUMNS, sort_by_parameter_order=True),
+            [{**item, "user_id": user_id} for item in chunk],
+        )
+        rows.extend(result.mappings().all())
+    _tasks_changed(session, user_id)
+    return rows
 
 
+@session_manager
+async def update_tasks(session: AsyncSession, user_id: int, items: list[dict], chunk_size: int = 500):
+    """Обновить задачи пользователя; вернуть строки, которые нашлись и обновились."""
+    rows = []
+    for chunk in _chunks(items, chunk_size):
+        if _is_postgres(session):
+            data = values(
+                column("id", Integer), column("title", String), column("description", String), name="data"
+            ).data([(item["id"], item["title"], item["description"]) for item in chunk])
+            statements = [
+                update(TaskDB)
+                .where(TaskDB.id == data.c.id, TaskDB.user_id == user_id)
+                .values(title=data.c.title, description=data.c.description)
+            ]
+        else:
+            # SQLite не поддерживает UPDATE ... FROM (VALUES ...) AS v(...)
+            statements = [
+                update(TaskDB)
+                .where(TaskDB.id == item["id"], TaskDB.user_id == user_id)
+                .values(title=item["title"], description=item["description"])
+                for item in chunk
+            ]
+        for statement in statements:
+            result = await session.execute(
+                statement.returning(*TASK_COLUMNS),
+                execution_options={"synchronize_session": False},
+            )
+            rows.extend(result.mappings().all())
+    _tasks_changed(session, user_id)
+    return rows
 
 
+@session_manager
+async def delete_tasks(session: AsyncSession, user_id: int, task_ids: list[int], chunk_size: int = 500):
+    """Удалить задачи пользователя; вернуть множество реально удалённых id."""
+    deleted = set()
+    for chunk in _chunks(task_ids, chunk_size):
+        if _is_postgres(session):
+            id_matches = TaskDB.id == any_(bindparam("task_ids", chunk, type_=ARRAY(Integer)))
+        else:
+            id_matches = TaskDB.id.in_(chunk)
+        result = await session.execute(
+            delete(TaskDB).where(TaskDB.user_id == user_id, id_matches).returning(TaskDB.id),
+            execution_options={"synchronize_session": False},
+        )
+        deleted.update(result.scalars().all())
+    _tasks_changed(session, user_id)
+    return deleted
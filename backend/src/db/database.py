@@ -1,33 +1,184 @@
 from functools import wraps
 
+from sqlalchemy import event, make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
+from src.core.cache import recent_writers
 from src.core.config import settings
-
-
-engine = create_async_engine(settings.DB_URL, echo=True)
+from src.core.profiling import phase
+from src.db.instrumentation import (
+    InstrumentedPool,
+    SlowQueryLog,
+    crud_operation,
+    instrument_pool,
+    instrument_queries,
+)
+from src.db.replicas import CONNECTION_ERRORS, Replica, ReplicaSet
+
+
+def _create_engine(url: str):
+    connect_args = {}
+    # Кэш подготовленных запросов — параметр asyncpg; другие драйверы его не принимают
+    if make_url(url).get_driver_name() == "asyncpg":
+        connect_args["statement_cache_size"] = settings.DB_STATEMENT_CACHE_SIZE
+    return create_async_engine(
+        url,
+        # Эхо SQL синхронно пишет каждый запрос в stdout — только для отладки
+        echo=settings.DEBUG,
+        poolclass=InstrumentedPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        connect_args=connect_args,
+    )
+
+
+engine = _create_engine(settings.DB_URL)
+pool_metrics = instrument_pool(engine)
+slow_query_log = SlowQueryLog(
+    settings.SLOW_QUERY_MS, settings.SLOW_QUERY_LOG_SIZE, settings.SLOW_QUERY_EXPLAIN_SAMPLE
+)
+instrument_queries(engine, slow_query_log)
 
 async_session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
 
-def session_manager(func):
+def _create_replicas() -> ReplicaSet:
+    replicas = []
+    for index, url in enumerate(settings.DB_REPLICA_URLS):
+        replica = Replica(f"replica{index}", _create_engine(url))
+        replica.metrics = instrument_pool(replica.engine, replica.name)
+        instrument_queries(replica.engine, slow_query_log)
+        replicas.append(replica)
+    return ReplicaSet(replicas, settings.DB_REPLICA_BALANCE, settings.DB_REPLICA_RETRY_SECONDS)
+
+
+replicas = _create_replicas()
+
+
+def _wants_primary(session: AsyncSession | None) -> bool:
+    """Чтение должно видеть свои записи: сессия уже писала или пользователь писал недавно."""
+    if session is None:
+        return False
+    if session.info.get("wrote"):
+        return True
+    user_id = session.info.get("user_id")
+    return user_id is not None and recent_writers.get(user_id) is not None
+
+
+async def _run_on_primary(func, session, args, kwargs):
+    if session is not None:
+        return await func(session, *args, **kwargs)
+    async with async_session() as session:
+        async with session.begin():
+            return await func(session, *args, **kwargs)
+
+
+async def _run_read_only(func, session, args, kwargs, fallback_on_miss: bool):
+    if not replicas or _wants_primary(session):
+        return await _run_on_primary(func, session, args, kwargs)
+    # Запрос целиком читает с одной реплики: версия списка и сам список
+    # не должны прийти с реплик с разным отставанием
+    replica = session.info.get("replica") if session is not None else None
+    if replica is None or not replica.healthy:
+        replica = replicas.choose()
+        if replica is None:
+            return await _run_on_primary(func, session, args, kwargs)
+        if session is not None:
+            session.info["replica"] = replica
+    try:
+        async with replica.session() as replica_session:
+            result = await func(replica_session, *args, **kwargs)
+    except CONNECTION_ERRORS as exc:
+        replicas.mark_down(replica, exc)
+        return await _run_on_primary(func, session, args, kwargs)
+    replica.queries += 1
+    if fallback_on_miss and not result:
+        # Запись могла ещё не доехать до реплики (вход сразу после регистрации)
+        return await _run_on_primary(func, session, args, kwargs)
+    return result
+
+
+def session_manager(func=None, *, read_only: bool = False, fallback_on_miss: bool = False):
+    """Выполнить CRUD-функцию в сессии запроса или в своей транзакции.
+
+    Если передан session=..., функция работает внутри уже открытой транзакции
+    (см. get_session). Без него, например из скриптов, открывается отдельная
+    сессия с транзакцией на один вызов.
+
+    read_only=True: при настроенных DB_REPLICA_URLS функция выполняется на
+    реплике в отдельной короткой сессии, кроме случаев, когда нужно увидеть
+    свои записи (см. _wants_primary). fallback_on_miss=True: пустой
+    результат с реплики перепроверяется на основной БД.
+    """
+    if func is None:
+        return lambda f: session_manager(f, read_only=read_only, fallback_on_miss=fallback_on_miss)
+
     @wraps(func)
-    async def wrapper(*args, **kwargs):
-        async with async_session() as session:
-            async with session.begin():
-                res = await func(session, *args, **kwargs)
-        return res
+    async def wrapper(*args, session: AsyncSession | None = None, **kwargs):
+        token = crud_operation.set(func.__name__)
+        try:
+            # Время сессии и ORM без самих SQL-запросов (их учитывает instrument_queries)
+            with phase("session"):
+                if read_only:
+                    return await _run_read_only(func, session, args, kwargs, fallback_on_miss)
+                return await _run_on_primary(func, session, args, kwargs)
+        finally:
+            crud_operation.reset(token)
 
     return wrapper
 
 
+async def get_session():
+    """Зависимость FastAPI: одна сессия и одна транзакция на весь запрос.
+
+    Соединение берётся из пула при первом запросе к БД. В конце запроса
+    транзакция фиксируется, при исключении откатывается. Код после yield
+    выполняется уже после отправки ответа, поэтому изменяющие эндпоинты
+    вызывают session.commit() сами, до того как вернуть результат.
+    """
+    async with async_session() as session:
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
+        await session.commit()
+
+
+def on_commit(session, callback) -> None:
+    """Выполнить callback после успешного коммита транзакции сессии."""
+    session.info.setdefault("after_commit", []).append(callback)
+
 
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session):
+    for callback in session.info.pop("after_commit", []):
+        callback()
 
 
+@event.listens_for(Session, "after_rollback")
+def _drop_after_commit(session):
+    session.info.pop("after_commit", None)
 
 
+@event.listens_for(Session, "do_orm_execute")
+def _track_writes(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
 
 
+@event.listens_for(Session, "after_flush")
+def _track_flush(session, flush_context):
+    session.info["wrote"] = True
 
 
+@event.listens_for(Session, "after_commit")
+def _pin_recent_writer(session):
+    # Следующие запросы пользователя какое-то время читают с основной БД
+    user_id = session.info.get("user_id")
+    if session.info.get("wrote") and user_id is not None and replicas:
+        recent_writers.set(user_id, True)
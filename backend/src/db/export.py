@@ -0,0 +1,178 @@
+"""Выгрузка задач в NDJSON или CSV, при желании сжатая gzip на лету.
+
+Задачи читаются серверным курсором (stream_tasks_by_user_id, yield_per) и
+кодируются кусками по EXPORT_CHUNK_BYTES, поэтому память не зависит от
+числа задач: в ней одновременно не больше одной пачки строк и одного куска.
+Тот же код отдаёт GET /tasks/user/{user_id}/export.
+
+Запуск из backend/ (нужны переменные окружения из .env):
+    python -m src.db.export user --user-id 42 --format csv --gzip -o tasks.csv.gz
+    python -m src.db.export all --output-dir export/ --workers 4 --gzip
+Во втором случае каждый пользователь пишется в свой файл
+user_<id>.<format>[.gz], пользователей выгружают --workers параллельных
+соединений.
+"""
+import argparse
+import asyncio
+import csv
+import io
+import sys
+import time
+import zlib
+from pathlib import Path
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from src.core.config import settings
+from src.db.crud import stream_tasks_by_user_id
+from src.db.models import UserDB
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+CSV_COLUMNS = ("id", "title", "description", "created_at")
+
+
+def _ndjson(row) -> bytes:
+    return orjson.dumps(dict(row)) + b"\n"
+
+
+def _csv_writer():
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def encode(row) -> bytes:
+        writer.writerow(
+            (row["id"], row["title"], row["description"], row["created_at"].isoformat())
+        )
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line.encode("utf-8")
+
+    return encode
+
+
+async def encode_rows(rows, fmt: str, chunk_bytes: int | None = None):
+    """Строки задач в куски NDJSON или CSV (с заголовком) не меньше chunk_bytes."""
+    chunk_bytes = chunk_bytes or settings.EXPORT_CHUNK_BYTES
+    if fmt == "csv":
+        encode = _csv_writer()
+        chunk = [",".join(CSV_COLUMNS).encode() + b"\r\n"]
+    else:
+        encode = _ndjson
+        chunk = []
+    size = sum(map(len, chunk))
+    async for row in rows:
+        line = encode(row)
+        chunk.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield b"".join(chunk)
+            chunk, size = [], 0
+    if chunk:
+        yield b"".join(chunk)
+
+
+async def gzip_chunks(chunks):
+    """Сжимать поток кусков в формат gzip, не накапливая его целиком."""
+    compressor = zlib.compressobj(settings.EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_user(
+    user_id: int,
+    fmt: str,
+    compress: bool = False,
+    include_archived: bool = True,
+    session: AsyncSession | None = None,
+):
+    """Куски выгрузки задач пользователя; без session — со своим соединением."""
+    rows = stream_tasks_by_user_id(
+        user_id,
+        yield_per=settings.TASKS_STREAM_YIELD_PER,
+        include_archived=include_archived,
+        session=session,
+    )
+    chunks = encode_rows(rows, fmt)
+    return gzip_chunks(chunks) if compress else chunks
+
+
+def export_filename(user_id: int, fmt: str, compress: bool) -> str:
+    return f"user_{user_id}.{fmt}" + (".gz" if compress else "")
+
+
+async def _write(chunks, path: Path) -> None:
+    with path.open("wb") as file:
+        async for chunk in chunks:
+            file.write(chunk)
+
+
+async def export_all(engine, output_dir: Path, fmt: str, compress: bool, workers: int) -> int:
+    """Выгрузить всех пользователей в output_dir, workers одновременно; вернуть их число."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        user_ids = list(await session.scalars(select(UserDB.id).order_by(UserDB.id)))
+    queue = asyncio.Queue()
+    for user_id in user_ids:
+        queue.put_nowait(user_id)
+
+    async def worker():
+        # Каждый воркер держит своё соединение и читает своим курсором
+        while not queue.empty():
+            user_id = queue.get_nowait()
+            async with session_factory() as session:
+                await _write(
+                    export_user(user_id, fmt, compress, session=session),
+                    output_dir / export_filename(user_id, fmt, compress),
+                )
+
+    await asyncio.gather(*(worker() for _ in range(max(1, min(workers, len(user_ids))))))
+    return len(user_ids)
+
+
+async def _main(args) -> None:
+    from src.db.database import engine
+
+    started = time.perf_counter()
+    try:
+        if args.command == "all":
+            users = await export_all(engine, Path(args.output_dir), args.format, args.gzip, args.workers)
+            print(f"Exported {users} users in {time.perf_counter() - started:.1f} s", file=sys.stderr)
+            return
+        session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        async with session_factory() as session:
+            chunks = export_user(args.user_id, args.format, args.gzip, session=session)
+            if args.output == "-":
+                async for chunk in chunks:
+                    sys.stdout.buffer.write(chunk)
+            else:
+                await _write(chunks, Path(args.output))
+    finally:
+        await engine.dispose()
+    print(f"Exported user {args.user_id} in {time.perf_counter() - started:.1f} s", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["user", "all"])
+    parser.add_argument("--user-id", type=int)
+    parser.add_argument("--format", choices=sorted(FORMATS), default="ndjson")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("-o", "--output", default="-", help="файл для user; по умолчанию stdout")
+    parser.add_argument("--output-dir", default="export", help="папка для all")
+    parser.add_argument("--workers", type=int, default=settings.EXPORT_WORKERS)
+    args = parser.parse_args()
+    if args.command == "user" and args.user_id is None:
+        parser.error("--user-id is required for user")
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""Массовый импорт задач из NDJSON или CSV (например, выгрузки src/db/export.py).
+
+Записи читаются потоком и проверяются пачками по IMPORT_BATCH_SIZE по схеме
+ImportTask (AddTask с необязательными user_id и created_at). Неверные
+записи и записи несуществующих пользователей отклоняются, остальные
+загружаются:
+- в Postgres — COPY (copy_records_to_table asyncpg);
+- в остальных БД — INSERT пачкой (executemany).
+Каждая пачка — своя транзакция, в которой же сдвигается контрольная точка
+задания (import_checkpoints). Прерванный импорт с тем же --job
+продолжается с первой необработанной записи, без повторов и пропусков.
+
+Счётчики, статистику и журнал изменений ведут триггеры на tasks, как и для
+обычной вставки. Тот же импорт — POST /internal/import.
+
+Запуск из backend/ (нужны переменные окружения из .env):
+    python -m src.db.importer run tasks.ndjson --job migration-1
+    python -m src.db.importer run user_42.csv.gz --format csv --user-id 42
+"""
+import argparse
+import asyncio
+import csv
+import sys
+import time
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List
+
+import orjson
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import insert, select, update
+
+from src.api.schemas.task import ImportTask
+from src.core.cache import tasks_version_cache
+from src.core.config import settings
+from src.db.models import ImportCheckpointDB, TaskDB, UserDB
+
+IMPORT_TASKS = TypeAdapter(List[ImportTask])
+COLUMNS = ("title", "description", "user_id", "created_at")
+
+
+class CheckpointMoved(Exception):
+    """Контрольную точку задания сдвинул другой импорт."""
+
+
+async def gunzip_chunks(chunks):
+    decompressor = zlib.decompressobj(31)
+    async for chunk in chunks:
+        yield decompressor.decompress(chunk)
+    yield decompressor.flush()
+
+
+async def _lines(chunks):
+    rest = b""
+    async for chunk in chunks:
+        lines = (rest + chunk).split(b"\n")
+        rest = lines.pop()
+        for line in lines:
+            yield line
+    if rest:
+        yield rest
+
+
+async def read_records(chunks, fmt: str):
+    """Записи источника по кускам байтов: словари из NDJSON или из CSV с заголовком.
+
+    Нечитаемая строка NDJSON или JSON, который не объект, становится записью
+    {"__error__": ...} и отклоняется при проверке, не прерывая импорт.
+    """
+    if fmt == "ndjson":
+        async for line in _lines(chunks):
+            if not line.strip():
+                continue
+            try:
+                record = orjson.loads(line)
+            except orjson.JSONDecodeError as exc:
+                yield {"__error__": f"invalid JSON: {exc}"}
+                continue
+            # Число, null или массив — корректный JSON, но не запись
+            yield record if isinstance(record, dict) else {"__error__": "expected object"}
+        return
+
+    header, record = None, ""
+    async for line in _lines(chunks):
+        # Запись CSV может занимать несколько строк внутри кавычек
+        record += line.decode("utf-8") + "\n"
+        if record.count('"') % 2:
+            continue
+        values = next(csv.reader([record]), [])
+        record = ""
+        if header is None:
+            header = [name.strip() for name in values]
+        elif values:
+            # Пустое поле CSV — отсутствующее значение, как его пишет выгрузка
+            yield {name: value or None for name, value in zip(header, values)}
+
+
+def _utc(value: datetime | None) -> datetime:
+    if value is None:
+        return datetime.utcnow()
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def validate_batch(batch: list[dict], user_id: int | None) -> tuple[list[tuple], dict[int, str]]:
+    """Строки для вставки (COLUMNS) и ошибки по номеру записи в пачке.
+
+    Пачка проверяется одним вызовом pydantic; при ошибках номера неверных
+    записей берутся из loc, остальные записи проверяются повторно.
+    """
+    errors = {
+        index: record["__error__"] for index, record in enumerate(batch) if "__error__" in record
+    }
+    while True:
+        candidates = [index for index in range(len(batch)) if index not in errors]
+        try:
+            tasks = IMPORT_TASKS.validate_python([batch[index] for index in candidates])
+            break
+        except ValidationError as exc:
+            for error in exc.errors():
+                index = candidates[error["loc"][0]]
+                field = ".".join(str(part) for part in error["loc"][1:])
+                errors.setdefault(index, f"{field}: {error['msg']}" if field else error["msg"])
+
+    rows = []
+    for index, task in zip(candidates, tasks):
+        owner = task.user_id if task.user_id is not None else user_id
+        if owner is None:
+            errors[index] = "user_id: Field required"
+            continue
+        rows.append((index, (task.title, task.description, owner, _utc(task.created_at))))
+    return rows, errors
+
+
+async def _load(conn, rows: list[tuple]) -> None:
+    if conn.dialect.name == "postgresql":
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table("tasks", records=rows, columns=COLUMNS)
+    else:
+        await conn.execute(insert(TaskDB), [dict(zip(COLUMNS, row)) for row in rows])
+
+
+async def _checkpoint(engine, job: str) -> int:
+    """Позиция задания; новое задание начинается с нуля."""
+    async with engine.begin() as conn:
+        position = await conn.scalar(select(ImportCheckpointDB.position).where(ImportCheckpointDB.job == job))
+        if position is None:
+            await conn.execute(insert(ImportCheckpointDB).values(job=job, updated_at=datetime.utcnow()))
+            return 0
+        return position
+
+
+async def _import_batch(engine, job: str, position: int, batch: list[dict], user_id: int | None):
+    rows, errors = validate_batch(batch, user_id)
+    async with engine.begin() as conn:
+        if rows:
+            owners = {row[2] for _, row in rows}
+            existing = set(await conn.scalars(select(UserDB.id).where(UserDB.id.in_(owners))))
+            for index, row in rows:
+                if row[2] not in existing:
+                    errors[index] = f"user_id: user {row[2]} does not exist"
+            rows = [row for index, row in rows if index not in errors]
+        if rows:
+            await _load(conn, rows)
+        # Точка сдвигается в той же транзакции, что и вставка: пачка либо
+        # загружена и учтена, либо нет
+        moved = await conn.execute(
+            update(ImportCheckpointDB)
+            .where(ImportCheckpointDB.job == job, ImportCheckpointDB.position == position)
+            .values(
+                position=position + len(batch),
+                imported=ImportCheckpointDB.imported + len(rows),
+                rejected=ImportCheckpointDB.rejected + len(errors),
+                updated_at=datetime.utcnow(),
+            )
+        )
+        if moved.rowcount != 1:
+            raise CheckpointMoved(f"Import job {job!r} is already running or was reset")
+    for owner in {row[2] for row in rows}:
+        tasks_version_cache.invalidate(owner)
+    return len(rows), errors
+
+
+def _timing(report: dict, started: float) -> dict:
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    report["rows_per_second"] = round(report["imported"] / report["seconds"]) if report["seconds"] else 0
+    return report
+
+
+async def import_tasks(
+    engine,
+    records,
+    job: str,
+    user_id: int | None = None,
+    batch_size: int | None = None,
+    progress=None,
+) -> dict:
+    """Импортировать записи, продолжая задание job с его контрольной точки.
+
+    progress(report) вызывается после каждой пачки. Возвращает отчёт: сколько
+    записей импортировано и отклонено за этот запуск, позицию задания,
+    скорость и первые IMPORT_MAX_ERRORS ошибок с номерами записей.
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    position = skip = await _checkpoint(engine, job)
+    report = {"job": job, "imported": 0, "rejected": 0, "position": position, "errors": []}
+    started = time.perf_counter()
+
+    async def flush(batch):
+        nonlocal position
+        imported, errors = await _import_batch(engine, job, position, batch, user_id)
+        report["imported"] += imported
+        report["rejected"] += len(errors)
+        free = settings.IMPORT_MAX_ERRORS - len(report["errors"])
+        report["errors"] += [
+            {"record": position + index, "error": error} for index, error in sorted(errors.items())[:max(free, 0)]
+        ]
+        position += len(batch)
+        report["position"] = position
+        _timing(report, started)
+        if progress is not None:
+            progress(report)
+
+    batch = []
+    async for record in records:
+        # Уже обработанные записи источника пропускаются без проверки
+        if skip:
+            skip -= 1
+            continue
+        batch.append(record)
+        if len(batch) >= batch_size:
+            await flush(batch)
+            batch = []
+    if batch:
+        await flush(batch)
+    return _timing(report, started)
+
+
+async def _file_chunks(path: Path, chunk_bytes: int = 1024 * 1024):
+    with path.open("rb") as file:
+        while chunk := file.read(chunk_bytes):
+            yield chunk
+
+
+def _print_progress(report: dict) -> None:
+    print(
+        f"{report['position']} records: {report['imported']} imported, {report['rejected']} rejected, "
+        f"{report['rows_per_second']} rows/s",
+        file=sys.stderr,
+    )
+
+
+async def _main(args) -> dict:
+    from src.db.database import engine
+
+    path = Path(args.path)
+    chunks = _file_chunks(path)
+    if path.suffix == ".gz":
+        chunks = gunzip_chunks(chunks)
+    fmt = args.format or ("csv" if ".csv" in path.suffixes else "ndjson")
+    try:
+        return await import_tasks(
+            engine,
+            read_records(chunks, fmt),
+            args.job or path.name,
+            user_id=args.user_id,
+            batch_size=args.batch_size,
+            progress=_print_progress,
+        )
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["run"])
+    parser.add_argument("path", help="файл .ndjson или .csv, можно .gz")
+    parser.add_argument("--format", choices=["ndjson", "csv"], default=None, help="по умолчанию по расширению")
+    parser.add_argument("--job", default=None, help="имя задания для контрольной точки; по умолчанию имя файла")
+    parser.add_argument("--user-id", type=int, default=None, help="владелец записей без user_id")
+    parser.add_argument("--batch-size", type=int, default=settings.IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+    report = asyncio.run(_main(args))
+    for error in report["errors"]:
+        print(f"record {error['record']}: {error['error']}", file=sys.stderr)
+    print(
+        f"Imported {report['imported']}, rejected {report['rejected']} in {report['seconds']} s "
+        f"({report['rows_per_second']} rows/s); job {report['job']!r} at record {report['position']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
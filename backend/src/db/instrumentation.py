@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from src.core.metrics import Histogram, registry
+from src.core.profiling import add_phase_time
+
+logger = logging.getLogger(__name__)
+
+# Имя CRUD-функции, от имени которой идут запросы к БД (см. session_manager)
+crud_operation: ContextVar[str] = ContextVar("crud_operation", default="other")
+
+query_duration = registry.histogram(
+    "db_query_duration_seconds", "Время выполнения SQL-запроса", ("operation",)
+)
+slow_queries = registry.counter(
+    "db_slow_queries_total", "SQL-запросы дольше порога SLOW_QUERY_MS", ("operation",)
+)
+
+
+class PoolMetrics:
+    """Счётчики пула соединений одного движка."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.checkout_failures = 0
+        # Время ожидания соединения из пула (вместе с открытием нового)
+        self.wait_seconds = Histogram()
+
+    def stats(self, pool) -> dict:
+        return {
+            "name": self.name,
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow_in_use": max(0, pool.overflow()),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "checkout_failures": self.checkout_failures,
+            "wait_seconds": self.wait_seconds.snapshot(),
+        }
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Пул, замеряющий ожидание соединения и неудачные попытки его получить.
+
+    События пула сообщают о выдаче соединения уже после ожидания, поэтому
+    время ожидания снимается здесь, вокруг _do_get.
+    """
+
+    metrics: PoolMetrics | None = None
+
+    def _do_get(self):
+        if self.metrics is None:
+            return super()._do_get()
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.metrics.checkout_failures += 1
+            raise
+        waited = time.perf_counter() - start
+        self.metrics.wait_seconds.observe(waited)
+        add_phase_time("pool", waited)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() пересоздаёт пул; метрики переходят к новому
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def instrument_pool(engine, name: str = "primary") -> PoolMetrics:
+    """Подключить метрики к пулу движка (sync или async)."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    pool = sync_engine.pool
+    metrics = PoolMetrics(name)
+    if isinstance(pool, InstrumentedPool):
+        pool.metrics = metrics
+
+    # Слушатели событий сохраняются при пересоздании пула
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.checkouts += 1
+
+    @event.listens_for(pool, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        metrics.checkins += 1
+
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        metrics.connects += 1
+
+    @event.listens_for(pool, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.invalidations += 1
+
+    return metrics
+
+
+class SlowQueryLog:
+    """Последние медленные запросы в кольцевом буфере фиксированного размера.
+
+    Для доли медленных SELECT (explain_sample) план снимается в фоне на
+    отдельном соединении, чтобы не задерживать сам запрос. EXPLAIN ANALYZE
+    выполняет запрос ещё раз, поэтому по умолчанию выборка нулевая.
+    """
+
+    # Длина текста одного параметра в записи
+    MAX_PARAM_LENGTH = 200
+    # Колонки, значения которых в лог не попадают; параметр узнаётся по
+    # имени: колонка или колонка с суффиксом (password_hash_1)
+    SENSITIVE_COLUMNS = ("password_hash",)
+    REDACTED = "***"
+
+    def __init__(self, threshold_ms: float, maxsize: int, explain_sample: float = 0.0):
+        self.threshold = threshold_ms / 1000
+        self.explain_sample = explain_sample
+        self.entries: deque[dict] = deque(maxlen=maxsize)
+        self._tasks: set[asyncio.Task] = set()
+
+    def record(
+        self, engine, statement: str, parameters, duration: float, operation: str, names=None
+    ) -> None:
+        """Записать медленный запрос; names — имена позиционных параметров."""
+        entry = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(duration * 1000, 3),
+            "operation": operation,
+            "statement": statement,
+            "parameters": self._format_parameters(parameters, names),
+            "plan": None,
+        }
+        self.entries.append(entry)
+        slow_queries.inc(operation)
+        if self._should_explain(statement):
+            task = asyncio.get_running_loop().create_task(
+                self._explain(engine, entry, statement, parameters)
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _should_explain(self, statement: str) -> bool:
+        if self.explain_sample <= 0 or not statement.lstrip().upper().startswith("SELECT"):
+            return False
+        return random.random() < self.explain_sample
+
+    def _is_sensitive(self, name) -> bool:
+        return isinstance(name, str) and any(
+            name == column or name.startswith(f"{column}_") for column in self.SENSITIVE_COLUMNS
+        )
+
+    def _format_parameters(self, parameters, names=None):
+        if isinstance(parameters, dict):
+            return {
+                key: self.REDACTED if self._is_sensitive(key) else self._format_value(value)
+                for key, value in parameters.items()
+            }
+        if isinstance(parameters, (list, tuple)):
+            if any(isinstance(value, (dict, list, tuple)) for value in parameters):
+                # executemany: набор параметров на каждую строку
+                return [self._format_parameters(value, names) for value in parameters]
+            if names is None or len(names) != len(parameters):
+                names = [None] * len(parameters)
+            return [
+                self.REDACTED if self._is_sensitive(name) else self._format_value(value)
+                for name, value in zip(names, parameters)
+            ]
+        return self._format_value(parameters)
+
+    def _format_value(self, value):
+        if value is None or isinstance(value, (bool, int, float)):
+            return value
+        text = str(value)
+        if len(text) > self.MAX_PARAM_LENGTH:
+            text = text[: self.MAX_PARAM_LENGTH] + "..."
+        return text
+
+    async def _explain(self, engine, entry: dict, statement: str, parameters) -> None:
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(slow_query_log=False)
+            if conn.dialect.name == "postgresql":
+                sql = f"EXPLAIN (ANALYZE, BUFFERS) {statement}"
+            else:
+                sql = f"EXPLAIN QUERY PLAN {statement}"
+            try:
+                result = await conn.exec_driver_sql(sql, parameters)
+                entry["plan"] = "\n".join(" ".join(map(str, row)) for row in result)
+            except Exception as exc:
+                logger.warning("Failed to capture plan for slow query: %s", exc)
+                entry["plan"] = f"error: {exc}"
+            finally:
+                await conn.rollback()
+
+    async def wait_explained(self) -> None:
+        """Дождаться фоновых EXPLAIN (для тестов и завершения работы)."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def recent(self, limit: int | None = None) -> list[dict]:
+        entries = list(reversed(self.entries))
+        return entries if limit is None else entries[:limit]
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+
+def instrument_queries(engine, slow_log: SlowQueryLog | None = None) -> None:
+    """Замерять каждый SQL-запрос движка с меткой вызывающей CRUD-функции.
+
+    Запросы дольше порога slow_log попадают в его буфер.
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_started_at = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        started_at = getattr(context, "_query_started_at", None)
+        if started_at is None:
+            return
+        duration = time.perf_counter() - started_at
+        operation = crud_operation.get()
+        query_duration.observe(duration, operation)
+        add_phase_time("db", duration)
+        if (
+            slow_log is not None
+            and duration >= slow_log.threshold
+            and context.execution_options.get("slow_query_log", True)
+        ):
+            # Имена позиционных параметров знает только скомпилированный запрос
+            compiled = context.compiled
+            names = getattr(compiled, "positiontup", None) if compiled is not None else None
+            slow_log.record(engine, statement, parameters, duration, operation, names)
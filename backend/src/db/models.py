@@ -1,9 +1,12 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
-from sqlalchemy import ForeignKey, String
+from sqlalchemy import ForeignKey, Index, String, event
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
+from src.db.search import search_ddl, search_drop_ddl
+from src.db.triggers import task_stats_ddl, tasks_version_ddl
+
 
 class Base(DeclarativeBase):
     pass
@@ -17,13 +20,88 @@ class UserDB(Base):
     username: Mapped[str] = mapped_column(unique=True)
     password_hash: Mapped[str]
     email: Mapped[Optional[str]] = mapped_column(String(30), nullable=True)
+    # Меняется триггерами при любом изменении задач пользователя (ETag списка);
+    # не меньше последнего seq в журнале task_changes (архивация поднимает
+    # версию без записи в журнал)
+    tasks_version: Mapped[int] = mapped_column(default=0, server_default="0")
+    # Число задач пользователя, ведут те же триггеры
+    tasks_count: Mapped[int] = mapped_column(default=0, server_default="0")
+    # Записи журнала с seq не больше этого удалены при сжатии (src/db/changes.py)
+    changes_pruned_seq: Mapped[int] = mapped_column(default=0, server_default="0")
 
 
 class TaskDB(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Покрывает выборку задач пользователя и keyset-пагинацию по (created_at, id)
+        Index("ix_tasks_user_id_created_at_id", "user_id", "created_at", "id"),
+        # id не переиспользуются: задача в архиве сохраняет свой id (src/db/archive.py)
+        {"sqlite_autoincrement": True},
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     title: Mapped[str] = mapped_column(String(30))
     description: Mapped[Optional[str]] = mapped_column(String(50))
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
-    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow())
\ No newline at end of file
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+
+
+class ArchivedTaskDB(Base):
+    """Старые задачи, перенесённые из tasks архивацией; только для чтения."""
+    __tablename__ = "tasks_archive"
+    __table_args__ = (
+        Index("ix_tasks_archive_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    title: Mapped[str] = mapped_column(String(30))
+    description: Mapped[Optional[str]] = mapped_column(String(50))
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    created_at: Mapped[datetime]
+
+
+class TaskStatsDB(Base):
+    """Число задач пользователя по дню создания (UTC); ведут триггеры на tasks."""
+    __tablename__ = "task_stats"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    day: Mapped[date] = mapped_column(primary_key=True)
+    count: Mapped[int]
+
+
+class TaskChangeDB(Base):
+    """Журнал изменений задач для дельта-синхронизации; пишут триггеры на tasks."""
+    __tablename__ = "task_changes"
+    __table_args__ = (
+        # Сжатие ищет более поздние записи той же задачи
+        Index("ix_task_changes_user_id_task_id_seq", "user_id", "task_id", "seq"),
+    )
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    seq: Mapped[int] = mapped_column(primary_key=True)
+    # Без внешнего ключа: запись об удалении переживает саму задачу
+    task_id: Mapped[int]
+    deleted: Mapped[bool]
+    changed_at: Mapped[datetime]
+
+
+class ImportCheckpointDB(Base):
+    """Прогресс массового импорта (src/db/importer.py) по имени задания."""
+    __tablename__ = "import_checkpoints"
+
+    job: Mapped[str] = mapped_column(String(100), primary_key=True)
+    # Столько записей источника уже обработано: импортировано или отклонено
+    position: Mapped[int] = mapped_column(default=0)
+    imported: Mapped[int] = mapped_column(default=0)
+    rejected: Mapped[int] = mapped_column(default=0)
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+
+
+for ddl in tasks_version_ddl():
+    event.listen(TaskDB.__table__, "after_create", ddl)
+for ddl in task_stats_ddl():
+    event.listen(TaskDB.__table__, "after_create", ddl)
+for ddl in search_ddl():
+    event.listen(TaskDB.__table__, "after_create", ddl)
+for ddl in search_drop_ddl():
+    event.listen(TaskDB.__table__, "before_drop", ddl)
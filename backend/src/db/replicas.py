@@ -0,0 +1,98 @@
+"""Реплики только для чтения и выбор реплики для запроса.
+
+Реплика, на которой запрос упал с ошибкой соединения, исключается из
+выбора на retry_seconds; после этого она снова получает запросы, и первый
+же успешный считается проверкой здоровья. check() проверяет отключённые
+реплики явно (например, периодически из фоновой задачи).
+"""
+import itertools
+import logging
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+logger = logging.getLogger(__name__)
+
+# Ошибки, после которых реплика считается недоступной
+CONNECTION_ERRORS = (OperationalError, InterfaceError, OSError)
+
+
+class Replica:
+    def __init__(self, name: str, engine):
+        self.name = name
+        self.engine = engine
+        self.session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        self.down_until = 0.0
+        self.failures = 0
+        self.queries = 0
+
+    @property
+    def healthy(self) -> bool:
+        return self.down_until <= time.monotonic()
+
+    def in_use(self) -> int:
+        return self.engine.sync_engine.pool.checkedout()
+
+
+class ReplicaSet:
+    """Реплики с балансировкой round_robin или least_connections."""
+
+    def __init__(self, replicas: list[Replica], balance: str = "least_connections", retry_seconds: float = 10.0):
+        if balance not in ("round_robin", "least_connections"):
+            raise ValueError(f"Unknown replica balance: {balance}")
+        self.replicas = replicas
+        self.balance = balance
+        self.retry_seconds = retry_seconds
+        self._counter = itertools.count()
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def choose(self) -> Replica | None:
+        """Реплика для нового запроса или None, если доступных нет."""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        # Сдвиг по кругу разводит равные по нагрузке реплики
+        offset = next(self._counter) % len(healthy)
+        healthy = healthy[offset:] + healthy[:offset]
+        if self.balance == "least_connections":
+            return min(healthy, key=Replica.in_use)
+        return healthy[0]
+
+    def mark_down(self, replica: Replica, exc: BaseException) -> None:
+        replica.failures += 1
+        replica.down_until = time.monotonic() + self.retry_seconds
+        logger.warning("Replica %s is unavailable for %.0f s: %s", replica.name, self.retry_seconds, exc)
+
+    async def check(self) -> None:
+        """Проверить отключённые реплики и вернуть в работу ответившие."""
+        for replica in self.replicas:
+            if replica.down_until == 0.0:
+                continue
+            try:
+                async with replica.engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+            except CONNECTION_ERRORS as exc:
+                self.mark_down(replica, exc)
+            else:
+                replica.down_until = 0.0
+
+    def stats(self) -> list[dict]:
+        return [
+            {
+                "name": replica.name,
+                "healthy": replica.healthy,
+                "in_use": replica.in_use(),
+                "queries": replica.queries,
+                "failures": replica.failures,
+            }
+            for replica in self.replicas
+        ]
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
@@ -0,0 +1,102 @@
+"""Полнотекстовый поиск по заголовкам и описаниям задач.
+
+В Postgres — генерируемая колонка tasks.search_vector (tsvector) с
+GIN-индексом; в SQLite — внешняя FTS5-таблица tasks_fts, которую
+синхронизируют триггеры. Ни колонки, ни таблицы нет в ORM-модели:
+запросы к ним строит crud.search_tasks.
+
+Конфигурация 'simple' без стемминга: задачи пишут и по-русски, и
+по-английски, а поиск по префиксу закрывает большую часть словоформ.
+"""
+import re
+
+from sqlalchemy import DDL
+
+SEARCH_CONFIG = "simple"
+# Не больше стольких слов из запроса: каждое слово — отдельное условие в индексе
+MAX_SEARCH_TERMS = 8
+
+_PG_DDL = [
+    DDL(f"""
+    ALTER TABLE tasks ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')
+    ) STORED
+    """),
+    DDL("CREATE INDEX ix_tasks_search_vector ON tasks USING gin (search_vector)"),
+]
+
+# prefix — отдельные индексы коротких префиксов, чтобы "от"* не перебирал все слова
+_SQLITE_DDL = [
+    DDL("""
+    CREATE VIRTUAL TABLE tasks_fts USING fts5(
+        title, description, content='tasks', content_rowid='id',
+        tokenize='unicode61', prefix='2 3'
+    )
+    """),
+    DDL("""
+    CREATE TRIGGER tasks_fts_insert AFTER INSERT ON tasks
+    BEGIN
+        INSERT INTO tasks_fts(rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+    END
+    """),
+    DDL("""
+    CREATE TRIGGER tasks_fts_delete AFTER DELETE ON tasks
+    BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+        VALUES ('delete', OLD.id, OLD.title, OLD.description);
+    END
+    """),
+    DDL("""
+    CREATE TRIGGER tasks_fts_update AFTER UPDATE OF title, description ON tasks
+    BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+        VALUES ('delete', OLD.id, OLD.title, OLD.description);
+        INSERT INTO tasks_fts(rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+    END
+    """),
+]
+
+# Виртуальная таблица не удаляется вместе с tasks
+_SQLITE_DROP = DDL("DROP TABLE IF EXISTS tasks_fts")
+
+
+def search_ddl():
+    """DDL для события after_create таблицы tasks."""
+    for ddl in _PG_DDL:
+        yield ddl.execute_if(dialect="postgresql")
+    for ddl in _SQLITE_DDL:
+        yield ddl.execute_if(dialect="sqlite")
+
+
+def search_install_ddl(dialect: str):
+    """DDL для существующей таблицы tasks без поиска (src/db/upgrade.py).
+
+    Колонка Postgres заполняется сама (GENERATED ... STORED); в индекс FTS5
+    уже существующие задачи добавляет 'rebuild'.
+    """
+    if dialect == "postgresql":
+        yield from _PG_DDL
+    elif dialect == "sqlite":
+        yield from _SQLITE_DDL
+        yield DDL("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+
+
+def search_drop_ddl():
+    """DDL для события before_drop таблицы tasks."""
+    yield _SQLITE_DROP.execute_if(dialect="sqlite")
+
+
+def search_terms(query: str) -> list[str]:
+    """Слова запроса в нижнем регистре; знаки препинания и операторы отбрасываются."""
+    return [term.lower() for term in re.findall(r"[^\W_]+", query)][:MAX_SEARCH_TERMS]
+
+
+def pg_tsquery(terms: list[str]) -> str:
+    """Запрос для to_tsquery: все слова по префиксу."""
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def fts5_query(terms: list[str]) -> str:
+    """Запрос для FTS5 MATCH: все слова по префиксу."""
+    return " ".join(f'"{term}"*' for term in terms)
@@ -0,0 +1,127 @@
+"""Пересчёт и проверка счётчиков задач (users.tasks_count и task_stats).
+
+Счётчики ведут триггеры (src/db/triggers.py); пересчёт нужен для данных,
+созданных до их появления, а проверка — чтобы убедиться, что счётчики
+не разошлись с таблицей задач. Задачи в архиве (tasks_archive) тоже
+считаются.
+
+rebuild сначала обновляет схему (src/db/upgrade.py): в БД, созданной до
+счётчиков, добавляются users.tasks_count, task_stats и триггеры, которые
+дальше их ведут.
+
+Запуск из backend/ (нужны переменные окружения из .env):
+    python -m src.db.stats rebuild [--user-id 42]
+    python -m src.db.stats check [--user-id 42]
+
+check завершается с кодом 1, если нашлись расхождения.
+"""
+import argparse
+import asyncio
+import sys
+
+from sqlalchemy import Date, cast, delete, func, insert, select, text, union_all, update
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from src.db.models import ArchivedTaskDB, TaskDB, TaskStatsDB, UserDB
+from src.db.upgrade import upgrade_schema
+
+
+def _all_tasks(user_id: int | None):
+    parts = [select(table.user_id, table.created_at) for table in (TaskDB, ArchivedTaskDB)]
+    if user_id is not None:
+        parts = [part.where(part.selected_columns.user_id == user_id) for part in parts]
+    return union_all(*parts).subquery()
+
+
+def _task_day(conn: AsyncConnection, created_at):
+    # Тот же день, что считают триггеры: created_at::date или date(created_at)
+    if conn.dialect.name == "postgresql":
+        return cast(created_at, Date)
+    return func.date(created_at)
+
+
+def _expected_stats(conn: AsyncConnection, user_id: int | None):
+    tasks = _all_tasks(user_id)
+    day = _task_day(conn, tasks.c.created_at)
+    return select(tasks.c.user_id, day.label("day"), func.count().label("count")).group_by(tasks.c.user_id, day)
+
+
+def _expected_count():
+    hot, archived = (
+        select(func.count()).where(table.user_id == UserDB.id).scalar_subquery()
+        for table in (TaskDB, ArchivedTaskDB)
+    )
+    return hot + archived
+
+
+async def rebuild(conn: AsyncConnection, user_id: int | None = None) -> None:
+    """Пересчитать счётчики всех пользователей или одного по таблице задач."""
+    await upgrade_schema(conn)
+    if conn.dialect.name == "postgresql":
+        # Иначе вставка, закоммиченная во время пересчёта, учлась бы дважды
+        await conn.execute(text("LOCK TABLE tasks, tasks_archive IN SHARE MODE"))
+    stats = delete(TaskStatsDB)
+    counts = update(UserDB).values(tasks_count=_expected_count())
+    if user_id is not None:
+        stats = stats.where(TaskStatsDB.user_id == user_id)
+        counts = counts.where(UserDB.id == user_id)
+    await conn.execute(stats)
+    await conn.execute(
+        insert(TaskStatsDB).from_select(["user_id", "day", "count"], _expected_stats(conn, user_id))
+    )
+    await conn.execute(counts)
+
+
+async def check(conn: AsyncConnection, user_id: int | None = None) -> list[dict]:
+    """Расхождения счётчиков с таблицей задач; day=None — общее число задач."""
+    expected = {
+        (row.user_id, str(row.day)): row.count
+        for row in await conn.execute(_expected_stats(conn, user_id))
+    }
+    query = select(TaskStatsDB.user_id, TaskStatsDB.day, TaskStatsDB.count)
+    counts = select(UserDB.id, UserDB.tasks_count, _expected_count())
+    if user_id is not None:
+        query = query.where(TaskStatsDB.user_id == user_id)
+        counts = counts.where(UserDB.id == user_id)
+    actual = {(row.user_id, str(row.day)): row.count for row in await conn.execute(query)}
+
+    mismatches = [
+        {"user_id": key[0], "day": key[1], "expected": expected.get(key, 0), "actual": actual.get(key, 0)}
+        for key in sorted(expected.keys() | actual.keys())
+        if expected.get(key, 0) != actual.get(key, 0)
+    ]
+    for uid, stored, counted in await conn.execute(counts):
+        if stored != counted:
+            mismatches.append({"user_id": uid, "day": None, "expected": counted, "actual": stored})
+    return mismatches
+
+
+async def _main(command: str, user_id: int | None) -> int:
+    from src.db.database import engine
+
+    try:
+        async with engine.begin() as conn:
+            if command == "rebuild":
+                await rebuild(conn, user_id)
+                print("Task stats rebuilt")
+                return 0
+            mismatches = await check(conn, user_id)
+    finally:
+        await engine.dispose()
+    for item in mismatches:
+        print(f"user {item['user_id']} day {item['day'] or 'total'}: "
+              f"expected {item['expected']}, stored {item['actual']}")
+    print(f"{len(mismatches)} mismatches")
+    return 1 if mismatches else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--user-id", type=int, default=None)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(_main(args.command, args.user_id)))
+
+
+if __name__ == "__main__":
+    main()
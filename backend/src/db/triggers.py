@@ -0,0 +1,227 @@
+"""Триггеры, поддерживающие счётчики и журнал изменений при любом изменении tasks.
+
+users.tasks_version растёт на единицу за каждую изменённую задачу
+пользователя, и каждая изменённая задача записывается в журнал task_changes
+с этим номером (seq). Номер выдаётся под блокировкой строки users, поэтому
+записи журнала одного пользователя коммитятся в порядке seq. Подробнее о
+журнале — src/db/changes.py.
+
+users.tasks_count и task_stats (число задач по дням создания) меняются при
+вставке и удалении. Всё это происходит в той же транзакции, что и запись
+задач, и не требует отдельного запроса из приложения: одиночные, пакетные и
+массовые записи учитываются одинаково. В Postgres триггеры уровня оператора
+(один UPDATE users на запрос), в SQLite — построчные.
+
+Перенос задачи в архив (src/db/archive.py) удалением не считается: задача
+уже лежит в tasks_archive, когда её строка удаляется из tasks.
+
+Перенос задачи к другому пользователю или на другой день — редкий случай,
+его учитывает построчный триггер, срабатывающий только при смене user_id
+или дня created_at. Пересчёт и проверка счётчиков — src/db/stats.py.
+
+При create_all триггеры ставит событие after_create таблицы tasks; в уже
+существующую БД их ставит install_ddl (src/db/upgrade.py).
+"""
+import re
+
+from sqlalchemy import DDL
+
+# Удалённые строки без перенесённых в архив: архивация не считается удалением
+_PG_DELETED_ROWS = "(SELECT * FROM old_rows WHERE NOT EXISTS (SELECT 1 FROM tasks_archive AS a WHERE a.id = old_rows.id))"
+_SQLITE_NOT_ARCHIVED = "WHEN NOT EXISTS (SELECT 1 FROM tasks_archive WHERE id = OLD.id)"
+
+_PG_FUNCTION = DDL(f"""
+CREATE OR REPLACE FUNCTION bump_tasks_version() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        UPDATE users SET tasks_version = tasks_version + changed.n, tasks_count = tasks_count - changed.n
+        FROM (SELECT user_id, count(*) AS n FROM {_PG_DELETED_ROWS} AS d GROUP BY user_id) AS changed
+        WHERE users.id = changed.user_id;
+        INSERT INTO task_changes (user_id, seq, task_id, deleted, changed_at)
+        SELECT r.user_id,
+            u.tasks_version - count(*) OVER (PARTITION BY r.user_id)
+                + row_number() OVER (PARTITION BY r.user_id ORDER BY r.id),
+            r.id, true, now() AT TIME ZONE 'UTC'
+        FROM {_PG_DELETED_ROWS} AS r JOIN users AS u ON u.id = r.user_id;
+        RETURN NULL;
+    END IF;
+    UPDATE users SET tasks_version = tasks_version + changed.n,
+        tasks_count = tasks_count + CASE WHEN TG_OP = 'INSERT' THEN changed.n ELSE 0 END
+    FROM (SELECT user_id, count(*) AS n FROM new_rows GROUP BY user_id) AS changed
+    WHERE users.id = changed.user_id;
+    INSERT INTO task_changes (user_id, seq, task_id, deleted, changed_at)
+    SELECT r.user_id,
+        u.tasks_version - count(*) OVER (PARTITION BY r.user_id)
+            + row_number() OVER (PARTITION BY r.user_id ORDER BY r.id),
+        r.id, false, now() AT TIME ZONE 'UTC'
+    FROM new_rows AS r JOIN users AS u ON u.id = r.user_id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+""")
+
+_PG_TRIGGERS = [
+    DDL("""
+    CREATE TRIGGER tasks_version_insert AFTER INSERT ON tasks
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_tasks_version()
+    """),
+    DDL("""
+    CREATE TRIGGER tasks_version_update AFTER UPDATE ON tasks
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_tasks_version()
+    """),
+    DDL("""
+    CREATE TRIGGER tasks_version_delete AFTER DELETE ON tasks
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_tasks_version()
+    """),
+]
+
+_SQLITE_TRIGGERS = [
+    DDL(f"""
+    CREATE TRIGGER tasks_version_{event.lower()} AFTER {event} ON tasks {when}
+    BEGIN
+        UPDATE users SET tasks_version = tasks_version + 1{count} WHERE id = {row}.user_id;
+        INSERT INTO task_changes (user_id, seq, task_id, deleted, changed_at)
+        SELECT {row}.user_id, tasks_version, {row}.id, {deleted}, CURRENT_TIMESTAMP FROM users WHERE id = {row}.user_id;
+    END
+    """)
+    for event, row, count, deleted, when in (
+        ("INSERT", "NEW", ", tasks_count = tasks_count + 1", 0, ""),
+        ("UPDATE", "NEW", "", 0, ""),
+        ("DELETE", "OLD", ", tasks_count = tasks_count - 1", 1, _SQLITE_NOT_ARCHIVED),
+    )
+]
+
+_PG_STATS_FUNCTIONS = [
+    DDL(f"""
+    CREATE OR REPLACE FUNCTION update_task_stats() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO task_stats (user_id, day, count)
+            SELECT user_id, created_at::date, count(*) FROM new_rows GROUP BY 1, 2
+            ON CONFLICT (user_id, day) DO UPDATE SET count = task_stats.count + EXCLUDED.count;
+        ELSE
+            UPDATE task_stats SET count = task_stats.count - changed.n
+            FROM (
+                SELECT user_id, created_at::date AS day, count(*) AS n FROM {_PG_DELETED_ROWS} AS d GROUP BY 1, 2
+            ) AS changed
+            WHERE task_stats.user_id = changed.user_id AND task_stats.day = changed.day;
+            DELETE FROM task_stats USING (SELECT DISTINCT user_id, created_at::date AS day FROM old_rows) AS changed
+            WHERE task_stats.user_id = changed.user_id AND task_stats.day = changed.day
+                AND task_stats.count <= 0;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """),
+    DDL("""
+    CREATE OR REPLACE FUNCTION move_task_stats() RETURNS trigger AS $$
+    BEGIN
+        UPDATE task_stats SET count = count - 1
+        WHERE user_id = OLD.user_id AND day = OLD.created_at::date;
+        DELETE FROM task_stats WHERE user_id = OLD.user_id AND day = OLD.created_at::date AND count <= 0;
+        INSERT INTO task_stats (user_id, day, count) VALUES (NEW.user_id, NEW.created_at::date, 1)
+        ON CONFLICT (user_id, day) DO UPDATE SET count = task_stats.count + 1;
+        IF OLD.user_id <> NEW.user_id THEN
+            UPDATE users SET tasks_count = tasks_count - 1 WHERE id = OLD.user_id;
+            UPDATE users SET tasks_count = tasks_count + 1 WHERE id = NEW.user_id;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """),
+]
+
+_PG_STATS_TRIGGERS = [
+    DDL("""
+    CREATE TRIGGER task_stats_insert AFTER INSERT ON tasks
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION update_task_stats()
+    """),
+    DDL("""
+    CREATE TRIGGER task_stats_delete AFTER DELETE ON tasks
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION update_task_stats()
+    """),
+    DDL("""
+    CREATE TRIGGER task_stats_move AFTER UPDATE OF user_id, created_at ON tasks
+    FOR EACH ROW
+    WHEN (OLD.user_id <> NEW.user_id OR OLD.created_at::date <> NEW.created_at::date)
+    EXECUTE FUNCTION move_task_stats()
+    """),
+]
+
+_SQLITE_STATS_INCREMENT = """
+        INSERT INTO task_stats (user_id, day, count) VALUES (NEW.user_id, date(NEW.created_at), 1)
+        ON CONFLICT (user_id, day) DO UPDATE SET count = count + 1;"""
+
+_SQLITE_STATS_DECREMENT = """
+        UPDATE task_stats SET count = count - 1 WHERE user_id = OLD.user_id AND day = date(OLD.created_at);
+        DELETE FROM task_stats WHERE user_id = OLD.user_id AND day = date(OLD.created_at) AND count <= 0;"""
+
+_SQLITE_STATS_TRIGGERS = [
+    DDL(f"""
+    CREATE TRIGGER task_stats_insert AFTER INSERT ON tasks
+    BEGIN{_SQLITE_STATS_INCREMENT}
+    END
+    """),
+    DDL(f"""
+    CREATE TRIGGER task_stats_delete AFTER DELETE ON tasks {_SQLITE_NOT_ARCHIVED}
+    BEGIN{_SQLITE_STATS_DECREMENT}
+    END
+    """),
+    DDL(f"""
+    CREATE TRIGGER task_stats_move AFTER UPDATE OF user_id, created_at ON tasks
+    WHEN OLD.user_id <> NEW.user_id OR date(OLD.created_at) <> date(NEW.created_at)
+    BEGIN{_SQLITE_STATS_DECREMENT}{_SQLITE_STATS_INCREMENT}
+        UPDATE users SET tasks_count = tasks_count - 1 WHERE id = OLD.user_id AND OLD.user_id <> NEW.user_id;
+        UPDATE users SET tasks_count = tasks_count + 1 WHERE id = NEW.user_id AND OLD.user_id <> NEW.user_id;
+    END
+    """),
+]
+
+
+def tasks_version_ddl():
+    """DDL для события after_create таблицы tasks."""
+    yield _PG_FUNCTION.execute_if(dialect="postgresql")
+    for ddl in _PG_TRIGGERS:
+        yield ddl.execute_if(dialect="postgresql")
+    for ddl in _SQLITE_TRIGGERS:
+        yield ddl.execute_if(dialect="sqlite")
+
+
+def task_stats_ddl():
+    """DDL для события after_create таблицы tasks; таблица task_stats — TaskStatsDB."""
+    for ddl in _PG_STATS_FUNCTIONS:
+        yield ddl.execute_if(dialect="postgresql")
+    for ddl in _PG_STATS_TRIGGERS:
+        yield ddl.execute_if(dialect="postgresql")
+    for ddl in _SQLITE_STATS_TRIGGERS:
+        yield ddl.execute_if(dialect="sqlite")
+
+
+_TRIGGER_NAME = re.compile(r"CREATE TRIGGER (\w+)")
+
+
+def install_ddl(dialect: str):
+    """Функции и все триггеры tasks для уже существующей таблицы.
+
+    Повторный запуск безопасен: функции заменяются (CREATE OR REPLACE),
+    каждый триггер перед созданием удаляется, так что старая версия
+    триггера заменяется текущей. Выполнять в одной транзакции, чтобы
+    записи в tasks не прошли мимо удалённого триггера.
+    """
+    if dialect == "postgresql":
+        ddls = [_PG_FUNCTION, *_PG_TRIGGERS, *_PG_STATS_FUNCTIONS, *_PG_STATS_TRIGGERS]
+    elif dialect == "sqlite":
+        ddls = [*_SQLITE_TRIGGERS, *_SQLITE_STATS_TRIGGERS]
+    else:
+        ddls = []
+    for ddl in ddls:
+        name = _TRIGGER_NAME.search(ddl.statement)
+        if name:
+            table = " ON tasks" if dialect == "postgresql" else ""
+            yield DDL(f"DROP TRIGGER IF EXISTS {name[1]}{table}")
+        yield ddl
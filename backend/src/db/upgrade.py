@@ -0,0 +1,100 @@
+"""Обновление схемы существующей БД до текущих моделей.
+
+init_db.py создаёт схему заново (drop_all + create_all), а триггеры и поиск
+ставятся событием after_create таблицы tasks — в БД, созданной раньше, их
+нет. upgrade_schema добавляет недостающее, ничего не удаляя:
+- колонки-счётчики users (tasks_version, tasks_count, changes_pruned_seq);
+- таблицы task_stats, task_changes, tasks_archive, import_checkpoints и
+  индексы существующих таблиц;
+- полнотекстовый поиск по tasks (src/db/search.py);
+- функции и триггеры tasks (src/db/triggers.py), пересоздавая их.
+
+Повторный запуск безопасен. Всё выполняется в одной транзакции. После
+обновления счётчики задач нужно пересчитать; rebuild (src/db/stats.py)
+сам начинает с upgrade_schema.
+
+Запуск из backend/ (нужны переменные окружения из .env):
+    python -m src.db.upgrade run
+    python -m src.db.stats rebuild
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from src.db.models import Base
+from src.db.search import search_install_ddl
+from src.db.triggers import install_ddl
+
+USER_COUNTERS = ("tasks_version", "tasks_count", "changes_pruned_seq")
+
+
+def _upgrade(sync_conn) -> list[str]:
+    inspector = inspect(sync_conn)
+    dialect = sync_conn.dialect.name
+    existing = set(inspector.get_table_names())
+    if "users" not in existing or "tasks" not in existing:
+        # Пустая БД: схему создаёт init_db.py вместе с триггерами и поиском
+        raise RuntimeError("Нет таблиц users и tasks, создайте схему через init_db.py")
+    steps = []
+
+    user_columns = {column["name"] for column in inspector.get_columns("users")}
+    for name in USER_COUNTERS:
+        if name not in user_columns:
+            sync_conn.exec_driver_sql(f"ALTER TABLE users ADD COLUMN {name} INTEGER NOT NULL DEFAULT 0")
+            steps.append(f"users.{name}")
+
+    missing = [table for table in Base.metadata.sorted_tables if table.name not in existing]
+    Base.metadata.create_all(sync_conn, tables=missing)
+    steps += [table.name for table in missing]
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing:
+            continue
+        indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in indexes:
+                index.create(sync_conn)
+                steps.append(index.name)
+
+    if dialect == "postgresql":
+        has_search = "search_vector" in {column["name"] for column in inspector.get_columns("tasks")}
+    else:
+        has_search = "tasks_fts" in existing
+    if not has_search:
+        for ddl in search_install_ddl(dialect):
+            sync_conn.execute(ddl)
+        steps.append("search")
+
+    for ddl in install_ddl(dialect):
+        sync_conn.execute(ddl)
+    steps.append("triggers")
+    return steps
+
+
+async def upgrade_schema(conn: AsyncConnection) -> list[str]:
+    """Добавить недостающие колонки, таблицы, поиск и триггеры; вернуть шаги."""
+    return await conn.run_sync(_upgrade)
+
+
+async def _main() -> None:
+    from src.db.database import engine
+
+    try:
+        async with engine.begin() as conn:
+            steps = await upgrade_schema(conn)
+    finally:
+        await engine.dispose()
+    print(f"Schema upgraded: {', '.join(steps)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["run"])
+    parser.parse_args()
+    asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    main()
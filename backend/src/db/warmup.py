@@ -0,0 +1,96 @@
+"""Прогрев пула соединений и кэшей запросов при старте.
+
+Первые запросы после деплоя иначе платят за установку соединений с БД,
+интроспекцию типов asyncpg и компиляцию выражений SQLAlchemy. Прогрев
+заранее открывает DB_WARMUP_CONNECTIONS соединений и на каждом выполняет
+горячие запросы crud с заведомо пустым результатом. Так компилированные
+выражения попадают в кэш движка, а подготовленные выражения — в кэш
+каждого соединения asyncpg. Соединения возвращаются в пул открытыми.
+
+Пока прогрев не закончился, readiness.ready ложно и /health/ready
+отвечает 503.
+"""
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from src.core.config import settings
+from src.db.crud import (
+    _get_tasks_by_user_id,
+    _get_tasks_version,
+    _get_user_by_id,
+    _get_user_by_username,
+)
+from src.db.database import engine, replicas
+from src.db.replicas import CONNECTION_ERRORS
+
+logger = logging.getLogger(__name__)
+
+# Горячие запросы crud; id 0 и пустое имя не совпадают ни с одной строкой
+HOT_QUERIES = (
+    lambda session: _get_user_by_id(session, 0),
+    lambda session: _get_user_by_username(session, ""),
+    lambda session: _get_tasks_version(session, 0),
+    lambda session: _get_tasks_by_user_id(session, 0, limit=settings.TASKS_PAGE_SIZE + 1),
+    lambda session: _get_tasks_by_user_id(
+        session, 0, limit=settings.TASKS_PAGE_SIZE + 1, after=(datetime.min, 0)
+    ),
+)
+
+
+class Readiness:
+    def __init__(self):
+        self.ready = False
+        self.warmup_seconds: float | None = None
+
+
+readiness = Readiness()
+
+
+async def _warm_connection(conn: AsyncConnection) -> None:
+    async with AsyncSession(bind=conn) as session:
+        for query in HOT_QUERIES:
+            await query(session)
+
+
+async def warm_pool(engine, connections: int) -> int:
+    """Открыть соединения одновременно и прогнать на каждом горячие запросы.
+
+    Соединений не больше DB_POOL_SIZE: лишние пул закрыл бы при возврате.
+    """
+    connections = min(connections, settings.DB_POOL_SIZE)
+    async with AsyncExitStack() as stack:
+        conns = await asyncio.gather(
+            *(stack.enter_async_context(engine.connect()) for _ in range(connections))
+        )
+        await asyncio.gather(*(_warm_connection(conn) for conn in conns))
+    return connections
+
+
+async def warm_up() -> None:
+    """Прогреть основную БД и реплики; упавшая реплика не мешает готовности."""
+    started = time.perf_counter()
+    await warm_pool(engine, settings.DB_WARMUP_CONNECTIONS)
+    for replica in replicas.replicas:
+        try:
+            await warm_pool(replica.engine, settings.DB_WARMUP_CONNECTIONS)
+        except CONNECTION_ERRORS as exc:
+            replicas.mark_down(replica, exc)
+    readiness.warmup_seconds = time.perf_counter() - started
+    readiness.ready = True
+    logger.info("Warm-up finished in %.2f s", readiness.warmup_seconds)
+
+
+async def warm_up_until_ready() -> None:
+    """Повторять прогрев, пока основная БД недоступна."""
+    while True:
+        try:
+            await warm_up()
+            return
+        except CONNECTION_ERRORS as exc:
+            logger.warning("Warm-up failed, retrying in %.0f s: %s", settings.WARMUP_RETRY_SECONDS, exc)
+            await asyncio.sleep(settings.WARMUP_RETRY_SECONDS)
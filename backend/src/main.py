@@ -1,11 +1,77 @@
-import uvicorn
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from src.api.middleware import CompressionMiddleware, MetricsMiddleware, ProfilingMiddleware
+from src.api.pagination import NEXT_CURSOR_HEADER
+from src.api.endpoints.events import router as events_router
+from src.api.endpoints.health import router as health_router
+from src.api.endpoints.internal import router as internal_router
+from src.api.endpoints.metrics import router as metrics_router
 from src.api.endpoints.tasks import router as task_router
 from src.api.endpoints.users import router as user_router
+from src.core.config import settings
+from src.core.events import broker
+from src.core.executor import ExecutorSaturated
+from src.core.profiling import profile_store
+from src.core.ratelimit import auth_limiter
+from src.core.security import hash_executor
+from src.db.archive import run_archiver
+from src.db.database import engine, replicas
+from src.db.warmup import readiness, warm_up_until_ready
 
-app = FastAPI(title="Task API")
+logger = logging.getLogger(__name__)
+
+
+async def _check_replicas():
+    # Вернуть в работу реплики, отключённые после ошибок соединения
+    while True:
+        await asyncio.sleep(settings.DB_REPLICA_RETRY_SECONDS)
+        try:
+            await replicas.check()
+        except Exception:
+            logger.exception("Replica health check failed")
+
+
+def _log_warm_up_failure(task: asyncio.Task) -> None:
+    # После WARMUP_TIMEOUT результат прогрева никто не ждёт: без этого ошибка
+    # потерялась бы, а readiness так и не стал бы true
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Warm-up failed, the service stays not ready", exc_info=task.exception())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    replica_checker = asyncio.create_task(_check_replicas()) if replicas else None
+    # Воркеры архивируют параллельно: пачки не пересекаются благодаря SKIP LOCKED
+    archiver = asyncio.create_task(run_archiver(engine)) if settings.ARCHIVE_AFTER_DAYS > 0 else None
+    warmer = asyncio.create_task(warm_up_until_ready())
+    warmer.add_done_callback(_log_warm_up_failure)
+    try:
+        # Обычно трафик начинается с прогретым пулом; если БД не отвечает,
+        # сервер всё равно стартует, а прогрев продолжается в фоне
+        await asyncio.wait_for(asyncio.shield(warmer), settings.WARMUP_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning("Warm-up is not finished after %.0f s, continuing in background", settings.WARMUP_TIMEOUT)
+    yield
+    # Сюда сервер приходит после того, как дождался запросов в работе
+    readiness.ready = False
+    tasks = [task for task in (warmer, replica_checker, archiver) if task is not None]
+    for task in tasks:
+        task.cancel()
+    # Пул закрывается только после того, как фоновые задачи вышли из запросов к БД
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await broker.close()
+    await auth_limiter.storage.close()
+    hash_executor.shutdown()
+    await replicas.dispose()
+    await engine.dispose()
+
+
+app = FastAPI(title="Task API", lifespan=lifespan)
 
 
 app.add_middleware(
@@ -15,8 +81,28 @@ app.add_middleware(
     allow_methods=["*"]
     ,
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Retry-After", "Server-Timing", "X-Profile-Id"],
 )
+app.add_middleware(CompressionMiddleware, minimum_size=settings.GZIP_MIN_SIZE, level=settings.GZIP_LEVEL)
+# Снаружи сжатия: в профиль попадает и gzip ответа
+app.add_middleware(ProfilingMiddleware, sample_rate=settings.PROFILE_SAMPLE_RATE, store=profile_store)
+app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(ExecutorSaturated)
+async def executor_saturated_handler(request: Request, exc: ExecutorSaturated):
+    # Очередь на хэширование паролей переполнена: отказываем сразу, не занимая воркер
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Сервер перегружен, повторите позже"},
+        headers={"Retry-After": "1"},
+    )
+
 
 app.include_router(task_router)
+app.include_router(events_router)
+app.include_router(health_router)
+app.include_router(internal_router)
+app.include_router(metrics_router)
 app.include_router(user_router)
 
@@ -0,0 +1,63 @@
+"""Запуск API в продакшене.
+
+    python -m src.server
+
+Параметры — SERVER_* в src/core/config.py. Цикл событий uvloop и парсер
+HTTP httptools берутся, если установлены (см. requirements.txt), иначе
+стандартные asyncio и h11.
+"""
+import importlib.util
+import logging
+import os
+
+import uvicorn
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def cpu_count() -> int:
+    """CPU, доступные процессу: в контейнере с cpuset их меньше, чем os.cpu_count()."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def server_options() -> dict:
+    workers = settings.SERVER_WORKERS or cpu_count()
+    if workers > 1:
+        # Эти хранилища свои в каждом воркере
+        if settings.EVENTS_BROKER == "memory":
+            logger.warning("EVENTS_BROKER=memory with %d workers: events reach only the same worker", workers)
+        if settings.RATE_LIMIT_ENABLED and settings.RATE_LIMIT_STORAGE == "memory":
+            logger.warning("RATE_LIMIT_STORAGE=memory with %d workers: limits apply per worker", workers)
+    return {
+        "host": settings.SERVER_HOST,
+        "port": settings.SERVER_PORT,
+        "workers": workers,
+        "loop": "uvloop" if _installed("uvloop") else "asyncio",
+        "http": "httptools" if _installed("httptools") else "h11",
+        "backlog": settings.SERVER_BACKLOG,
+        "timeout_keep_alive": settings.SERVER_KEEPALIVE_SECONDS,
+        "timeout_graceful_shutdown": settings.SERVER_GRACEFUL_TIMEOUT,
+        "limit_concurrency": settings.SERVER_LIMIT_CONCURRENCY,
+        "proxy_headers": True,
+        "forwarded_allow_ips": settings.SERVER_FORWARDED_ALLOW_IPS,
+        # Журнал доступа синхронно пишет строку на каждый запрос
+        "access_log": settings.DEBUG,
+        "lifespan": "on",
+    }
+
+
+def main():
+    uvicorn.run("src.main:app", **server_options())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,19 @@
 import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
 from datetime import datetime
-from src.db.models import UserDB
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from src.db.models import Base, UserDB
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def reset_rate_limits():
+    """Вёдра ограничителя входа не переходят из теста в тест"""
+    from src.core.ratelimit import auth_limiter
+
+    await auth_limiter.storage.clear()
+    yield
+    await auth_limiter.storage.clear()
 
 
 @pytest_asyncio.fixture
@@ -35,3 +47,43 @@ def authenticated_client(client, mock_user):
     app.dependency_overrides[get_current_user] = lambda: mock_user
 
     return client
+
+
+@pytest_asyncio.fixture
+def mock_tasks_version(mocker):
+    """Версия списка задач без обращения к БД"""
+    from src.core.cache import tasks_version_cache
+
+    tasks_version_cache.clear()
+    yield mocker.patch("src.db.crud._get_tasks_version", return_value=1)
+    tasks_version_cache.clear()
+
+
+@pytest_asyncio.fixture
+async def db_session():
+    """Сессия к SQLite в памяти со свежей схемой"""
+    from src.core.cache import tasks_version_cache
+
+    tasks_version_cache.clear()
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        yield session
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def db_client(authenticated_client, db_session, mock_user):
+    """Авторизованный клиент, запросы которого идут в SQLite-сессию db_session"""
+    from src.main import app
+    from src.db.database import get_session
+
+    async def override_session():
+        yield db_session
+
+    app.dependency_overrides[get_session] = override_session
+    db_session.add(mock_user)
+    await db_session.commit()
+    return authenticated_client
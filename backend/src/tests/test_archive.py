@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from src.core.cache import tasks_version_cache
+from src.db.archive import archive, main, run_archiver
+from src.db.crud import add_tasks
+from src.db.models import ArchivedTaskDB, TaskChangeDB, TaskDB, TaskStatsDB, UserDB
+from src.db.stats import check
+
+OLD = datetime(2020, 1, 1)
+
+
+async def _add_old_and_new(db_session, user_id):
+    """Три старые задачи и две новые; вернуть созданные строки"""
+    now = datetime.utcnow()
+    rows = await add_tasks(
+        user_id,
+        [
+            {"title": f"T{n}", "description": None, "created_at": OLD + timedelta(days=n) if n < 3 else now}
+            for n in range(5)
+        ],
+        session=db_session,
+    )
+    await db_session.commit()
+    return rows
+
+
+@pytest.mark.asyncio
+async def test_archive_moves_old_tasks(db_session, mock_user):
+    """Тест архивации: старые задачи в архиве пачками, счётчики и журнал не меняются, версия растёт"""
+    db_session.add(mock_user)
+    await db_session.flush()
+    rows = await _add_old_and_new(db_session, mock_user.id)
+    version = await db_session.scalar(select(UserDB.tasks_version))
+    changes = await db_session.scalar(select(func.count()).select_from(TaskChangeDB))
+    stats = (await db_session.execute(select(TaskStatsDB.day, TaskStatsDB.count))).all()
+
+    moved = await archive(db_session.bind, datetime.utcnow() - timedelta(days=30), batch_size=2)
+    assert moved == 3
+    assert await archive(db_session.bind, datetime.utcnow() - timedelta(days=30), batch_size=2) == 0
+
+    db_session.expire_all()
+    assert list(await db_session.scalars(select(TaskDB.id).order_by(TaskDB.id))) == [r["id"] for r in rows[3:]]
+    assert list(await db_session.scalars(select(ArchivedTaskDB.id).order_by(ArchivedTaskDB.id))) == [
+        r["id"] for r in rows[:3]
+    ]
+    assert await db_session.scalar(select(UserDB.tasks_count)) == 5
+    assert (await db_session.execute(select(TaskStatsDB.day, TaskStatsDB.count))).all() == stats
+    assert await db_session.scalar(select(func.count()).select_from(TaskChangeDB)) == changes
+    # Одна пачка — одно повышение версии
+    assert await db_session.scalar(select(UserDB.tasks_version)) == version + 2
+    assert await check(await db_session.connection()) == []
+
+
+@pytest.mark.asyncio
+async def test_list_with_archive(db_client, db_session, mock_user):
+    """Тест списка: по умолчанию только горячие задачи, с include_archived — обе таблицы по страницам"""
+    rows = await _add_old_and_new(db_session, mock_user.id)
+    url = f"/tasks/user/{mock_user.id}"
+    before = await db_client.get(url)
+
+    await archive(db_session.bind, datetime.utcnow() - timedelta(days=30), batch_size=100)
+    tasks_version_cache.clear()
+
+    response = await db_client.get(url, headers={"If-None-Match": before.headers["ETag"]})
+    assert response.status_code == 200
+    assert [task["id"] for task in response.json()] == [r["id"] for r in rows[3:]]
+
+    ids, cursor = [], None
+    while True:
+        params = {"include_archived": True, "limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = await db_client.get(url, params=params)
+        ids += [task["id"] for task in page.json()]
+        cursor = page.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert ids == [r["id"] for r in rows]
+
+    streamed = await db_client.get(url, params={"include_archived": True, "stream": True})
+    assert len(streamed.text.splitlines()) == 5
+
+
+@pytest.mark.asyncio
+async def test_changes_after_archive(db_client, db_session, mock_user):
+    """Тест синхронизации: архивация не выглядит удалением, next_since догоняет версию"""
+    url = f"/tasks/user/{mock_user.id}"
+    old = (await db_client.post(url, json={"title": "Old", "description": None})).json()
+    data = (await db_client.get(f"{url}/changes")).json()
+
+    await db_client.put(f"{url}/task/{old['id']}", json={"title": "Edited", "description": None})
+    await archive(db_session.bind, datetime.utcnow() + timedelta(days=1), batch_size=100)
+    tasks_version_cache.clear()
+
+    data = (await db_client.get(f"{url}/changes", params={"since": data["next_since"]})).json()
+    assert [(change["id"], change["deleted"]) for change in data["changes"]] == [(old["id"], False)]
+    assert data["changes"][0]["task"]["title"] == "Edited"
+    assert data["next_since"] == await db_session.scalar(select(UserDB.tasks_version))
+    again = (await db_client.get(f"{url}/changes", params={"since": data["next_since"]})).json()
+    assert again["changes"] == [] and again["reset"] is False
+
+
+@pytest.mark.asyncio
+async def test_archive_days_must_be_positive(mocker):
+    """Тест: без положительного срока ни CLI, ни фоновая архивация ничего не переносят"""
+    archive_mock = mocker.patch("src.db.archive.archive")
+    mocker.patch("src.db.archive.settings.ARCHIVE_AFTER_DAYS", 0)
+
+    await run_archiver(engine=None)
+    for argv in (["archive", "run"], ["archive", "run", "--days", "0"]):
+        mocker.patch("sys.argv", argv)
+        with pytest.raises(SystemExit):
+            main()
+    archive_mock.assert_not_called()
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import status
+from sqlalchemy import select, update
+
+from src.core.cache import tasks_version_cache
+from src.db.changes import compact
+from src.db.crud import add_tasks, delete_tasks, update_tasks
+from src.db.models import TaskChangeDB, UserDB
+
+
+@pytest.mark.asyncio
+async def test_changes_logged_with_sequence(db_session, mock_user):
+    """Тест журнала: каждая изменённая задача получает свой seq, последний равен tasks_version"""
+    db_session.add(mock_user)
+    await db_session.flush()
+    rows = await add_tasks(mock_user.id, [{"title": f"T{n}", "description": None} for n in range(3)], session=db_session)
+    await update_tasks(
+        mock_user.id, [{"id": rows[0]["id"], "title": "Edited", "description": None}], session=db_session
+    )
+    await delete_tasks(mock_user.id, [rows[1]["id"]], session=db_session)
+
+    changes = (await db_session.execute(
+        select(TaskChangeDB.seq, TaskChangeDB.task_id, TaskChangeDB.deleted).order_by(TaskChangeDB.seq)
+    )).all()
+    ids = [row["id"] for row in rows]
+    assert [tuple(change) for change in changes] == [
+        (1, ids[0], False), (2, ids[1], False), (3, ids[2], False), (4, ids[0], False), (5, ids[1], True),
+    ]
+    assert await db_session.scalar(select(UserDB.tasks_version)) == 5
+
+
+@pytest.mark.asyncio
+async def test_changes_endpoint(db_client, mock_user):
+    """Тест дельта-синхронизации: только изменения после since, удаления — tombstone, страницы"""
+    url = f"/tasks/user/{mock_user.id}"
+    created = [(await db_client.post(url, json={"title": f"T{n}", "description": None})).json() for n in range(3)]
+
+    data = (await db_client.get(f"{url}/changes")).json()
+    assert [change["id"] for change in data["changes"]] == [task["id"] for task in created]
+    assert data["has_more"] is False
+    since = data["next_since"]
+
+    await db_client.put(f"{url}/task/{created[0]['id']}", json={"title": "Edited", "description": "d"})
+    await db_client.delete(f"{url}/task/{created[1]['id']}")
+    data = (await db_client.get(f"{url}/changes", params={"since": since})).json()
+    assert [(change["id"], change["deleted"]) for change in data["changes"]] == [
+        (created[0]["id"], False),
+        (created[1]["id"], True),
+    ]
+    assert data["changes"][0]["task"]["title"] == "Edited"
+    assert data["changes"][1]["task"] is None
+
+    # Пустая дельта и страницы по limit
+    assert (await db_client.get(f"{url}/changes", params={"since": data["next_since"]})).json()["changes"] == []
+    page = (await db_client.get(f"{url}/changes", params={"since": since, "limit": 1})).json()
+    assert page["has_more"] is True and len(page["changes"]) == 1
+    rest = (await db_client.get(f"{url}/changes", params={"since": page["next_since"]})).json()
+    assert [change["id"] for change in rest["changes"]] == [created[1]["id"]]
+
+    assert (await db_client.get(f"/tasks/user/{mock_user.id + 1}/changes")).status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.asyncio
+async def test_compaction_and_reset(db_client, db_session, mock_user):
+    """Тест сжатия: старые перезаписанные записи и удаления уходят, отставший клиент получает reset"""
+    url = f"/tasks/user/{mock_user.id}"
+    kept = (await db_client.post(url, json={"title": "Kept", "description": None})).json()
+    removed = (await db_client.post(url, json={"title": "Removed", "description": None})).json()
+    await db_client.put(f"{url}/task/{kept['id']}", json={"title": "Kept 2", "description": None})
+    await db_client.delete(f"{url}/task/{removed['id']}")
+    await db_session.execute(update(TaskChangeDB).values(changed_at=datetime.utcnow() - timedelta(days=60)))
+    await db_session.commit()
+
+    result = await compact(db_session.bind, datetime.utcnow() - timedelta(days=30), batch_size=1)
+    assert result == {"superseded": 2, "tombstones": 1}
+    remaining = (await db_session.execute(select(TaskChangeDB.seq, TaskChangeDB.task_id))).all()
+    assert [tuple(row) for row in remaining] == [(3, kept["id"])]
+    assert await db_session.scalar(select(UserDB.changes_pruned_seq)) == 4
+
+    tasks_version_cache.clear()
+    data = (await db_client.get(f"{url}/changes", params={"since": 1})).json()
+    assert data == {"changes": [], "next_since": 4, "has_more": False, "reset": True}
+    assert (await db_client.get(f"{url}/changes", params={"since": 4})).json()["reset"] is False
+    # since из будущего — тоже reset
+    assert (await db_client.get(f"{url}/changes", params={"since": 99})).json()["reset"] is True
+
+
+@pytest.mark.asyncio
+async def test_stale_version_is_not_reset(db_client, mock_user):
+    """Тест устаревшей версии в кэше: since больше неё — не reset, изменения отдаются"""
+    url = f"/tasks/user/{mock_user.id}"
+    created = [(await db_client.post(url, json={"title": f"T{n}", "description": None})).json() for n in range(3)]
+    tasks_version_cache.set(mock_user.id, 1)
+
+    data = (await db_client.get(f"{url}/changes", params={"since": 2})).json()
+    assert data["reset"] is False
+    assert [change["id"] for change in data["changes"]] == [created[2]["id"]]
+    assert data["next_since"] == 3
+
+    tasks_version_cache.set(mock_user.id, 1)
+    data = (await db_client.get(f"{url}/changes", params={"since": 3})).json()
+    assert data == {"changes": [], "next_since": 3, "has_more": False, "reset": False}
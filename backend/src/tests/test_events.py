@@ -0,0 +1,129 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from src.core.cache import token_cache, user_cache
+from src.core.events import RESYNC_EVENT, InMemoryBroker, PostgresBroker, Subscription, broker
+from src.core.security import create_access_token
+from src.db.models import UserDB
+
+
+# ============ Тесты брокера ============
+
+@pytest.mark.asyncio
+async def test_event_delivered_after_commit(db_session):
+    """Тест: событие уходит подписчикам только после коммита"""
+
+    memory_broker = InMemoryBroker(queue_size=10)
+    async with memory_broker.subscribe(1) as subscription:
+        await memory_broker.publish(db_session, 1, {"type": "deleted", "ids": [1]})
+        db_session.add(UserDB(id=1, username="testuser", password_hash="x"))
+        assert subscription.queue.empty()
+
+        await db_session.commit()
+        assert await subscription.get(timeout=1) == {"type": "deleted", "ids": [1]}
+
+
+@pytest.mark.asyncio
+async def test_event_dropped_on_rollback(db_session):
+    """Тест: при откате транзакции событие не публикуется"""
+
+    memory_broker = InMemoryBroker(queue_size=10)
+    async with memory_broker.subscribe(1) as subscription:
+        db_session.add(UserDB(id=1, username="testuser", password_hash="x"))
+        await db_session.flush()
+        await memory_broker.publish(db_session, 1, {"type": "deleted", "ids": [1]})
+        await db_session.rollback()
+        await db_session.commit()
+
+        assert subscription.queue.empty()
+
+
+def test_slow_subscriber_gets_resync():
+    """Тест: переполненная очередь медленного клиента заменяется на resync"""
+
+    subscription = Subscription(maxsize=2)
+    for task_id in range(3):
+        subscription.push({"type": "deleted", "ids": [task_id]})
+
+    assert subscription.queue.qsize() == 1
+    assert subscription.queue.get_nowait() == RESYNC_EVENT
+    assert subscription.dropped == 2
+
+
+def test_postgres_payload_split():
+    """Тест: большое событие делится на части под лимит NOTIFY"""
+
+    pg_broker = PostgresBroker("postgresql://localhost/test", queue_size=10)
+    event = {"type": "created", "tasks": [{"id": i, "title": "x" * 30} for i in range(500)]}
+
+    payloads = list(pg_broker._payloads(1, event))
+
+    assert len(payloads) > 1
+    assert all(len(p.encode("utf-8")) <= PostgresBroker.MAX_PAYLOAD for p in payloads)
+    ids = [task["id"] for p in payloads for task in json.loads(p)["event"]["tasks"]]
+    assert ids == list(range(500))
+
+
+# ============ Тесты WebSocket ============
+
+@pytest.fixture
+def ws_client(mocker):
+    from src.main import app
+
+    user = UserDB(id=1, username="testuser", email="test@example.com", password_hash="x")
+    mocker.patch("src.db.crud._get_user_by_id", return_value=user)
+    # TestClient запускает lifespan; прогрев пула здесь не нужен
+    mocker.patch("src.main.warm_up_until_ready")
+    token_cache.clear()
+    user_cache.clear()
+    with TestClient(app) as client:
+        yield client
+    token_cache.clear()
+    user_cache.clear()
+
+
+def test_websocket_receives_events(ws_client):
+    """Тест доставки события подписчику по WebSocket"""
+
+    token = create_access_token(1)
+    with ws_client.websocket_connect(f"/tasks/user/1/ws?token={token}") as websocket:
+        ws_client.portal.call(broker.deliver, 1, {"type": "deleted", "ids": [7]})
+        assert websocket.receive_json() == {"type": "deleted", "ids": [7]}
+
+
+@pytest.mark.asyncio
+async def test_websocket_unsubscribes_on_disconnect(mocker):
+    """Тест: разрыв виден сразу, а не при следующем heartbeat; кадры клиента читаются"""
+    import asyncio
+
+    from src.api.endpoints.events import task_events_ws
+
+    mocker.patch("src.api.endpoints.events._authorize")
+    mocker.patch("src.api.endpoints.events.settings.EVENTS_HEARTBEAT_SECONDS", 60)
+    frames = asyncio.Queue()
+    websocket = mocker.AsyncMock()
+    websocket.receive.side_effect = frames.get
+
+    handler = asyncio.create_task(task_events_ws(websocket, 1, token="t"))
+    await frames.put({"type": "websocket.receive", "text": "hello"})
+    await asyncio.sleep(0.01)
+    assert broker.subscriber_count() == 1
+
+    await frames.put({"type": "websocket.disconnect", "code": 1000})
+    await asyncio.wait_for(handler, 1)
+    assert broker.subscriber_count() == 0
+    assert websocket.receive.await_count == 2
+    websocket.send_json.assert_not_called()
+
+
+def test_websocket_rejects_other_user(ws_client):
+    """Тест: подписка на чужие задачи отклоняется"""
+
+    token = create_access_token(1)
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with ws_client.websocket_connect(f"/tasks/user/2/ws?token={token}"):
+            pass
+    assert exc.value.code == 1008
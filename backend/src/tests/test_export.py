@@ -0,0 +1,72 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+
+import pytest
+from fastapi import status
+
+from src.db.crud import add_tasks
+from src.db.export import encode_rows, export_all
+from src.db.models import UserDB
+
+
+async def _rows(rows):
+    for row in rows:
+        yield row
+
+
+@pytest.mark.asyncio
+async def test_encode_rows_chunks():
+    """Тест кодирования: куски не меньше chunk_bytes, вместе — весь CSV с заголовком"""
+    rows = [
+        {"id": n, "title": f'T{n}, "quoted"', "description": None, "created_at": datetime(2026, 1, 1, n)}
+        for n in range(10)
+    ]
+    chunks = [chunk async for chunk in encode_rows(_rows(rows), "csv", chunk_bytes=100)]
+    assert len(chunks) > 1 and all(len(chunk) >= 100 for chunk in chunks[:-1])
+    parsed = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+    assert [(row["id"], row["title"], row["description"]) for row in parsed] == [
+        (str(n), f'T{n}, "quoted"', "") for n in range(10)
+    ]
+    assert parsed[3]["created_at"] == "2026-01-01T03:00:00"
+
+
+@pytest.mark.asyncio
+async def test_export_endpoint(db_client, db_session, mock_user):
+    """Тест выгрузки: NDJSON, CSV и gzip отдают одни и те же задачи"""
+    await add_tasks(
+        mock_user.id, [{"title": f"T{n}", "description": "d"} for n in range(3)], session=db_session
+    )
+    await db_session.commit()
+    url = f"/tasks/user/{mock_user.id}/export"
+
+    response = await db_client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"] == f'attachment; filename="user_{mock_user.id}.ndjson"'
+    tasks = [json.loads(line) for line in response.text.splitlines()]
+    assert [task["title"] for task in tasks] == ["T0", "T1", "T2"]
+
+    compressed = await db_client.get(url, params={"format": "csv", "gzip": True})
+    assert compressed.headers["content-type"] == "application/gzip"
+    parsed = list(csv.DictReader(io.StringIO(gzip.decompress(compressed.content).decode())))
+    assert [int(row["id"]) for row in parsed] == [task["id"] for task in tasks]
+
+    assert (await db_client.get(f"/tasks/user/{mock_user.id + 1}/export")).status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.asyncio
+async def test_export_all(db_session, mock_user, tmp_path):
+    """Тест выгрузки всех пользователей: по файлу на пользователя, в том числе без задач"""
+    other = UserDB(id=2, username="other", email="other@example.com", password_hash="x")
+    db_session.add_all([mock_user, other])
+    await db_session.flush()
+    await add_tasks(mock_user.id, [{"title": "T", "description": None}] * 2, session=db_session)
+    await db_session.commit()
+
+    assert await export_all(db_session.bind, tmp_path, "ndjson", compress=True, workers=2) == 2
+    first = gzip.decompress((tmp_path / "user_1.ndjson.gz").read_bytes()).splitlines()
+    assert len(first) == 2
+    assert gzip.decompress((tmp_path / "user_2.ndjson.gz").read_bytes()) == b""
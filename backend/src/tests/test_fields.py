@@ -0,0 +1,105 @@
+import gzip
+import json
+
+import pytest
+from fastapi import status
+
+from src.api.fields import parse_fields, task_model, tasks_adapter
+from src.api.middleware import accepts_gzip
+from src.db.crud import _tasks_list_query, add_tasks
+
+
+def test_parse_fields():
+    """Тест разбора fields: порядок TASK_FIELDS, все поля как None, неизвестные поля"""
+    assert parse_fields(None) is None
+    assert parse_fields(" title , id,title") == ("id", "title")
+    assert parse_fields("created_at,description,title,id") is None
+    for value in ("", "id,password_hash"):
+        with pytest.raises(ValueError):
+            parse_fields(value)
+
+
+def test_projection_pushed_into_select():
+    """Тест: в SELECT только запрошенные колонки и ключ порядка, в том числе с архивом"""
+    query = _tasks_list_query(1, limit=10, fields=("title",))
+    assert [column.name for column in query.selected_columns] == ["id", "title", "created_at"]
+    query = _tasks_list_query(1, limit=10, include_archived=True, fields=("id",))
+    assert [column.name for column in query.selected_columns] == ["id", "created_at"]
+
+
+def test_task_model_cached():
+    """Тест: модель ответа строится один раз на сочетание полей и проверяет как ReadTask"""
+    assert task_model(("id", "title")) is task_model(("id", "title"))
+    assert tasks_adapter(("id", "title")) is tasks_adapter(("id", "title"))
+    assert list(task_model(("id", "title")).model_fields) == ["id", "title"]
+    with pytest.raises(ValueError):
+        tasks_adapter(("title",)).validate_python([{"title": "x" * 31}])
+
+
+@pytest.mark.asyncio
+async def test_list_search_and_stream_with_fields(db_client, db_session, mock_user):
+    """Тест fields в списке, курсоре, потоке и поиске"""
+    await add_tasks(
+        mock_user.id, [{"title": f"Отчёт {n}", "description": "long text"} for n in range(3)], session=db_session
+    )
+    await db_session.commit()
+    url = f"/tasks/user/{mock_user.id}"
+
+    page = await db_client.get(url, params={"fields": "title", "limit": 2})
+    assert page.json() == [{"title": "Отчёт 0"}, {"title": "Отчёт 1"}]
+    # Курсор строится по ключу порядка, даже если его полей нет в ответе
+    rest = await db_client.get(url, params={"fields": "title", "cursor": page.headers["X-Next-Cursor"]})
+    assert rest.json() == [{"title": "Отчёт 2"}]
+
+    streamed = await db_client.get(url, params={"fields": "id,title", "stream": True})
+    assert [sorted(json.loads(line)) for line in streamed.text.splitlines()] == [["id", "title"]] * 3
+
+    found = await db_client.get(f"{url}/search", params={"q": "отчёт", "fields": "id", "limit": 2})
+    assert [sorted(task) for task in found.json()] == [["id"], ["id"]]
+    assert "X-Next-Cursor" in found.headers
+    full = (await db_client.get(f"{url}/search", params={"q": "отчёт"})).json()
+    assert sorted(full[0]) == ["created_at", "description", "id", "title"]
+
+    response = await db_client.get(url, params={"fields": "id,secret"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Неизвестные поля: secret"
+
+
+def test_accepts_gzip():
+    """Тест разбора Accept-Encoding: q-значения, * и похожие имена кодировок"""
+    for value in ("gzip", "br, GZIP;q=0.5", "deflate, *", "gzip ; q=1.0"):
+        assert accepts_gzip(value)
+    for value in ("", "identity", "gzip;q=0", "gzip;q=0.000, br", "x-gzip-foo", "*;q=0", "*, gzip;q=0"):
+        assert not accepts_gzip(value)
+
+
+@pytest.mark.asyncio
+async def test_response_compression(db_client, db_session, mock_user):
+    """Тест сжатия: большие ответы и потоки в gzip, маленькие и уже сжатые выгрузки — как есть"""
+    await add_tasks(
+        mock_user.id, [{"title": f"Task {n}", "description": "d" * 40} for n in range(50)], session=db_session
+    )
+    await db_session.commit()
+    url = f"/tasks/user/{mock_user.id}"
+    accept = {"Accept-Encoding": "gzip"}
+
+    response = await db_client.get(url, headers=accept)
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert len(response.json()) == 50
+
+    streamed = await db_client.get(url, params={"stream": True}, headers=accept)
+    assert streamed.headers["content-encoding"] == "gzip"
+    assert len(streamed.text.splitlines()) == 50
+
+    small = await db_client.get(url, params={"limit": 1}, headers=accept)
+    assert "content-encoding" not in small.headers
+    plain = await db_client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    refused = await db_client.get(url, headers={"Accept-Encoding": "gzip;q=0, identity"})
+    assert "content-encoding" not in refused.headers
+
+    exported = await db_client.get(f"{url}/export", params={"gzip": True}, headers=accept)
+    assert "content-encoding" not in exported.headers
+    assert len(gzip.decompress(exported.content).splitlines()) == 50
@@ -0,0 +1,118 @@
+import gzip
+from datetime import datetime
+
+import orjson
+import pytest
+from fastapi import status
+from sqlalchemy import func, select
+
+from src.db.importer import CheckpointMoved, _import_batch, import_tasks, read_records, validate_batch
+from src.db.models import ImportCheckpointDB, TaskDB, UserDB
+
+
+async def _chunks(data: bytes, size: int = 7):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+async def _records(records, fail_after: int | None = None):
+    for number, record in enumerate(records):
+        if number == fail_after:
+            raise ConnectionError("source lost")
+        yield record
+
+
+def _ndjson(records) -> bytes:
+    return b"".join(orjson.dumps(record) + b"\n" for record in records)
+
+
+@pytest.mark.asyncio
+async def test_read_records():
+    """Тест чтения: CSV с переводом строки в кавычках, пустые поля и битые строки NDJSON"""
+    data = 'id,title,description,created_at\r\n1,"Two\nlines",,2026-01-01T00:00:00\r\n2,"a, ""b""",d,\r\n'
+    records = [record async for record in read_records(_chunks(data.encode()), "csv")]
+    assert records == [
+        {"id": "1", "title": "Two\nlines", "description": None, "created_at": "2026-01-01T00:00:00"},
+        {"id": "2", "title": 'a, "b"', "description": "d", "created_at": None},
+    ]
+
+    data = b'{"title": "A", "description": null}\n\n{broken\n5\nnull\n[]\n{"title": "B", "description": "x"}'
+    records = [record async for record in read_records(_chunks(data), "ndjson")]
+    assert [record.get("title") for record in records] == ["A", None, None, None, None, "B"]
+    assert records[1]["__error__"].startswith("invalid JSON")
+    assert [record["__error__"] for record in records[2:5]] == ["expected object"] * 3
+
+
+def test_validate_batch():
+    """Тест проверки пачки: ошибки по номерам записей, владелец по умолчанию, created_at в UTC"""
+    batch = [
+        {"title": "Ok", "description": None, "created_at": "2026-01-01T03:00:00+03:00"},
+        {"title": "x" * 31, "description": None},
+        {"__error__": "invalid JSON"},
+        {"title": "Other", "description": "d", "user_id": 7},
+        {"description": None},
+    ]
+    rows, errors = validate_batch(batch, user_id=1)
+    assert rows == [
+        (0, ("Ok", None, 1, datetime(2026, 1, 1))),
+        (3, ("Other", "d", 7, rows[1][1][3])),
+    ]
+    assert sorted(errors) == [1, 2, 4]
+    assert errors[1].startswith("title:") and errors[4].startswith("title:")
+
+    rows, errors = validate_batch([{"title": "T", "description": None}], user_id=None)
+    assert rows == [] and errors == {0: "user_id: Field required"}
+
+
+@pytest.mark.asyncio
+async def test_import_resumes_from_checkpoint(db_session, mock_user):
+    """Тест импорта: пачки, отклонённые записи, продолжение после сбоя без повторов"""
+    db_session.add(mock_user)
+    await db_session.commit()
+    records = [{"title": f"T{n}", "description": None} for n in range(7)]
+    records[2]["user_id"] = 99
+    engine = db_session.bind
+
+    with pytest.raises(ConnectionError):
+        await import_tasks(engine, _records(records, fail_after=5), "job", user_id=mock_user.id, batch_size=2)
+    # Пачка [4] не закоммичена: сбой случился до её заполнения
+    assert await db_session.scalar(select(ImportCheckpointDB.position)) == 4
+
+    report = await import_tasks(engine, _records(records), "job", user_id=mock_user.id, batch_size=2)
+    assert (report["imported"], report["rejected"], report["position"]) == (3, 0, 7)
+    assert report["rows_per_second"] > 0
+
+    titles = list(await db_session.scalars(select(TaskDB.title).order_by(TaskDB.id)))
+    assert titles == ["T0", "T1", "T3", "T4", "T5", "T6"]
+    checkpoint = await db_session.scalar(select(ImportCheckpointDB))
+    assert (checkpoint.position, checkpoint.imported, checkpoint.rejected) == (7, 6, 1)
+    # Счётчики ведут триггеры, как для обычной вставки
+    assert await db_session.scalar(select(UserDB.tasks_count)) == 6
+
+    with pytest.raises(CheckpointMoved):
+        await _import_batch(engine, "job", 0, records[:1], mock_user.id)
+
+
+@pytest.mark.asyncio
+async def test_import_endpoint(client, db_session, mock_user, mocker):
+    """Тест служебного импорта: gzip-тело, отчёт с ошибками, только с X-Admin-Token"""
+    mocker.patch("src.core.security.settings.ADMIN_TOKEN", "secret-admin")
+    mocker.patch("src.api.endpoints.internal.engine", db_session.bind)
+    db_session.add(mock_user)
+    await db_session.commit()
+    body = gzip.compress(_ndjson([{"title": "A", "description": None}, {"title": None, "description": None}]))
+
+    response = await client.post(
+        "/internal/import",
+        params={"job": "upload", "user_id": mock_user.id},
+        content=body,
+        headers={"X-Admin-Token": "secret-admin", "Content-Encoding": "gzip"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert (data["imported"], data["rejected"], data["position"]) == (1, 1, 2)
+    assert data["errors"][0]["record"] == 1
+    assert await db_session.scalar(select(func.count()).select_from(TaskDB)) == 1
+
+    response = await client.post("/internal/import", params={"job": "upload"}, content=body)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,131 @@
+import pytest
+from fastapi import status
+from sqlalchemy import text, update
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.db.instrumentation import (
+    InstrumentedPool,
+    SlowQueryLog,
+    crud_operation,
+    instrument_pool,
+    instrument_queries,
+)
+
+
+@pytest.mark.asyncio
+async def test_pool_metrics(tmp_path):
+    """Тест метрик пула: занятые соединения, ожидание и ошибки выдачи"""
+
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.sqlite3'}",
+        poolclass=InstrumentedPool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    metrics = instrument_pool(engine, "test")
+    pool = engine.sync_engine.pool
+
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        assert metrics.stats(pool)["checked_out"] == 1
+        with pytest.raises(Exception):
+            async with engine.connect() as other:
+                await other.execute(text("SELECT 1"))
+
+    stats = metrics.stats(pool)
+    assert stats["checked_out"] == 0
+    assert stats["checkouts"] == 1
+    assert stats["checkout_failures"] == 1
+    assert stats["wait_seconds"]["count"] == 1
+
+    await engine.dispose()
+    assert engine.sync_engine.pool.metrics is metrics
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_internal_requires_admin_token(client, mocker):
+    """Тест: служебные эндпоинты закрыты без верного X-Admin-Token"""
+
+    mocker.patch("src.core.security.settings.ADMIN_TOKEN", "secret-admin")
+
+    assert (await client.get("/internal/pool")).status_code == status.HTTP_403_FORBIDDEN
+    response = await client.get("/internal/pool", headers={"X-Admin-Token": "wrong"})
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    response = await client.get("/internal/pool", headers={"X-Admin-Token": "secret-admin"})
+    assert response.status_code == status.HTTP_200_OK
+    assert {"checked_out", "overflow_in_use", "wait_seconds", "checkout_failures"} <= response.json().keys()
+
+
+@pytest.mark.asyncio
+async def test_slow_query_log_captures_operation_and_plan(tmp_path):
+    """Тест лога медленных запросов: параметры, CRUD-функция, план и размер буфера"""
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'slow.sqlite3'}")
+    slow_log = SlowQueryLog(threshold_ms=0, maxsize=2, explain_sample=1.0)
+    instrument_queries(engine, slow_log)
+
+    async with engine.connect() as conn:
+        await conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+        token = crud_operation.set("find_item")
+        try:
+            await conn.execute(text("SELECT id FROM items WHERE id = :id"), {"id": 7})
+        finally:
+            crud_operation.reset(token)
+    await slow_log.wait_explained()
+
+    entries = slow_log.recent()
+    assert len(entries) == 2
+    latest = entries[0]
+    assert latest["operation"] == "find_item"
+    assert latest["statement"].startswith("SELECT id FROM items")
+    assert latest["parameters"] == [7]
+    assert latest["plan"]
+    # Сам EXPLAIN в лог не попадает
+    assert not any(entry["statement"].startswith("EXPLAIN") for entry in entries)
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_slow_query_log_redacts_password_hash(tmp_path):
+    """Тест лога медленных запросов: хэш пароля не сохраняется"""
+
+    from src.db.models import UserDB
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'redact.sqlite3'}")
+    slow_log = SlowQueryLog(threshold_ms=0, maxsize=10)
+    async with engine.begin() as conn:
+        await conn.run_sync(UserDB.__table__.create)
+    instrument_queries(engine, slow_log)
+
+    async with engine.begin() as conn:
+        await conn.execute(
+            UserDB.__table__.insert(),
+            [{"username": "a", "password_hash": "secret-a"}, {"username": "b", "password_hash": "secret-b"}],
+        )
+        await conn.execute(
+            update(UserDB).where(UserDB.password_hash == "secret-a").values(password_hash="secret-c")
+        )
+    await engine.dispose()
+
+    update_entry, insert_entry = slow_log.recent(2)
+    assert "secret" not in str(slow_log.recent())
+    assert [row[:2] for row in insert_entry["parameters"]] == [["a", "***"], ["b", "***"]]
+    assert update_entry["parameters"] == ["***", "***"]
+
+
+@pytest.mark.asyncio
+async def test_internal_slow_queries(client, mocker):
+    """Тест эндпоинта медленных запросов"""
+
+    mocker.patch("src.core.security.settings.ADMIN_TOKEN", "secret-admin")
+    headers = {"X-Admin-Token": "secret-admin"}
+
+    response = await client.get("/internal/slow-queries", params={"limit": 5}, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert {"threshold_ms", "queries"} <= response.json().keys()
+
+    response = await client.delete("/internal/slow-queries", headers=headers)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
@@ -0,0 +1,56 @@
+import pytest
+from fastapi import status
+
+from src.core.metrics import Registry
+from src.db.instrumentation import instrument_queries
+
+
+def test_registry_render():
+    """Тест текстового формата: метки, экранирование и корзины гистограммы"""
+
+    registry = Registry()
+    counter = registry.counter("requests_total", "Запросы", ("route",))
+    counter.inc('/a"b')
+    counter.inc('/a"b', amount=2)
+    counter.inc("c:\\d\ne")
+    histogram = registry.histogram("latency_seconds", "Латентность", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.1, "/x")
+    histogram.observe(5, "/x")
+
+    text = registry.render()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{route="/a\\"b"} 3' in text
+    assert 'requests_total{route="c:\\\\d\\ne"} 1' in text
+    assert 'latency_seconds_bucket{route="/x",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/x",le="+Inf"} 2' in text
+    assert 'latency_seconds_count{route="/x"} 2' in text
+
+
+@pytest.mark.asyncio
+async def test_metrics_route_template_and_queries(db_client, db_session):
+    """Тест /metrics: метка маршрута — шаблон пути, запросы к БД подписаны CRUD-функцией"""
+
+    instrument_queries(db_session.bind)
+
+    response = await db_client.post("/tasks/user/1", json={"title": "Задача", "description": None})
+    assert response.status_code == status.HTTP_200_OK
+
+    response = await db_client.get("/metrics")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert 'http_requests_total{method="POST",route="/tasks/user/{user_id}",status="200"}' in text
+    assert 'http_request_duration_seconds_count{method="POST",route="/tasks/user/{user_id}"}' in text
+    assert 'db_query_duration_seconds_count{operation="add_task"}' in text
+    assert 'db_pool_checked_out{pool="primary"}' in text
+    assert 'cache_hits_total{cache="user"}' in text
+
+
+@pytest.mark.asyncio
+async def test_metrics_unmatched_route(client):
+    """Тест: запросы к несуществующим путям не плодят ряды метрик"""
+
+    await client.get("/no/such/path/123")
+    response = await client.get("/metrics")
+    assert 'route="<unmatched>",status="404"' in response.text
+    assert "/no/such/path/123" not in response.text
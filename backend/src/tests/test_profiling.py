@@ -0,0 +1,140 @@
+import cProfile
+import pstats
+
+import pytest
+from fastapi import status
+from httpx import ASGITransport, AsyncClient
+
+from src.api.middleware import ProfilingMiddleware
+from src.core.cache import token_cache, user_cache
+from src.core.profiling import ProfileStore, RequestProfile, current_profile, phase, profile_store
+from src.core.security import create_access_token
+from src.db.crud import add_tasks
+from src.db.instrumentation import instrument_queries
+
+ADMIN = {"X-Admin-Token": "secret-admin"}
+
+
+def test_phases_are_exclusive(mocker):
+    """Тест фаз: вложенная фаза и замеренное время вычитаются из объемлющей"""
+    clock = mocker.patch("src.core.profiling.time.perf_counter")
+    clock.return_value = 0.0
+    profile = RequestProfile()
+    token = current_profile.set(profile)
+    try:
+        with phase("session"):
+            clock.return_value = 1.0
+            with phase("auth"):
+                clock.return_value = 3.0
+            profile.add("db", 4.0)
+            clock.return_value = 10.0
+    finally:
+        current_profile.reset(token)
+    clock.return_value = 12.0
+    assert profile.breakdown() == {"auth": 2000.0, "db": 4000.0, "session": 4000.0, "other": 2000.0, "total": 12000.0}
+    assert profile.server_timing().startswith("auth;dur=2000.0, db;dur=4000.0")
+
+    # Без профиля фазы ничего не записывают
+    with phase("auth"):
+        pass
+    assert "auth" not in RequestProfile().phases
+
+
+def test_profile_store_ring(tmp_path):
+    """Тест кольца профилей: хранятся последние keep, новые первыми, id проверяется"""
+    store = ProfileStore(tmp_path, keep=2)
+    ids = []
+    for number in range(3):
+        profile = RequestProfile()
+        profiler = cProfile.Profile()
+        profiler.enable()
+        sum(range(1000))
+        profiler.disable()
+        store.save(profile.id, profiler, {"id": profile.id, "number": number})
+        ids.append(profile.id)
+
+    assert [summary["number"] for summary in store.recent()] == [2, 1]
+    assert store.recent(limit=1)[0]["top"]
+    assert len(list(tmp_path.iterdir())) == 4
+    assert store.path(ids[0]) is None
+    assert store.path(ids[2]) == tmp_path / f"{ids[2]}.prof"
+    assert store.path("../../etc/passwd") is None
+
+
+@pytest.mark.asyncio
+async def test_sampling_and_one_profile_at_a_time(tmp_path, mocker):
+    """Тест выборки: профилируется доля запросов, не больше одного одновременно, без заголовков"""
+    middleware = None
+
+    async def app(scope, receive, send):
+        # Вложенный запрос, пока идёт профиль, проходит без него
+        if scope["path"] == "/outer":
+            await middleware({**scope, "path": "/inner"}, receive, send)
+            return
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    middleware = ProfilingMiddleware(app, sample_rate=0.5, store=ProfileStore(tmp_path, keep=10))
+    async with AsyncClient(transport=ASGITransport(app=middleware), base_url="http://test") as client:
+        mocker.patch("src.api.middleware.random.random", return_value=0.7)
+        assert "server-timing" not in (await client.get("/inner")).headers
+
+        mocker.patch("src.api.middleware.random.random", return_value=0.2)
+        response = await client.get("/outer")
+        assert "server-timing" not in response.headers
+        assert "x-profile-id" not in response.headers
+        assert [summary["path"] for summary in middleware.store.recent()] == ["/outer"]
+
+
+@pytest.mark.asyncio
+async def test_profile_request(client, db_session, mock_user, mocker, tmp_path):
+    """Тест профиля по заголовку: только с X-Admin-Token, фазы в Server-Timing, скачивание"""
+    from src.db.database import get_session
+    from src.main import app
+
+    mocker.patch("src.core.security.settings.ADMIN_TOKEN", "secret-admin")
+    mocker.patch.object(profile_store, "directory", tmp_path)
+    instrument_queries(db_session.bind)
+
+    async def override_session():
+        yield db_session
+
+    app.dependency_overrides[get_session] = override_session
+    db_session.add(mock_user)
+    await db_session.commit()
+    await add_tasks(mock_user.id, [{"title": "Task", "description": None}], session=db_session)
+    await db_session.commit()
+    url = f"/tasks/user/{mock_user.id}"
+    headers = {"Authorization": f"Bearer {create_access_token(mock_user.id)}", "X-Profile": "1"}
+
+    response = await client.get(url, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert "server-timing" not in response.headers
+    assert profile_store.recent() == []
+
+    # Пользователь снова читается из БД внутри фазы auth; попаданий в кэш,
+    # которые считает test_security, нет
+    user_cache.clear()
+    response = await client.get(url, headers={**headers, **ADMIN})
+    token_cache.clear()
+    user_cache.clear()
+    assert response.status_code == status.HTTP_200_OK
+    timing = dict(item.split(";dur=") for item in response.headers["server-timing"].split(", "))
+    assert {"auth", "session", "db", "serialization", "other", "total"} <= set(timing)
+    assert float(timing["total"]) >= sum(float(ms) for name, ms in timing.items() if name != "total") * 0.99
+
+    listed = (await client.get("/internal/profiles", headers=ADMIN)).json()["profiles"]
+    assert [summary["id"] for summary in listed] == [response.headers["x-profile-id"]]
+    assert (listed[0]["route"], listed[0]["status"]) == ("/tasks/user/{user_id}", 200)
+    assert listed[0]["phases_ms"]["db"] > 0
+
+    downloaded = await client.get(f"/internal/profiles/{listed[0]['id']}", headers=ADMIN)
+    assert downloaded.status_code == status.HTTP_200_OK
+    path = tmp_path / "downloaded.prof"
+    path.write_bytes(downloaded.content)
+    assert pstats.Stats(str(path)).total_calls > 0
+
+    missing = await client.get("/internal/profiles/20260101T000000000000-000000", headers=ADMIN)
+    assert missing.status_code == status.HTTP_404_NOT_FOUND
+    forbidden = await client.get(f"/internal/profiles/{listed[0]['id']}")
+    assert forbidden.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+from fastapi import status
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.core.executor import BoundedExecutor, ExecutorSaturated
+from src.core.ratelimit import DatabaseStorage, MemoryStorage, RateLimiter, Rule
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+async def _check_bucket(storage):
+    clock = FakeClock()
+    limiter = RateLimiter(storage, clock=clock)
+    rule = Rule(burst=2, per_minute=6)
+
+    assert (await limiter.hit("login_user", "alice", rule)).allowed
+    assert (await limiter.hit("login_user", "alice", rule)).allowed
+    denied = await limiter.hit("login_user", "alice", rule)
+    assert not denied.allowed
+    assert denied.retry_after == pytest.approx(10)
+    # Ведро другого ключа не тронуто
+    assert (await limiter.hit("login_user", "bob", rule)).allowed
+
+    clock.now += 10
+    assert (await limiter.hit("login_user", "alice", rule)).allowed
+    assert not (await limiter.hit("login_user", "alice", rule)).allowed
+
+
+@pytest.mark.asyncio
+async def test_memory_token_bucket():
+    """Тест token bucket в памяти: burst, пополнение и Retry-After"""
+
+    await _check_bucket(MemoryStorage())
+
+
+@pytest.mark.asyncio
+async def test_database_token_bucket(tmp_path):
+    """Тест token bucket в общей таблице: два хранилища видят одно ведро"""
+
+    url = f"sqlite+aiosqlite:///{tmp_path / 'limits.sqlite3'}"
+    storage = DatabaseStorage(create_async_engine(url))
+    await _check_bucket(storage)
+
+    # Второй «воркер» со своим движком продолжает то же ведро
+    other = DatabaseStorage(create_async_engine(url))
+    limiter = RateLimiter(other, clock=lambda: 1010.0)
+    assert not (await limiter.hit("login_user", "alice", Rule(burst=2, per_minute=6))).allowed
+    await storage.close()
+    await other.close()
+
+
+@pytest.mark.asyncio
+async def test_login_rate_limited_by_username(client, mocker):
+    """Тест: после исчерпания попыток вход отклоняется с 429 до проверки пароля"""
+
+    mocker.patch("src.api.endpoints.users.USER_RULE", Rule(burst=2, per_minute=1))
+    get_user = mocker.patch("src.db.crud._get_user_by_username", return_value=None)
+    credentials = {"username": "victim", "password": "guess"}
+
+    for _ in range(2):
+        response = await client.post("/users/login", json=credentials)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    response = await client.post("/users/login", json=credentials)
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(response.headers["Retry-After"]) >= 1
+    assert get_user.call_count == 2
+
+    # Другое имя с того же адреса проходит
+    response = await client.post("/users/login", json={**credentials, "username": "other"})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    metrics = (await client.get("/metrics")).text
+    assert 'rate_limit_decisions_total{scope="login_user",decision="limited"}' in metrics
+
+
+@pytest.mark.asyncio
+async def test_register_rate_limited_by_ip(client, mocker):
+    """Тест: регистрация ограничивается по IP клиента"""
+
+    mocker.patch("src.api.endpoints.users.IP_RULE", Rule(burst=1, per_minute=1))
+    mocker.patch("src.db.crud._get_user_by_username", return_value=object())
+    payload = {"username": "u", "password": "p", "email": "u@example.com"}
+
+    assert (await client.post("/users/register", json=payload)).status_code == status.HTTP_400_BAD_REQUEST
+    response = await client.post("/users/register", json=payload)
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+
+@pytest.mark.asyncio
+async def test_executor_rejects_when_queue_is_full():
+    """Тест: сверх max_waiting задача отклоняется сразу, а не встаёт в очередь"""
+
+    executor = BoundedExecutor(workers=1, max_concurrency=1, max_waiting=1)
+    release = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    def blocking():
+        asyncio.run_coroutine_threadsafe(release.wait(), loop).result()
+
+    running = asyncio.create_task(executor.run(blocking))
+    await asyncio.sleep(0.05)
+    queued = asyncio.create_task(executor.run(lambda: None))
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(ExecutorSaturated):
+        await executor.run(lambda: None)
+    assert executor.stats()["rejected"] == 1
+
+    release.set()
+    await asyncio.gather(running, queued)
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_saturated_hashing_returns_503(client, mocker):
+    """Тест: переполненная очередь хэширования даёт 503 с Retry-After"""
+
+    mocker.patch("src.db.crud._get_user_by_username", return_value=None)
+    mocker.patch("src.core.security.hash_executor.run", side_effect=ExecutorSaturated())
+    payload = {"username": "u", "password": "p", "email": "u@example.com"}
+
+    response = await client.post("/users/register", json=payload)
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["Retry-After"] == "1"
@@ -0,0 +1,155 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.db.crud import add_task, get_tasks_by_user_id, get_user_by_username
+from src.db.models import Base, TaskDB, UserDB
+from src.db.replicas import Replica, ReplicaSet
+
+
+async def _create_db(url: str, usernames: list[str], title: str):
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as session:
+        for username in usernames:
+            session.add(UserDB(username=username, email=f"{username}@example.com", password_hash="x"))
+        await session.flush()
+        session.add(TaskDB(title=title, description=None, user_id=1))
+        await session.commit()
+    return engine, factory
+
+
+@pytest_asyncio.fixture
+async def replica_setup(tmp_path, mocker):
+    """Основная БД и «реплика» — два файла SQLite с разными данными"""
+    from src.core.cache import recent_writers
+
+    primary, primary_session = await _create_db(
+        f"sqlite+aiosqlite:///{tmp_path / 'primary.sqlite3'}", ["alice", "bob"], "primary"
+    )
+    replica_engine, _ = await _create_db(
+        f"sqlite+aiosqlite:///{tmp_path / 'replica.sqlite3'}", ["alice"], "replica"
+    )
+    replica = Replica("replica0", replica_engine)
+    mocker.patch("src.db.database.async_session", primary_session)
+    mocker.patch("src.db.database.replicas", ReplicaSet([replica]))
+    recent_writers.clear()
+    yield primary_session, replica
+    recent_writers.clear()
+    await primary.dispose()
+    await replica_engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica(replica_setup):
+    """Тест чтения с реплики: с сессией запроса и без неё"""
+    primary_session, replica = replica_setup
+
+    rows = await get_tasks_by_user_id(1)
+    assert [row.title for row in rows] == ["replica"]
+
+    async with primary_session() as session:
+        rows = await get_tasks_by_user_id(1, session=session)
+        assert [row.title for row in rows] == ["replica"]
+        # Реплика закреплена за сессией на весь запрос
+        assert session.info["replica"] is replica
+    assert replica.queries == 2
+
+
+@pytest.mark.asyncio
+async def test_session_that_wrote_reads_primary(replica_setup):
+    """Тест read-your-writes: после записи в сессии чтение идёт на основную БД"""
+    primary_session, replica = replica_setup
+
+    async with primary_session() as session:
+        await add_task(TaskDB(title="new", description=None, user_id=1), session=session)
+        rows = await get_tasks_by_user_id(1, session=session)
+        assert [row.title for row in rows] == ["primary", "new"]
+    assert replica.queries == 0
+
+
+@pytest.mark.asyncio
+async def test_recent_writer_pinned_to_primary(replica_setup):
+    """Тест закрепления: следующий запрос пользователя после записи читает основную БД"""
+    primary_session, replica = replica_setup
+
+    async with primary_session() as session:
+        session.info["user_id"] = 1
+        await add_task(TaskDB(title="new", description=None, user_id=1), session=session)
+        await session.commit()
+
+    async with primary_session() as session:
+        session.info["user_id"] = 1
+        rows = await get_tasks_by_user_id(1, session=session)
+        assert [row.title for row in rows] == ["primary", "new"]
+
+    async with primary_session() as session:
+        session.info["user_id"] = 2
+        rows = await get_tasks_by_user_id(1, session=session)
+        assert [row.title for row in rows] == ["replica"]
+
+
+@pytest.mark.asyncio
+async def test_fallback_on_miss(replica_setup):
+    """Тест поиска пользователя, ещё не доехавшего до реплики"""
+    _, replica = replica_setup
+
+    user = await get_user_by_username("bob")
+    assert user is not None and user.username == "bob"
+    assert await get_user_by_username("nobody") is None
+    assert replica.queries == 2
+
+
+@pytest.mark.asyncio
+async def test_unavailable_replica_falls_back(replica_setup, tmp_path, mocker):
+    """Тест недоступной реплики: запрос обслуживает основная БД, реплика исключается"""
+    broken = Replica("broken", create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'db.sqlite3'}"))
+    replicas = ReplicaSet([broken], retry_seconds=60)
+    mocker.patch("src.db.database.replicas", replicas)
+
+    rows = await get_tasks_by_user_id(1)
+    assert [row.title for row in rows] == ["primary"]
+    assert broken.failures == 1
+    assert not broken.healthy
+    assert replicas.choose() is None
+
+    await replicas.check()
+    assert broken.failures == 2
+    await broken.engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_replica_balancing(tmp_path):
+    """Тест балансировки: round_robin по кругу, least_connections по занятым соединениям"""
+    engines = [create_async_engine(f"sqlite+aiosqlite:///{tmp_path / f'r{n}.sqlite3'}") for n in range(2)]
+    first, second = Replica("r0", engines[0]), Replica("r1", engines[1])
+
+    round_robin = ReplicaSet([first, second], balance="round_robin")
+    assert [round_robin.choose().name for _ in range(4)] == ["r0", "r1", "r0", "r1"]
+
+    least = ReplicaSet([first, second])
+    async with engines[0].connect():
+        assert {least.choose().name for _ in range(4)} == {"r1"}
+
+    with pytest.raises(ValueError):
+        ReplicaSet([first], balance="random")
+    for engine in engines:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_create_engine_for_non_asyncpg_url(tmp_path):
+    """Тест: параметры asyncpg не передаются другим драйверам (реплика на SQLite)"""
+    from sqlalchemy import text
+
+    from src.db.database import _create_engine
+
+    engine = _create_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.sqlite3'}")
+    try:
+        async with engine.connect() as conn:
+            assert await conn.scalar(text("SELECT 1")) == 1
+    finally:
+        await engine.dispose()
@@ -0,0 +1,137 @@
+from datetime import timedelta
+
+import pytest
+from fastapi import status
+
+from src.core import security
+from src.core.cache import TTLCache, token_cache, user_cache
+from src.core.security import create_access_token
+from src.db import crud
+from src.db.models import UserDB
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    token_cache.clear()
+    user_cache.clear()
+    yield
+    token_cache.clear()
+    user_cache.clear()
+
+
+# ============ Тесты TTL/LRU кэша ============
+
+def test_cache_evicts_least_recently_used():
+    """Тест вытеснения самой давно использованной записи"""
+
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set(1, "a")
+    cache.set(2, "b")
+    cache.get(1)
+    cache.set(3, "c")
+
+    assert cache.get(2) is None
+    assert cache.get(1) == "a"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_expires_entries(mocker):
+    """Тест истечения времени жизни записи"""
+
+    now = mocker.patch("src.core.cache.time.monotonic", return_value=100.0)
+    cache = TTLCache(maxsize=10, ttl=5)
+    cache.set("key", "value")
+
+    now.return_value = 104.0
+    assert cache.get("key") == "value"
+    now.return_value = 106.0
+    assert cache.get("key") is None
+    assert cache.stats()["expirations"] == 1
+
+
+# ============ Тесты кэширования get_current_user ============
+
+@pytest.mark.asyncio
+async def test_current_user_cached(client, mock_tasks_version, mocker):
+    """Тест: повторный запрос с тем же токеном не декодирует JWT и не ходит в БД"""
+
+    user = UserDB(id=1, username="testuser", email="test@example.com", password_hash="x")
+    get_user = mocker.patch("src.db.crud._get_user_by_id", return_value=user)
+    decode = mocker.spy(security.jwt, "decode")
+    mocker.patch("src.db.crud._get_tasks_by_user_id", return_value=[])
+    headers = {"Authorization": f"Bearer {create_access_token(1)}"}
+
+    for _ in range(3):
+        response = await client.get("/tasks/user/1", headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+
+    assert get_user.call_count == 1
+    assert decode.call_count == 1
+    assert user_cache.stats()["hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_expired_token_not_cached(client, mocker):
+    """Тест: просроченный токен отклоняется и не попадает в кэш"""
+
+    token = create_access_token(1, expires_delta=timedelta(seconds=-1))
+
+    response = await client.get("/tasks/user/1", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert len(token_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_delete_user_invalidates_cache(db_session):
+    """Тест инвалидации кэша после коммита удаления пользователя"""
+
+    user = UserDB(id=1, username="testuser", email="test@example.com", password_hash="x")
+    db_session.add(user)
+    await db_session.commit()
+    user_cache.set(1, user)
+
+    await crud.delete_user.__wrapped__(db_session, 1)
+    assert user_cache.get(1) is user  # до коммита запись на месте
+
+    await db_session.commit()
+    assert user_cache.get(1) is None
+
+
+@pytest.mark.asyncio
+async def test_cached_user_survives_rollback(client, db_session, mocker):
+    """Тест: пользователь из кэша доступен после запроса, сессия которого откатилась"""
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import sessionmaker
+
+    # Настоящие get_session и get_current_user, но на SQLite-базе теста
+    mocker.patch(
+        "src.db.database.async_session",
+        sessionmaker(bind=db_session.bind, class_=AsyncSession, expire_on_commit=False),
+    )
+    db_session.add(UserDB(id=1, username="testuser", email="test@example.com", password_hash="x"))
+    await db_session.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(1)}"}
+
+    response = await client.delete("/tasks/user/1/task/999", headers=headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    response = await client.get("/tasks/user/1", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert user_cache.stats()["size"] == 1
+
+
+@pytest.mark.asyncio
+async def test_user_invalidated_during_read_not_cached(mocker):
+    """Тест: пользователь, инвалидированный во время чтения из БД, не попадает в кэш"""
+
+    user = UserDB(id=1, username="testuser", email="test@example.com", password_hash="x")
+
+    async def read_user(session, user_id):
+        # Пока идёт чтение, другой запрос коммитит смену пароля
+        user_cache.invalidate(user_id)
+        return user
+
+    mocker.patch("src.db.crud._get_user_by_id", side_effect=read_user)
+
+    assert await security.authenticate(create_access_token(1)) is user
+    assert user_cache.get(1) is None
@@ -0,0 +1,120 @@
+import pytest
+from fastapi import status
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.db.models import Base
+from src.db.warmup import readiness, warm_pool
+from src.server import cpu_count, server_options
+
+
+@pytest.mark.asyncio
+async def test_lifespan_releases_resources(mocker):
+    """Тест остановки приложения: пул БД, брокер, ограничитель и пул хэширования освобождаются"""
+    from src.main import app
+
+    engine_dispose = mocker.patch("src.main.engine", new=mocker.AsyncMock()).dispose
+    replicas_dispose = mocker.patch("src.main.replicas.dispose")
+    broker_close = mocker.patch("src.main.broker.close")
+    limiter_close = mocker.patch("src.main.auth_limiter.storage.close")
+    executor_shutdown = mocker.patch("src.main.hash_executor.shutdown")
+    warm_up = mocker.patch("src.main.warm_up_until_ready")
+
+    async with app.router.lifespan_context(app):
+        warm_up.assert_awaited_once()
+        engine_dispose.assert_not_called()
+
+    engine_dispose.assert_awaited_once()
+    replicas_dispose.assert_awaited_once()
+    broker_close.assert_awaited_once()
+    limiter_close.assert_awaited_once()
+    executor_shutdown.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_lifespan_waits_for_background_tasks(mocker, caplog):
+    """Тест остановки: пул закрывается после фоновых задач, ошибка прогрева после таймаута в логе"""
+    import asyncio
+
+    from src.main import app
+
+    finished = []
+
+    async def archiver(engine):
+        try:
+            await asyncio.sleep(3600)
+        finally:
+            # Архиватор дописывает пачку уже после отмены
+            await asyncio.sleep(0.01)
+            finished.append("archiver")
+
+    async def warm_up():
+        await asyncio.sleep(0.02)
+        raise RuntimeError("relation does not exist")
+
+    engine = mocker.patch("src.main.engine", new=mocker.AsyncMock())
+    engine.dispose.side_effect = lambda: finished.append("dispose")
+    mocker.patch("src.main.replicas.dispose")
+    mocker.patch("src.main.broker.close")
+    mocker.patch("src.main.auth_limiter.storage.close")
+    mocker.patch("src.main.hash_executor.shutdown")
+    mocker.patch("src.main.run_archiver", archiver)
+    mocker.patch("src.main.warm_up_until_ready", warm_up)
+    mocker.patch("src.main.settings.ARCHIVE_AFTER_DAYS", 30)
+    mocker.patch("src.main.settings.WARMUP_TIMEOUT", 0.001)
+
+    async with app.router.lifespan_context(app):
+        await asyncio.sleep(0.05)
+        assert "Warm-up failed" in caplog.text
+
+    assert finished == ["archiver", "dispose"]
+
+
+def test_server_options(mocker):
+    """Тест параметров сервера: воркеры по числу CPU, если их число не задано"""
+    mocker.patch("src.server.settings.SERVER_WORKERS", 0)
+    mocker.patch("src.server.cpu_count", return_value=3)
+    options = server_options()
+    assert options["workers"] == 3
+    assert options["lifespan"] == "on"
+    assert options["loop"] in ("uvloop", "asyncio")
+
+    mocker.patch("src.server.settings.SERVER_WORKERS", 2)
+    assert server_options()["workers"] == 2
+    assert cpu_count() >= 1
+
+
+@pytest.mark.asyncio
+async def test_warm_pool(tmp_path):
+    """Тест прогрева: соединения остаются в пуле, горячие запросы скомпилированы"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'warm.sqlite3'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    compiled_before = len(engine.sync_engine._compiled_cache)
+
+    assert await warm_pool(engine, 3) == 3
+    assert engine.sync_engine.pool.checkedin() == 3
+    assert len(engine.sync_engine._compiled_cache) >= compiled_before + 5
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_health_endpoints(client, tmp_path, mocker):
+    """Тест проверок здоровья: live всегда 200, ready — только после прогрева и при живой БД"""
+    mocker.patch.object(readiness, "ready", False)
+    assert (await client.get("/health/live")).status_code == status.HTTP_200_OK
+    response = await client.get("/health/ready")
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.json() == {"status": "starting"}
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'ready.sqlite3'}")
+    mocker.patch("src.api.endpoints.health.engine", engine)
+    readiness.ready = True
+    assert (await client.get("/health/ready")).status_code == status.HTTP_200_OK
+
+    broken = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'db.sqlite3'}")
+    mocker.patch("src.api.endpoints.health.engine", broken)
+    response = await client.get("/health/ready")
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.json() == {"status": "unavailable"}
+    await engine.dispose()
+    await broken.dispose()
@@ -0,0 +1,137 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi import status
+from sqlalchemy import select, text, update
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.db.crud import add_tasks, delete_task, delete_tasks
+from src.db.models import TaskDB, TaskStatsDB, UserDB
+from src.db.stats import check, rebuild
+
+
+async def _stats(session, user_id):
+    rows = await session.execute(
+        select(TaskStatsDB.day, TaskStatsDB.count).where(TaskStatsDB.user_id == user_id).order_by(TaskStatsDB.day)
+    )
+    total = await session.scalar(select(UserDB.tasks_count).where(UserDB.id == user_id))
+    return total, [tuple(row) for row in rows]
+
+
+@pytest.mark.asyncio
+async def test_triggers_maintain_stats(db_session, mock_user):
+    """Тест счётчиков: вставки, пакетные и одиночные удаления, перенос на другой день"""
+    db_session.add(mock_user)
+    await db_session.flush()
+    monday, tuesday = datetime(2026, 10, 12, 9), datetime(2026, 10, 13, 23, 59)
+
+    rows = await add_tasks(
+        mock_user.id,
+        [{"title": f"T{n}", "description": None, "created_at": monday if n < 3 else tuesday} for n in range(5)],
+        session=db_session,
+    )
+    assert await _stats(db_session, mock_user.id) == (5, [(monday.date(), 3), (tuesday.date(), 2)])
+
+    await delete_task(mock_user.id, rows[0]["id"], session=db_session)
+    await delete_tasks(mock_user.id, [rows[1]["id"], rows[2]["id"]], session=db_session)
+    assert await _stats(db_session, mock_user.id) == (2, [(tuesday.date(), 2)])
+
+    await db_session.execute(update(TaskDB).where(TaskDB.id == rows[3]["id"]).values(created_at=monday))
+    # Смена заголовка счётчики не трогает
+    await db_session.execute(update(TaskDB).where(TaskDB.id == rows[4]["id"]).values(title="Renamed"))
+    assert await _stats(db_session, mock_user.id) == (2, [(monday.date(), 1), (tuesday.date(), 1)])
+    assert await check(await db_session.connection()) == []
+
+
+@pytest.mark.asyncio
+async def test_rebuild_and_check(db_session, mock_user):
+    """Тест проверки и пересчёта разошедшихся счётчиков"""
+    db_session.add(mock_user)
+    await db_session.flush()
+    await add_tasks(
+        mock_user.id, [{"title": "T", "description": None, "created_at": datetime(2026, 1, 1)}] * 2,
+        session=db_session,
+    )
+    await db_session.execute(update(TaskStatsDB).values(count=7))
+    await db_session.execute(update(UserDB).values(tasks_count=0))
+    await db_session.execute(
+        TaskStatsDB.__table__.insert().values(user_id=mock_user.id, day=date(2025, 1, 1), count=1)
+    )
+
+    conn = await db_session.connection()
+    mismatches = await check(conn, mock_user.id)
+    assert {(item["day"], item["expected"], item["actual"]) for item in mismatches} == {
+        ("2025-01-01", 0, 1),
+        ("2026-01-01", 2, 7),
+        (None, 2, 0),
+    }
+
+    await rebuild(conn, mock_user.id)
+    assert await check(conn) == []
+    assert await _stats(db_session, mock_user.id) == (2, [(date(2026, 1, 1), 2)])
+
+
+@pytest.mark.asyncio
+async def test_rebuild_existing_database():
+    """Тест пересчёта в БД без счётчиков: rebuild ставит колонку, таблицу и триггеры"""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text(
+                "CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR NOT NULL UNIQUE, "
+                "password_hash VARCHAR NOT NULL, email VARCHAR(30))"
+            ))
+            await conn.execute(text(
+                "CREATE TABLE tasks (id INTEGER PRIMARY KEY, title VARCHAR(30) NOT NULL, "
+                "description VARCHAR(50), user_id INTEGER NOT NULL REFERENCES users (id), created_at DATETIME NOT NULL)"
+            ))
+            await conn.execute(text("INSERT INTO users (id, username, password_hash) VALUES (1, 'old', 'hash')"))
+            await conn.execute(text(
+                "INSERT INTO tasks (title, user_id, created_at) VALUES ('T', 1, '2025-01-01 10:00:00')"
+            ))
+            await rebuild(conn)
+            assert await check(conn) == []
+
+            # Дальше счётчики ведут триггеры
+            await conn.execute(text(
+                "INSERT INTO tasks (title, user_id, created_at) VALUES ('T', 1, '2025-01-02 10:00:00')"
+            ))
+            assert await conn.scalar(select(UserDB.tasks_count).where(UserDB.id == 1)) == 2
+            assert await check(conn) == []
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_stats_endpoint(db_client, db_session, mock_user):
+    """Тест эндпоинта статистики по дням и неделям с нулевыми периодами и задачей из будущего"""
+    today = datetime.utcnow().date()
+    days_ago = [0, 0, 1, 8, 400, -3]
+    await add_tasks(
+        mock_user.id,
+        [
+            {"title": "T", "description": None, "created_at": datetime.combine(today - timedelta(days=n), datetime.min.time())}
+            for n in days_ago
+        ],
+        session=db_session,
+    )
+    await db_session.commit()
+    url = f"/tasks/user/{mock_user.id}/stats"
+
+    response = await db_client.get(url, params={"buckets": 3})
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["total"] == 6
+    assert data["buckets"] == [
+        {"start": str(today - timedelta(days=2)), "count": 0},
+        {"start": str(today - timedelta(days=1)), "count": 1},
+        {"start": str(today), "count": 2},
+    ]
+
+    weeks = (await db_client.get(url, params={"period": "week", "buckets": 3})).json()["buckets"]
+    monday = today - timedelta(days=today.weekday())
+    assert [bucket["start"] for bucket in weeks] == [str(monday - timedelta(days=7 * n)) for n in (2, 1, 0)]
+    assert sum(bucket["count"] for bucket in weeks) == 4
+
+    other = await db_client.get(f"/tasks/user/{mock_user.id + 1}/stats")
+    assert other.status_code == status.HTTP_403_FORBIDDEN
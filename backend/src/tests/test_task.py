@@ -1,8 +1,21 @@
+import json
+from collections import namedtuple
+from typing import List
+
 import pytest
 from fastapi import status
-from src.db.models import TaskDB
+from sqlalchemy import event
+from pydantic import TypeAdapter
+from src.api.pagination import decode_cursor
+from src.api.responses import tasks_response
+from src.api.schemas.task import ReadTask
+from src.db.crud import add_task, delete_task, update_task
+from src.db.models import TaskDB, UserDB
 from datetime import datetime
 
+# Строка выборки колонок задачи, как её возвращает crud.get_tasks_by_user_id
+TaskRow = namedtuple("TaskRow", "id title description created_at")
+
 
 # ============ Тесты создания тасок ============
 
@@ -10,7 +23,7 @@ from datetime import datetime
 async def test_create_task(authenticated_client, mock_user, mocker):
     """Тест создания таски"""
 
-    async def mock_add_task_func(task):
+    async def mock_add_task_func(task, session=None):
         task.id = 1
         task.created_at = datetime.now()
         return task
@@ -57,24 +70,12 @@ async def test_create_task_unauthorized(client):
 # ============ Тесты получения тасок ============
 
 @pytest.mark.asyncio
-async def test_get_user_tasks(authenticated_client, mock_user, mocker):
+async def test_get_user_tasks(authenticated_client, mock_user, mock_tasks_version, mocker):
     """Тест получения списка тасок пользователя"""
 
     mock_tasks = [
-        TaskDB(
-            id=1,
-            title="Task 1",
-            description="Description 1",
-            user_id=mock_user.id,
-            created_at=datetime.now()
-        ),
-        TaskDB(
-            id=2,
-            title="Task 2",
-            description="Description 2",
-            user_id=mock_user.id,
-            created_at=datetime.now()
-        )
+        TaskRow(id=1, title="Task 1", description="Description 1", created_at=datetime.now()),
+        TaskRow(id=2, title="Task 2", description="Description 2", created_at=datetime.now()),
     ]
     mocker.patch("src.db.crud._get_tasks_by_user_id", return_value=mock_tasks)
 
@@ -87,8 +88,26 @@ async def test_get_user_tasks(authenticated_client, mock_user, mocker):
     assert data[1]["title"] == "Task 2"
 
 
+def test_tasks_response_matches_pydantic_encoding():
+    """Тест быстрого пути: тот же JSON, что дала бы валидация по List[ReadTask]"""
+
+    rows = [
+        TaskRow(id=1, title="Задача", description=None, created_at=datetime(2024, 5, 1, 12, 30, 15, 123456)),
+        TaskRow(id=2, title="Task", description="Описание", created_at=datetime(2024, 5, 1)),
+    ]
+
+    response = tasks_response(rows, headers={"ETag": 'W/"1"'})
+
+    expected = TypeAdapter(List[ReadTask]).dump_python(
+        [ReadTask(**row._asdict()) for row in rows], mode="json"
+    )
+    assert json.loads(response.body) == expected
+    assert response.headers["ETag"] == 'W/"1"'
+    assert response.media_type == "application/json"
+
+
 @pytest.mark.asyncio
-async def test_get_user_tasks_empty(authenticated_client, mock_user, mocker):
+async def test_get_user_tasks_empty(authenticated_client, mock_user, mock_tasks_version, mocker):
     """Тест получения пустого списка тасок"""
 
     mocker.patch("src.db.crud._get_tasks_by_user_id", return_value=[])
@@ -99,6 +118,114 @@ async def test_get_user_tasks_empty(authenticated_client, mock_user, mocker):
     assert response.json() == []
 
 
+@pytest.mark.asyncio
+async def test_get_user_tasks_next_cursor(authenticated_client, mock_user, mock_tasks_version, mocker):
+    """Тест курсора следующей страницы"""
+
+    mock_tasks = [
+        TaskRow(id=i, title=f"Task {i}", description=None, created_at=datetime(2024, 1, 1))
+        for i in range(1, 4)
+    ]
+    get_page = mocker.patch("src.db.crud._get_tasks_by_user_id", return_value=mock_tasks)
+
+    response = await authenticated_client.get(f"/tasks/user/{mock_user.id}", params={"limit": 2})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [t["id"] for t in response.json()] == [1, 2]
+    cursor = response.headers["X-Next-Cursor"]
+    assert decode_cursor(cursor) == (datetime(2024, 1, 1), 2)
+
+    await authenticated_client.get(
+        f"/tasks/user/{mock_user.id}", params={"limit": 2, "cursor": cursor}
+    )
+    assert get_page.call_args.kwargs == {
+        "limit": 3, "after": (datetime(2024, 1, 1), 2), "include_archived": False, "fields": None
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_user_tasks_last_page(authenticated_client, mock_user, mock_tasks_version, mocker):
+    """Тест последней страницы без курсора"""
+
+    mocker.patch("src.db.crud._get_tasks_by_user_id", return_value=[])
+
+    response = await authenticated_client.get(f"/tasks/user/{mock_user.id}", params={"limit": 2})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert "X-Next-Cursor" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_get_user_tasks_invalid_cursor(authenticated_client, mock_user):
+    """Тест повреждённого курсора"""
+
+    response = await authenticated_client.get(
+        f"/tasks/user/{mock_user.id}", params={"cursor": "not-a-cursor"}
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_get_user_tasks_stream(authenticated_client, mock_user, mock_tasks_version, mocker):
+    """Тест потоковой выдачи задач в NDJSON"""
+
+    async def mock_stream(user_id, yield_per, include_archived=False, fields=None, session=None):
+        for i in range(1, 3):
+            yield {"id": i, "title": f"Task {i}", "description": None, "created_at": datetime(2024, 1, 1)}
+
+    mocker.patch("src.api.endpoints.tasks.stream_tasks_by_user_id", side_effect=mock_stream)
+
+    response = await authenticated_client.get(f"/tasks/user/{mock_user.id}", params={"stream": True})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [t["id"] for t in lines] == [1, 2]
+    assert lines[0]["created_at"] == "2024-01-01T00:00:00"
+
+
+@pytest.mark.asyncio
+async def test_get_user_tasks_not_modified(authenticated_client, mock_user, mock_tasks_version, mocker):
+    """Тест: If-None-Match с текущей версией даёт 304 без запроса к задачам"""
+
+    get_page = mocker.patch("src.db.crud._get_tasks_by_user_id", return_value=[])
+    first = await authenticated_client.get(f"/tasks/user/{mock_user.id}")
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    response = await authenticated_client.get(
+        f"/tasks/user/{mock_user.id}", headers={"If-None-Match": etag}
+    )
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["ETag"] == etag
+    assert get_page.call_count == 1
+    assert mock_tasks_version.call_count == 1  # вторая версия взята из кэша
+
+
+@pytest.mark.asyncio
+async def test_get_user_tasks_etag_changes_on_write(db_client, mock_user):
+    """Тест: любая запись в задачи пользователя меняет ETag списка"""
+
+    url = f"/tasks/user/{mock_user.id}"
+    etag = (await db_client.get(url)).headers["ETag"]
+    assert (await db_client.get(url, headers={"If-None-Match": etag})).status_code == 304
+
+    created = await db_client.post(url, json={"title": "Task", "description": None})
+    response = await db_client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    etag = response.headers["ETag"]
+
+    await db_client.delete(f"{url}/task/{created.json()['id']}")
+    response = await db_client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == []
+
+    other_page = await db_client.get(url, params={"limit": 5}, headers={"If-None-Match": response.headers["ETag"]})
+    assert other_page.status_code == status.HTTP_200_OK
+
+
 @pytest.mark.asyncio
 async def test_get_tasks_forbidden(authenticated_client, mock_user):
     """Тест попытки получить таски другого пользователя"""
@@ -125,17 +252,8 @@ async def test_get_tasks_unauthorized(client):
 async def test_update_task(authenticated_client, mock_user, mocker):
     """Тест обновления таски"""
 
-    updated_task = TaskDB(
-        id=1,
-        title="Updated Task",
-        description="Old Description",
-        user_id=mock_user.id,
-        created_at=datetime.now()
-    )
-
-    async def mock_update_task_func(user_id, task_id, title):
-        updated_task.title = title
-        return updated_task
+    async def mock_update_task_func(user_id, task_id, title, description, session=None):
+        return {"id": task_id, "title": title, "description": description, "created_at": datetime.now()}
 
     mocker.patch("src.api.endpoints.tasks.update_task", side_effect=mock_update_task_func)
 
@@ -147,6 +265,81 @@ async def test_update_task(authenticated_client, mock_user, mocker):
     assert response.status_code == status.HTTP_200_OK
     data = response.json()
     assert data["title"] == "Updated Task"
+    assert data["description"] == "Updated Description"
+
+
+@pytest.mark.asyncio
+async def test_update_task_persists_description(db_client, mock_user):
+    """Тест: описание сохраняется в той же транзакции, что и заголовок"""
+
+    created = await db_client.post(
+        f"/tasks/user/{mock_user.id}",
+        json={"title": "Task", "description": "Old Description"}
+    )
+    task_id = created.json()["id"]
+
+    response = await db_client.put(
+        f"/tasks/user/{mock_user.id}/task/{task_id}",
+        json={"title": "Updated Task", "description": "New Description"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    tasks = (await db_client.get(f"/tasks/user/{mock_user.id}")).json()
+    assert [(t["title"], t["description"]) for t in tasks] == [("Updated Task", "New Description")]
+
+
+@pytest.mark.asyncio
+async def test_patch_task_updates_only_sent_fields(db_client, mock_user):
+    """Тест PATCH: меняются только переданные поля, заголовок нельзя обнулить"""
+
+    created = await db_client.post(
+        f"/tasks/user/{mock_user.id}",
+        json={"title": "Task", "description": "Description"}
+    )
+    url = f"/tasks/user/{mock_user.id}/task/{created.json()['id']}"
+
+    response = await db_client.patch(url, json={"title": "Renamed"})
+    assert response.status_code == status.HTTP_200_OK
+    assert (response.json()["title"], response.json()["description"]) == ("Renamed", "Description")
+
+    response = await db_client.patch(url, json={"description": None})
+    assert (response.json()["title"], response.json()["description"]) == ("Renamed", None)
+
+    response = await db_client.patch(url, json={"title": None})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+    response = await db_client.patch(f"/tasks/user/{mock_user.id}/task/999", json={"title": "X"})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_single_task_writes_take_one_statement(db_session, mock_user):
+    """Тест: обновление и удаление задачи — ровно один SQL-запрос"""
+
+    db_session.add(mock_user)
+    task = await add_task(TaskDB(title="Task", description=None, user_id=mock_user.id), session=db_session)
+    await db_session.commit()
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db_session.bind.sync_engine, "before_cursor_execute", count)
+    try:
+        row = await update_task(mock_user.id, task.id, title="Renamed", session=db_session)
+        assert row["title"] == "Renamed"
+        assert len(statements) == 1
+
+        statements.clear()
+        assert await delete_task(mock_user.id, task.id, session=db_session) == task.id
+        assert len(statements) == 1
+
+        statements.clear()
+        assert await delete_task(mock_user.id, task.id, session=db_session) is None
+        assert len(statements) == 1
+    finally:
+        event.remove(db_session.bind.sync_engine, "before_cursor_execute", count)
 
 
 @pytest.mark.asyncio
@@ -195,7 +388,7 @@ async def test_update_task_unauthorized(client):
 async def test_delete_task(authenticated_client, mock_user, mocker):
     """Тест удаления таски"""
 
-    mocker.patch("src.api.endpoints.tasks.delete_task", return_value=None)
+    mocker.patch("src.api.endpoints.tasks.delete_task", return_value=1)
 
     response = await authenticated_client.delete(f"/tasks/user/{mock_user.id}/task/1")
 
@@ -203,6 +396,17 @@ async def test_delete_task(authenticated_client, mock_user, mocker):
     assert response.json() == {"detail": "Задача удалена"}
 
 
+@pytest.mark.asyncio
+async def test_delete_task_not_found(authenticated_client, mock_user, mocker):
+    """Тест удаления несуществующей таски"""
+
+    mocker.patch("src.api.endpoints.tasks.delete_task", return_value=None)
+
+    response = await authenticated_client.delete(f"/tasks/user/{mock_user.id}/task/999")
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
 @pytest.mark.asyncio
 async def test_delete_task_forbidden(authenticated_client, mock_user):
     """Тест попытки удалить таску другого пользователя"""
@@ -221,3 +425,143 @@ async def test_delete_task_unauthorized(client):
     response = await client.delete("/tasks/user/1/task/1")
 
     assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+# ============ Тесты пакетных операций ============
+
+@pytest.mark.asyncio
+async def test_bulk_create_update_delete(db_client, mock_user):
+    """Тест пакетного создания, обновления и удаления с отчётом по элементам"""
+
+    response = await db_client.post(
+        f"/tasks/user/{mock_user.id}/bulk",
+        json={"items": [{"title": f"Task {i}", "description": None} for i in range(3)]}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    created = response.json()
+    assert created["succeeded"] == 3
+    ids = [item["id"] for item in created["items"]]
+    assert [item["task"]["title"] for item in created["items"]] == ["Task 0", "Task 1", "Task 2"]
+
+    response = await db_client.put(
+        f"/tasks/user/{mock_user.id}/bulk",
+        json={"items": [
+            {"id": ids[0], "title": "Edited", "description": "Desc"},
+            {"id": 999, "title": "Missing", "description": None},
+        ]}
+    )
+    updated = response.json()
+    assert (updated["succeeded"], updated["failed"]) == (1, 1)
+    assert updated["items"][0]["task"]["description"] == "Desc"
+    assert updated["items"][1]["error"] == "Задача не найдена"
+
+    response = await db_client.post(
+        f"/tasks/user/{mock_user.id}/bulk/delete", json={"ids": [ids[1], ids[2], 999]}
+    )
+    deleted = response.json()
+    assert [item["ok"] for item in deleted["items"]] == [True, True, False]
+
+    tasks = (await db_client.get(f"/tasks/user/{mock_user.id}")).json()
+    assert [(t["id"], t["title"]) for t in tasks] == [(ids[0], "Edited")]
+
+
+@pytest.mark.asyncio
+async def test_bulk_too_many_items(authenticated_client, mock_user, mocker):
+    """Тест ограничения размера пакета"""
+
+    mocker.patch("src.api.endpoints.tasks.settings.BULK_MAX_ITEMS", 2)
+
+    response = await authenticated_client.post(
+        f"/tasks/user/{mock_user.id}/bulk/delete", json={"ids": [1, 2, 3]}
+    )
+
+    assert response.status_code == status.HTTP_413_CONTENT_TOO_LARGE
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_repeated_ids(authenticated_client, mock_user):
+    """Тест: повтор id в пакетном обновлении отклоняется целиком"""
+
+    response = await authenticated_client.put(
+        f"/tasks/user/{mock_user.id}/bulk",
+        json={"items": [
+            {"id": 1, "title": "A", "description": None},
+            {"id": 2, "title": "B", "description": None},
+            {"id": 1, "title": "C", "description": None},
+        ]}
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert "Повторяющиеся id: 1" in response.json()["detail"][0]["msg"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_forbidden(authenticated_client, mock_user):
+    """Тест пакетного создания задач другому пользователю"""
+
+    response = await authenticated_client.post(
+        f"/tasks/user/{mock_user.id + 1}/bulk",
+        json={"items": [{"title": "Task", "description": None}]}
+    )
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+# ============ Тесты поиска ============
+
+@pytest.mark.asyncio
+async def test_search_tasks_prefix_and_ranking(db_client, db_session, mock_user):
+    """Тест поиска: слова по префиксу, совпадение в заголовке выше, чем в описании"""
+
+    url = f"/tasks/user/{mock_user.id}"
+    in_description = (await db_client.post(url, json={"title": "Разное", "description": "купить молоко"})).json()
+    in_title = (await db_client.post(url, json={"title": "Молоко и хлеб", "description": None})).json()
+    await db_client.post(url, json={"title": "Позвонить маме", "description": None})
+
+    other_user = UserDB(id=2, username="other", email="other@example.com", password_hash="x")
+    db_session.add(other_user)
+    db_session.add(TaskDB(title="Молоко", description=None, user_id=other_user.id))
+    await db_session.commit()
+
+    response = await db_client.get(f"{url}/search", params={"q": "МОЛ"})
+    assert response.status_code == status.HTTP_200_OK
+    assert [task["id"] for task in response.json()] == [in_title["id"], in_description["id"]]
+
+    response = await db_client.get(f"{url}/search", params={"q": "молоко хл"})
+    assert [task["id"] for task in response.json()] == [in_title["id"]]
+
+    response = await db_client.get(f"{url}/search", params={"q": "\"*:()"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == []
+
+
+@pytest.mark.asyncio
+async def test_search_tasks_pagination_and_updates(db_client, mock_user):
+    """Тест поиска: курсор по (rank, id) и синхронизация индекса при изменениях"""
+
+    url = f"/tasks/user/{mock_user.id}"
+    created = await db_client.post(
+        f"{url}/bulk", json={"items": [{"title": f"Отчёт {i}", "description": None} for i in range(5)]}
+    )
+    ids = [item["id"] for item in created.json()["items"]]
+
+    seen, cursor = [], None
+    while True:
+        params = {"q": "отчёт", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = await db_client.get(f"{url}/search", params=params)
+        seen.extend(task["id"] for task in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert sorted(seen) == sorted(ids)
+    assert len(seen) == len(set(seen))
+
+    await db_client.patch(f"{url}/task/{ids[0]}", json={"title": "Презентация"})
+    await db_client.delete(f"{url}/task/{ids[1]}")
+    found = {task["id"] for task in (await db_client.get(f"{url}/search", params={"q": "отчёт"})).json()}
+    assert found == set(ids[2:])
+    found = [task["id"] for task in (await db_client.get(f"{url}/search", params={"q": "през"})).json()]
+    assert found == [ids[0]]
+
+    response = await db_client.get(f"{url}/search", params={"q": "отчёт", "cursor": "broken"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,68 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src.db.crud import add_tasks, search_tasks
+from src.db.models import TaskChangeDB, UserDB
+from src.db.stats import check, rebuild
+from src.db.upgrade import upgrade_schema
+
+# Схема первой версии: без счётчиков, журнала, архива, триггеров и поиска
+BASELINE = [
+    """CREATE TABLE users (
+        id INTEGER NOT NULL PRIMARY KEY, username VARCHAR NOT NULL UNIQUE,
+        password_hash VARCHAR NOT NULL, email VARCHAR(30))""",
+    """CREATE TABLE tasks (
+        id INTEGER NOT NULL PRIMARY KEY, title VARCHAR(30) NOT NULL, description VARCHAR(50),
+        user_id INTEGER NOT NULL REFERENCES users (id), created_at DATETIME NOT NULL)""",
+    "CREATE INDEX ix_tasks_user_id ON tasks (user_id)",
+    "INSERT INTO users (id, username, password_hash) VALUES (1, 'old', 'hash')",
+    "INSERT INTO tasks (title, description, user_id, created_at) VALUES "
+    "('Old report', NULL, 1, '2025-01-01 10:00:00'), ('Old plan', 'draft', 1, '2025-01-02 10:00:00')",
+]
+
+
+@pytest.mark.asyncio
+async def test_upgrade_existing_database():
+    """Тест обновления БД первой версии: колонки, таблицы, поиск и триггеры, повторный запуск"""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    try:
+        async with engine.begin() as conn:
+            for statement in BASELINE:
+                await conn.execute(text(statement))
+            steps = await upgrade_schema(conn)
+            assert {"users.tasks_version", "task_stats", "task_changes", "tasks_archive", "search"} <= set(steps)
+            # Счётчики старых задач ещё не посчитаны
+            assert len(await check(conn)) == 3
+            await rebuild(conn)
+            assert await check(conn) == []
+
+            # Повторный запуск ничего не добавляет и триггеры не дублирует
+            assert await upgrade_schema(conn) == ["triggers"]
+            tables = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names())
+            assert {"import_checkpoints", "tasks_fts"} <= set(tables)
+
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            await add_tasks(1, [{"title": "New report", "description": None}], session=session)
+            user = await session.scalar(select(UserDB).where(UserDB.id == 1))
+            assert (user.tasks_version, user.tasks_count) == (1, 3)
+            assert await session.scalar(select(TaskChangeDB.seq).where(TaskChangeDB.user_id == 1)) == 1
+            found = await search_tasks(1, ["report"], limit=10, session=session)
+            assert sorted(row["title"] for row in found) == ["New report", "Old report"]
+            assert await check(await session.connection()) == []
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_upgrade_requires_schema():
+    """Тест обновления пустой БД: схему создаёт init_db.py"""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    try:
+        async with engine.begin() as conn:
+            with pytest.raises(RuntimeError):
+                await upgrade_schema(conn)
+    finally:
+        await engine.dispose()
@@ -1,5 +1,9 @@
+import hashlib
+
 import pytest
 from fastapi import status
+from passlib.hash import pbkdf2_sha256
+from src.core.security import Hasher
 from src.db.models import UserDB
 
 
@@ -12,7 +16,7 @@ async def test_register_user(client, mocker):
     mocker.patch("src.db.crud._get_user_by_username", return_value=None)
     mocker.patch("src.core.security.Hasher.get_hash", return_value="hashed_password_mock")
 
-    async def mock_add_user_func(user):
+    async def mock_add_user_func(user, session=None):
         user.id = 1
         return user
 
@@ -95,6 +99,34 @@ async def test_login_user_success(client, mocker):
     assert len(data["access_token"]) > 0  # Просто проверяем, что токен не пустой
 
 
+@pytest.mark.asyncio
+async def test_login_rehashes_outdated_hash(client, mocker):
+    """Тест пересчёта хэша с устаревшим числом раундов при входе"""
+
+    prepared = hashlib.sha256(b"testpassword").hexdigest()
+    mock_user = UserDB(
+        id=1,
+        username="testuser",
+        email="test@example.com",
+        password_hash=pbkdf2_sha256.using(rounds=1000).hash(prepared)
+    )
+
+    mocker.patch("src.db.crud._get_user_by_username", return_value=mock_user)
+    update_hash = mocker.patch("src.api.endpoints.users.update_user_password_hash")
+
+    response = await client.post("/users/login", json={
+        "username": "testuser",
+        "password": "testpassword"
+    })
+
+    assert response.status_code == status.HTTP_200_OK
+    user_id, new_hash = update_hash.call_args.args
+    assert "session" in update_hash.call_args.kwargs
+    assert user_id == 1
+    assert not Hasher.needs_update(new_hash)
+    assert Hasher.verify_password("testpassword", new_hash)
+
+
 @pytest.mark.asyncio
 async def test_login_user_wrong_password(client, mocker):
     """Тест авторизации с неправильным паролем"""
@@ -74,6 +74,57 @@ function afterLoginUi() {
   const uid = localStorage.getItem("lt_user_id");
   els.hello.textContent = uid ? `Пользователь #${uid}` : "";
   loadTasks();
+  connectFeed();
+}
+
+// Лента изменений: сервер присылает созданные/изменённые/удалённые задачи,
+// поэтому после своих изменений список не перезагружается целиком
+let feed = null;
+
+function feedConnected() {
+  return !!feed && feed.readyState === WebSocket.OPEN;
+}
+
+function connectFeed() {
+  disconnectFeed();
+  const token = els.token.value.trim();
+  const uid = Number(els.userId.value);
+  if (!token || !uid) return;
+  const wsBase = API_BASE.replace(/^http/, "ws");
+  const socket = new WebSocket(`${wsBase}/tasks/user/${uid}/ws?token=${encodeURIComponent(token)}`);
+  socket.onmessage = (msg) => applyEvent(JSON.parse(msg.data), uid);
+  socket.onclose = () => {
+    if (feed === socket) feed = null;
+  };
+  feed = socket;
+}
+
+function disconnectFeed() {
+  if (feed) {
+    const socket = feed;
+    feed = null;
+    socket.close();
+  }
+}
+
+function applyEvent(event, userId) {
+  if (event.type === "created" || event.type === "updated") {
+    event.tasks.forEach((t) => upsertTaskItem(t, userId));
+  } else if (event.type === "deleted") {
+    event.ids.forEach((id) => {
+      const li = els.tasks.querySelector(`li[data-id="${id}"]`);
+      if (li) li.remove();
+    });
+  } else if (event.type === "resync") {
+    loadTasks();
+  }
+}
+
+function upsertTaskItem(task, userId) {
+  const li = taskItem(task, userId);
+  const existing = els.tasks.querySelector(`li[data-id="${task.id}"]`);
+  if (existing) existing.replaceWith(li);
+  else els.tasks.appendChild(li);
 }
 
 async function register(evt) {
@@ -148,7 +199,7 @@ async function createTask(evt) {
       body: JSON.stringify(body),
     });
     if (!res.ok) throw new Error(await res.text());
-    await loadTasks();
+    if (!feedConnected()) await loadTasks();
     els.taskTitle.value = "";
     els.taskDesc.value = "";
   } catch (e) {
@@ -158,6 +209,7 @@ async function createTask(evt) {
 
 function taskItem(task, userId) {
   const li = document.createElement("li");
+  li.dataset.id = String(task.id);
   const title = document.createElement("input");
   title.type = "text";
   title.value = task.title;
@@ -177,7 +229,7 @@ function taskItem(task, userId) {
         body: JSON.stringify({ title: title.value, description: desc.value || null }),
       });
       if (!res.ok) throw new Error(await res.text());
-      await loadTasks();
+      if (!feedConnected()) await loadTasks();
     } catch (e) {
       alert(e.message || "Ошибка обновления");
     }
@@ -190,7 +242,7 @@ function taskItem(task, userId) {
         headers: { ...getAuthHeaders() },
       });
       if (!res.ok) throw new Error(await res.text());
-      await loadTasks();
+      if (!feedConnected()) await loadTasks();
     } catch (e) {
       alert(e.message || "Ошибка удаления");
     }
@@ -204,12 +256,17 @@ async function loadTasks() {
   els.tasks.innerHTML = "";
   try {
     const uid = Number(els.userId.value);
-    const res = await fetch(`${API_BASE}/tasks/user/${uid}`, {
-      headers: { ...getAuthHeaders() },
-    });
-    if (!res.ok) throw new Error(await res.text());
-    const items = await res.json();
-    items.forEach((t) => els.tasks.appendChild(taskItem(t, uid)));
+    let cursor = null;
+    do {
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+      const res = await fetch(`${API_BASE}/tasks/user/${uid}${query}`, {
+        headers: { ...getAuthHeaders() },
+      });
+      if (!res.ok) throw new Error(await res.text());
+      const items = await res.json();
+      items.forEach((t) => els.tasks.appendChild(taskItem(t, uid)));
+      cursor = res.headers.get("X-Next-Cursor");
+    } while (cursor);
   } catch (e) {
     alert(e.message || "Ошибка загрузки задач");
   }
@@ -225,6 +282,7 @@ els.tabs.addEventListener("click", (e) => {
   }
 });
 els.backToAuth.addEventListener("click", () => {
+  disconnectFeed();
   els.token.value = "";
   enableTasksTab(false);
   switchTab("auth");